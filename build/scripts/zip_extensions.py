@@ -24,10 +24,34 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 zip_extensions.py
 
 This module takes all extensions in the commotion_client/extension/ directory and prepares them as commotion packages.
+
+Each package starts with a manifest (see write_manifest) that the client reads in place of the package's central directory and config file.
+
+Packages can include compiled bytecode so that modules do not have to be compiled each time the client imports them. zipimport can not write bytecode back into an archive, so without it every module of an extension is compiled each time the client starts. Bytecode is stored beside its source as module.pyc, the layout zipimport looks for, and only works with the python version that built it. Packages built with "both" fall back to the sources under other versions.
+
+e.g:
+  python3 build/scripts/zip_extensions.py --bytecode both --optimize 1
 """
 
 import zipfile
 import os
+import json
+import time
+import zlib
+import hashlib
+import argparse
+import tempfile
+import py_compile
+
+#The name of the manifest member of each package. Keep in sync with commotion_client/utils/zip_catalog.py
+MANIFEST_NAME = "commotion_manifest.json"
+MANIFEST_FORMAT = 1
+
+#What is packaged for each python module.
+#  source: only the .py sources
+#  both: the .py sources and their .pyc bytecode
+#  bytecode: only the .pyc bytecode
+BYTECODE_MODES = ("source", "both", "bytecode")
 
 def get_extensions(main_directory):
     """Gets all extension sub-directories within a given directory.
@@ -52,34 +76,136 @@ def get_extensions(main_directory):
         break
     return extensions
 
-def zip_extension(source, destination):
-    """short description
-    
-    long description
+def zip_extension(source, destination, bytecode="source", optimize=1):
+    """Packages an extension directory as a zip archive.
+
+    Any existing package of the same name is replaced. The manifest is written first so that the client can read it without reading the rest of the archive.
     
     Args:
       source (string): The relative path to the source directory which contains the extension files.
       destination (string): The relative path to the destination directory where the zipfile will be placed.
-    
+      bytecode (string): What to package for each python module. One of BYTECODE_MODES.
+      optimize (int): The optimization level [0, 1, or 2] bytecode is compiled with.
+
+    Returns:
+      The path (string) of the package written.
+
+    Raises:
+      ValueError: If the bytecode mode is unknown or the extension's config is missing or invalid.
+      py_compile.PyCompileError: If a module cannot be compiled.
     """
+    if bytecode not in BYTECODE_MODES:
+        raise ValueError("Unknown bytecode mode {0}. Choose one of {1}.".format(bytecode, ", ".join(BYTECODE_MODES)))
     #if extension is not a directory then this won't work
     if not os.path.isdir(source):
-                raise NotADirectoryError("{0} is not a directory.".format(main_directory))
+                raise NotADirectoryError("{0} is not a directory.".format(source))
     extension_name = os.path.basename(os.path.normpath(source))
     to_zip = []
     #walk the full extension directory.
     for dirpath, dirnames, filenames in os.walk(source):
+        #don't package bytecode caches
+        if "__pycache__" in dirnames:
+            dirnames.remove("__pycache__")
         if "__init__.py" not in filenames:
             touch_init(dirpath)
             to_zip.append(os.path.join(dirpath, "__init__.py"))
-        for zip_file in filenames:
+        for zip_file in sorted(filenames):
             to_zip.append(os.path.join(dirpath, zip_file))
-    #create and populate zipfile
-    with zipfile.ZipFile(os.path.join(destination, extension_name), 'a') as compressed_extension:
-        for ready_file in to_zip:
-            extension_path = os.path.relpath(ready_file, source)
-            compressed_extension.write(ready_file, extension_path)
-        
+    files = [(os.path.relpath(ready_file, source).replace(os.sep, "/"), ready_file) for ready_file in to_zip]
+    package = os.path.join(destination, extension_name)
+    with tempfile.TemporaryDirectory() as build_directory:
+        if bytecode != "source":
+            files = compile_files(files, build_directory, bytecode == "both", optimize)
+        manifest = build_manifest(files)
+        #create and populate zipfile
+        with zipfile.ZipFile(package, 'w') as compressed_extension:
+            write_manifest(compressed_extension, manifest)
+            for extension_path, ready_file in files:
+                compressed_extension.write(ready_file, extension_path)
+    return package
+
+def compile_files(files, build_directory, keep_source=True, optimize=1):
+    """Compiles the python modules of an extension to bytecode.
+
+    Args:
+      files (list): (archive name, file path) tuples of every file that will be packaged.
+      build_directory (string): A directory to write the compiled bytecode within.
+      keep_source (bool): Package the .py sources alongside their bytecode.
+      optimize (int): The optimization level [0, 1, or 2] to compile with.
+
+    Returns:
+      The (archive name, file path) tuples to package, with the bytecode of each module following its source.
+
+    Raises:
+      py_compile.PyCompileError: If a module cannot be compiled.
+    """
+    compiled = []
+    for name, path in files:
+        if not name.endswith(".py"):
+            compiled.append((name, path))
+            continue
+        if keep_source:
+            compiled.append((name, path))
+        bytecode_name = name + "c"
+        bytecode_path = os.path.join(build_directory, *bytecode_name.split("/"))
+        os.makedirs(os.path.dirname(bytecode_path), exist_ok=True)
+        #dfile is the path shown in tracebacks from the compiled module.
+        py_compile.compile(path, cfile=bytecode_path, dfile=name, doraise=True, optimize=optimize)
+        compiled.append((bytecode_name, bytecode_path))
+    return compiled
+
+def build_manifest(files):
+    """Builds the manifest of an extension package.
+
+    Args:
+      files (list): (archive name, file path) tuples of every file that will be packaged.
+
+    Returns:
+      The manifest (dictionary).
+        {"format": 1,
+         "config_file": "test.conf",
+         "config": {"name": "unit_test_mock", ...},
+         "files": {"main.py": {"size": 1024, "crc": 2309474432, "sha256": "..."}, ...},
+         "entry_points": {"main": "main", "settings": "main", "toolbar": "test_bar", "tests": "tests"}}
+
+    Raises:
+      ValueError: If the extension does not have exactly one valid JSON config file.
+    """
+    manifest = {"format":MANIFEST_FORMAT, "files":{}}
+    config_files = [name for name, path in files if name.endswith(".conf") and "/" not in name]
+    if len(config_files) != 1:
+        raise ValueError("Extensions must have exactly one config file. Found {0}.".format(config_files))
+    for name, path in files:
+        with open(path, 'rb') as packaged:
+            data = packaged.read()
+        manifest["files"][name] = {"size":len(data),
+                                   "crc":zlib.crc32(data) & 0xffffffff,
+                                   "sha256":hashlib.sha256(data).hexdigest()}
+        if name == config_files[0]:
+            config = json.loads(data.decode('utf-8'))
+    if not isinstance(config, dict):
+        raise ValueError("The config file {0} does not contain a JSON object.".format(config_files[0]))
+    manifest["config_file"] = config_files[0]
+    manifest["config"] = config
+    main = config.get("main", "main")
+    manifest["entry_points"] = {"main":main,
+                                "settings":config.get("settings", main),
+                                "toolbar":config.get("toolbar", main),
+                                "tests":config.get("tests", "tests")}
+    return manifest
+
+def write_manifest(compressed_extension, manifest):
+    """Writes a manifest as the next member of a package.
+
+    The manifest is stored uncompressed so that the client can read it directly from the start of the package.
+
+    Args:
+      compressed_extension (ZipFile): A package opened for writing.
+      manifest (dictionary): The manifest to write.
+    """
+    info = zipfile.ZipInfo(MANIFEST_NAME, date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    compressed_extension.writestr(info, json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode('utf-8'))
 
 def touch_init(extension_dir):
     """ Touches the init file in each directory of an extension to make sure it exists.
@@ -87,17 +213,32 @@ def touch_init(extension_dir):
     Args:
       extension_dir (string): The path to a directory an __init__.py file should exist within.
     """
-    with open(os.path.join(extension_dir, "__init__.py"), 'a') as f:
-        os.utime("__init__.py")    
+    init_file = os.path.join(extension_dir, "__init__.py")
+    with open(init_file, 'a') as f:
+        os.utime(init_file)
     
-def zip_all():
+def zip_all(bytecode="source", optimize=1):
     """Zip's all extensions in the main commotion_client directory and moves them into the build directories resources folder.
+
+    Args:
+      bytecode (string): What to package for each python module. One of BYTECODE_MODES.
+      optimize (int): The optimization level [0, 1, or 2] bytecode is compiled with.
     """
     main_directory = os.path.join("commotion_client", "extensions")
     zip_directory = os.path.join("build", "resources")
     extension_paths = get_extensions(main_directory)
     for extension_directory in extension_paths:
-        zip_extension(extension_directory, zip_directory)
+        zip_extension(extension_directory, zip_directory, bytecode, optimize)
+
+def get_args():
+    """Parses the packaging options."""
+    parser = argparse.ArgumentParser(description="Package the core Commotion extensions.")
+    parser.add_argument("-b", "--bytecode", choices=BYTECODE_MODES, default="source",
+                        help="Package python sources, sources and compiled bytecode, or only bytecode. Bytecode only runs on the python version that built it.")
+    parser.add_argument("-O", "--optimize", type=int, choices=[0, 1, 2], default=1,
+                        help="The optimization level bytecode is compiled with.")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    zip_all()
+    args = get_args()
+    zip_all(args.bytecode, args.optimize)
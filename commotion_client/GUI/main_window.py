@@ -23,7 +23,7 @@ from commotion_client.assets import commotion_assets_rc
 from commotion_client.GUI.menu_bar import MenuBar
 from commotion_client.GUI.crash_report import CrashReport
 from commotion_client.GUI import welcome_page
-from commotion_client.utils import extension_manager
+from commotion_client.utils import extension_service
 
 class MainWindow(QtGui.QMainWindow):
     """
@@ -34,19 +34,29 @@ class MainWindow(QtGui.QMainWindow):
     clean_up = QtCore.pyqtSignal()
     app_message = QtCore.pyqtSignal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, load_extensions=True, service=None):
+        """
+        Args:
+          parent (QWidget): The parent of the main window.
+          load_extensions (bool): Install the extension libraries while creating the menu if none are installed. Pass False when the libraries are being loaded in the background and the menu will be filled in as they are installed. See MenuBar.
+          service (ExtensionService): The extension service the window and its menu share. Defaults to the application's shared service.
+        """
         super().__init__()
         #Keep track of if the gui needs any clean up / saving.
         self._dirty = False
         self.log = logging.getLogger("commotion_client."+__name__)
         self.translate = QtCore.QCoreApplication.translate
 
+        self.service = service or extension_service.get_service()
         self.init_crash_reporter()
-        self.setup_menu_bar()
+        self.setup_menu_bar(load_extensions)
         #Setup extension manager for viewports
-        self.ext_manager = extension_manager.ExtensionManager()
-        self.viewport = welcome_page.ViewPort(self)
-        self.load_viewport(self.viewport)
+        self.ext_manager = self.service.manager
+        #The extension whose viewport is shown. None for the welcome page.
+        self.current_extension = None
+        self.viewport = None
+        self.load_viewport(welcome_page.ViewPort(self))
+        self.init_idle_timer()
         
         #Default Paramiters #TODO to be replaced with paramiters saved between instances later
         try:
@@ -70,9 +80,9 @@ class MainWindow(QtGui.QMainWindow):
         #bool QMainWindow.restoreDockWidget (self, QDockWidget dockwidget)
         pass
 
-    def setup_menu_bar(self):
+    def setup_menu_bar(self, load_extensions=True):
         """ Set up menu bar. """
-        self.menu_bar = MenuBar(self)
+        self.menu_bar = MenuBar(self, load_extensions=load_extensions, service=self.service)
         #Create dock for menu-bar TEST
         self.menu_dock = QtGui.QDockWidget(self)
         #turn off title bar
@@ -104,12 +114,15 @@ class MainWindow(QtGui.QMainWindow):
         """Load and set viewport to next viewport and load viewport """
         self.log.info(self.next_extension)
         next_view = self.next_extension
-        next_viewport = self.ext_manager.load_user_interface(str(next_view), "main")
-        viewport_object = next_viewport(self)
-        self.load_viewport(viewport_object)
+        with self.ext_manager.profiler.timer(str(next_view), "viewport"):
+            next_viewport = self.ext_manager.load_user_interface(str(next_view), "main")
+            viewport_object = next_viewport(self)
+            self.load_viewport(viewport_object)
+        self.current_extension = str(next_view)
         
     def load_viewport(self, viewport):
         """Apply current viewport to the central widget and set up proper signal's for communication. """
+        self.release_viewport()
         testme = self.setCentralWidget(viewport)
         self.viewport = viewport
         self.viewport.show()
@@ -126,6 +139,37 @@ class MainWindow(QtGui.QMainWindow):
         #Attach clean up signal
         self.clean_up.connect(self.viewport.clean_up)
 
+    def release_viewport(self):
+        """Disconnects the current viewport so that nothing but the main window refers to it.
+
+        The main window deletes its old central widget when a new one is set. Without these connections the viewport, and the extension modules it was created from, can be freed once its extension is unloaded.
+        """
+        if self.viewport is None:
+            return
+        connections = [(self.viewport.data_report, self.crash_report.crash_info),
+                       (self.crash_report.crash_override, self.viewport.start_report_collection),
+                       (self.viewport.error_report, self.crash_report.alert_user),
+                       (self.clean_up, self.viewport.clean_up),
+                       (self.viewport.on_stop, self.set_viewport)]
+        for signal, slot in connections:
+            try:
+                signal.disconnect(slot)
+            except TypeError:
+                #Not connected
+                pass
+        self.viewport = None
+
+    def init_idle_timer(self):
+        """Periodically unloads the extensions that have not been shown within the extension managers idle timeout."""
+        self.idle_timer = QtCore.QTimer(self)
+        self.idle_timer.timeout.connect(self.unload_idle_extensions)
+        if self.ext_manager.idle_timeout:
+            self.idle_timer.start(min(self.ext_manager.idle_timeout, 60) * 1000)
+
+    def unload_idle_extensions(self):
+        """Unloads idle extensions other than the one currently shown."""
+        self.ext_manager.unload_idle(keep=[self.current_extension])
+
     def change_viewport(self, viewport):
         """Prepare next viewport for loading and start loading process when ready."""
         self.log.debug(self.translate("logs", "Request to change viewport received."))
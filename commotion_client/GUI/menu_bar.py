@@ -21,14 +21,23 @@ from PyQt4 import QtCore
 from PyQt4 import QtGui
 
 #Commotion Client Imports
-from commotion_client.utils.extension_manager import ExtensionManager
+from commotion_client.utils import extension_service
 
 class MenuBar(QtGui.QWidget):
 
     #create signal used to communicate with mainWindow on viewport change
     viewport_requested = QtCore.pyqtSignal(str)
+    #(installed, updated, removed) extension names, emitted once the menu has been refreshed for them
+    extensions_updated = QtCore.pyqtSignal(list, list, list)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, ext_mgr=None, load_extensions=True, service=None):
+        """
+        Args:
+          parent (QWidget): The parent of the menu bar.
+          ext_mgr (ExtensionManager): An extension manager to populate the menu from instead of the application's shared one. Ignored if a service is provided.
+          load_extensions (bool): Install the extension libraries if no extensions are installed, and watch the libraries for changes. When False the menu starts with whatever is already installed, which may be nothing, and is filled in as the service announces extensions. Call start_watching once the libraries have been loaded.
+          service (ExtensionService): The extension service the menu follows. Defaults to the application's shared service.
+        """
         super().__init__()
 
         self.layout = QtGui.QVBoxLayout()
@@ -36,12 +45,26 @@ class MenuBar(QtGui.QWidget):
         #set function logger
         self.log = logging.getLogger("commotion_client."+__name__)
         self.translate = QtCore.QCoreApplication.translate
-        self.ext_mgr = ExtensionManager()
+        if service is None:
+            if ext_mgr is not None:
+                service = extension_service.ExtensionService(ext_mgr)
+            else:
+                service = extension_service.get_service()
+        self.service = service
+        self.ext_mgr = service.manager
+        self.service.extensions_updated.connect(self.refresh_extensions)
+        #top level menu item -> (title button, sub-menu)
+        self.sections = {}
+        #extension name -> the top level menu item it is listed under
+        self.extension_parents = {}
+        self.library_watcher = None
         try:
-            self.populate_menu()
+            self.populate_menu(load_extensions)
         except (NameError, AttributeError) as _excpt:
             self.log.info(self.translate("logs", "The Menu Bar could not populate the menu"))
             raise
+        if load_extensions:
+            self.start_watching()
         self.log.debug(QtCore.QCoreApplication.translate("logs", "Menu bar has initalized successfully."))
 
     def request_viewport(self, viewport):
@@ -66,15 +89,33 @@ class MenuBar(QtGui.QWidget):
                 else:
                     self.clear_layout(item.layout())
 
-    def populate_menu(self):
-        """Resets and populates the menu using loaded extensions."""
+    def start_watching(self):
+        """Updates the menu as extensions are added to, updated in, or removed from the libraries.
+
+        Returns:
+          The LibraryWatcher watching the libraries, or None if the service will start watching once the libraries have been loaded.
+        """
+        if self.library_watcher is None:
+            self.library_watcher = self.service.start_watching()
+        return self.library_watcher
+
+    def populate_menu(self, bootstrap=True):
+        """Resets and populates the menu using loaded extensions.
+
+        Args:
+          bootstrap (bool): Install the extension libraries if no extensions are installed. When False an empty menu is left empty.
+        """
         if not self.layout.isEmpty():
             self.clear_layout(self.layout)
+        self.sections = {}
+        self.extension_parents = {}
         menu_items = {}
-        if not self.ext_mgr.check_installed():
-            self.ext_mgr.init_extension_libraries()
+        if bootstrap:
+            self.service.load_now()
         extensions = self.ext_mgr.get_installed().keys()
-        if extensions:
+        if not extensions and not bootstrap:
+            self.log.debug(self.translate("logs", "No extensions are installed yet. The menu will be filled in as they are installed."))
+        elif extensions:
             top_level = self.get_parents(extensions)
             for top_level_item in top_level:
                 try:
@@ -86,6 +127,7 @@ class MenuBar(QtGui.QWidget):
                     if current_item:
                         menu_items[top_level_item] = current_item
             if menu_items:
+                self.sections = menu_items
                 for title, section in menu_items.items():
                     #Add top level menu item
                     self.layout.addWidget(section[0])
@@ -96,7 +138,56 @@ class MenuBar(QtGui.QWidget):
         else:
             raise NameError(QtCore.QCoreApplication.translate("exception", "No extensions found. Please re-run the commotion_client with full verbosity to find out what went wrong."))
         self.setLayout(self.layout)
-        
+
+    def refresh_extensions(self, added, changed, removed):
+        """Rebuilds only the top level menu items that list extensions which have been installed, updated, or removed.
+
+        Args:
+          added (list): The names of extensions that were installed.
+          changed (list): The names of extensions that were updated.
+          removed (list): The names of extensions that were removed.
+        """
+        parents = set()
+        for ext in list(added) + list(changed) + list(removed):
+            previous = self.extension_parents.pop(ext, None)
+            if previous is not None:
+                parents.add(previous)
+            if ext not in self.ext_mgr.registry:
+                continue
+            try:
+                parents.add(self.ext_mgr.get_property(ext, "parent"))
+            except KeyError:
+                parents.add("Extensions")
+        for parent in sorted(parents):
+            self.refresh_section(parent)
+        self.log.debug(self.translate("logs", "Refreshed {0} menu items after extensions changed.".format(len(parents))))
+        self.extensions_updated.emit(list(added), list(changed), list(removed))
+
+    def refresh_section(self, parent):
+        """Replaces a single top level menu item and its sub-menu in place.
+
+        Args:
+          parent (string): The top level menu item to rebuild. If no installed extensions list it as their parent it is removed.
+        """
+        previous = self.sections.pop(parent, None)
+        try:
+            section = self.add_menu_item(parent)
+        except NameError:
+            section = None
+        expanded = False
+        position = self.layout.count()
+        if previous is not None:
+            position = self.layout.indexOf(previous[0])
+            expanded = previous[0].isChecked()
+            for widget in previous:
+                self.layout.removeWidget(widget)
+                widget.deleteLater()
+        if section is not None:
+            self.layout.insertWidget(position, section[0])
+            self.layout.insertWidget(position + 1, section[1])
+            section[0].setChecked(expanded)
+            self.sections[parent] = section
+
     def get_parents(self, extension_list):
         """Gets all unique parents from a list of extensions.
 
@@ -131,7 +222,7 @@ class MenuBar(QtGui.QWidget):
         Returns:
         A tuple containing a top level button and its hidden sub-menu items.        
         """
-        extensions = self.ext_mgr.get_extension_from_property('parent', parent)
+        extensions = self.ext_mgr.sort_by_menu_level(self.ext_mgr.get_extension_from_property('parent', parent))
         if not extensions:
             raise NameError(self.translate("logs", "No extensions found under the parent item {0}.".format(parent)))
         #Create Top level item button
@@ -142,6 +233,7 @@ class MenuBar(QtGui.QWidget):
         sub_menu_layout = QtGui.QVBoxLayout()
         #populate the sub-menu item table.
         for ext in extensions:
+            self.extension_parents[ext] = parent
             sub_menu_item = subMenuWidget(self)
             try:
                 menu_item_title = self.ext_mgr.get_property(ext, 'menu_item')
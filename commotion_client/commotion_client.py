@@ -24,7 +24,8 @@ from PyQt4 import QtCore
 from commotion_client.utils import logger
 from commotion_client.utils import thread
 from commotion_client.utils import single_application
-from commotion_client.utils import extension_manager
+from commotion_client.utils import profiler
+from commotion_client.utils import extension_service
 
 from commotion_client.GUI import main_window
 from commotion_client.GUI import system_tray
@@ -48,6 +49,8 @@ def get_args():
     arg_parser.add_argument("-k", "--key",
                             help="Choose a unique application key for this Commotion Instance",
                             type=str)
+    arg_parser.add_argument("-p", "--profile",
+                            help="Write per-extension load timings to this file when the application exits.")
     args = arg_parser.parse_args()
     parsed_args = {}
     parsed_args['message'] = args.message if args.message else False
@@ -56,6 +59,7 @@ def get_args():
     parsed_args['logFile'] = args.logfile if args.logfile else None
     parsed_args['key'] = ['key'] if args.key else "commotionRocks" #TODO the key is PRIME easter-egg fodder
     parsed_args['status'] = "daemon" if args.daemon else False
+    parsed_args['profile'] = args.profile if args.profile else None
     return parsed_args
 
 #==================================
@@ -140,6 +144,12 @@ class CommotionClientApplication(single_application.SingleApplicationWithMessagi
         self.controller = False
         self.main = False
         self.sys_tray = False
+        #The extension manager, caches, and library watcher shared by every window.
+        self.extensions = extension_service.get_service()
+        self.extensions.loading_finished.connect(self.extensions_loaded)
+        self.profile = args.get('profile')
+        if self.profile:
+            self.aboutToQuit.connect(self.dump_profile)
 
         #initialize client (GUI, controller, etc) upon event loop start so that exit/quit works on errors.
         QtCore.QTimer.singleShot(0, self.init_client)
@@ -171,13 +181,12 @@ class CommotionClientApplication(single_application.SingleApplicationWithMessagi
     def start_full(self):
         """
         Start or switch client over to full client.
+
+        The main window is shown straight away and its menu is filled in as the extension libraries are loaded in the background.
         """
-        extensions = extension_manager.ExtensionManager()
-        if not extensions.check_installed():
-            extensions.init_extension_libraries()
         if not self.main:
             try:
-                self.main = self.create_main_window()
+                self.main = self.create_main_window(load_extensions=False)
             except Exception as _excp:
                 _catch_all = self.translate("logs", "Could not create Main Window. Application must be halted.")
                 self.log.critical(_catch_all)
@@ -194,6 +203,24 @@ class CommotionClientApplication(single_application.SingleApplicationWithMessagi
                 self.end(_catch_all)
             else:
                 self.init_sys_tray()
+            if self.main:
+                self.load_extensions()
+
+    def load_extensions(self):
+        """Loads the extension libraries on a worker thread. The main window's menu is filled in as each library is installed."""
+        self.extensions.load()
+
+    def extensions_loaded(self, completed):
+        """Starts watching the extension libraries for changes once they have been loaded.
+
+        @param completed bool True if every library was loaded, False if loading was cancelled or failed.
+        """
+        if self.main:
+            self.main.menu_bar.start_watching()
+
+    def stop_loading_extensions(self):
+        """Cancels loading the extension libraries and waits for the worker thread to stop."""
+        self.extensions.cancel_loading()
 
     def start_daemon(self):
         """
@@ -226,6 +253,7 @@ class CommotionClientApplication(single_application.SingleApplicationWithMessagi
         @param force_close bool Whole application exit if clean close fails. See: close_controller() & close_main_window()
         """
         try:
+            self.stop_loading_extensions()
             self.close_main_window(force_close)
             self.close_sys_tray(force_close)
             self.close_controller(force_close)
@@ -269,16 +297,18 @@ class CommotionClientApplication(single_application.SingleApplicationWithMessagi
 #                 MAIN WINDOW
 #=================================================
         
-    def create_main_window(self):
+    def create_main_window(self, load_extensions=True):
         """
         Will create a new main window or return existing main window if one is already created.
+
+        @param load_extensions bool Install the extension libraries while creating the menu if none are installed. See MainWindow.
         """
         if self.main:
             self.log.debug(self.translate("logs", "New window requested when one already exists. Returning existing main window."))
             self.log.info(self.translate("logs", "If you would like to close the main window and re-open it please call close_main_window() first."))
             return self.main
         try:
-            _main = main_window.MainWindow()
+            _main = main_window.MainWindow(load_extensions=load_extensions)
         except Exception as _excp:
             self.log.critical(self.translate("logs", "Could not create Main Window. Application must be halted."))
             raise
@@ -506,6 +536,14 @@ class CommotionClientApplication(single_application.SingleApplicationWithMessagi
         else:
             self.log.info(self.translate("logs", "message \"{0}\" not a supported type.".format(message)))
 
+    def dump_profile(self):
+        """Writes the extension load timings collected during this run to the profile file requested on the command line."""
+        try:
+            profiler.load_profiler.dump(self.profile)
+        except IOError as _excp:
+            self.log.warning(self.translate("logs", "The extension load profile could not be saved."))
+            self.log.debug(_excp)
+
     def end(self, message=None):
         """
         Handles properly exiting the application.
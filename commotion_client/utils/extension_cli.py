@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+extension_cli
+
+Command line tools for managing the extension libraries without starting the client.
+
+Key componenets handled within:
+ * listing the extension archives that are quarantined because they failed to load
+ * releasing quarantined archives so that they are loaded again
+ * installing an extension archive into the user or global library
+
+The client keeps its core library, and on Linux its global library, beside its executable. Pass the directory of the installed client with --client-dir to manage those libraries when these tools are not run from it.
+
+e.g:
+  python3 -m commotion_client.utils.extension_cli --client-dir /opt/commotion install path/to/extension --global
+  python3 -m commotion_client.utils.extension_cli quarantine list
+  python3 -m commotion_client.utils.extension_cli quarantine clear 9f86d08
+"""
+#Standard Library Imports
+import sys
+import os
+import argparse
+import json
+import time
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import extension_manager
+
+def get_args(argv=None):
+    """Parses the command line arguments."""
+    arg_parser = argparse.ArgumentParser(description="Manage the Commotion Client extension libraries.")
+    arg_parser.add_argument("--client-dir",
+                            help="The directory of the installed client, which holds its core and global libraries.")
+    commands = arg_parser.add_subparsers(dest="command")
+    install_parser = commands.add_parser("install", help="Install an extension archive.")
+    install_parser.add_argument("archive",
+                                help="The path to the extension archive, or - to read it from standard input.")
+    install_parser.add_argument("-g", "--global", dest="ext_type", action="store_const", const="global", default="user",
+                                help="Install the extension for all users instead of only the current user.")
+    quarantine_parser = commands.add_parser("quarantine",
+                                            help="List or release extension archives that are skipped because they failed to load.")
+    quarantine_commands = quarantine_parser.add_subparsers(dest="action")
+    list_parser = quarantine_commands.add_parser("list", help="List the quarantined extension archives.")
+    list_parser.add_argument("--json", action="store_true",
+                             help="Print the quarantined archives as JSON.")
+    clear_parser = quarantine_commands.add_parser("clear", help="Release quarantined extension archives so that they are loaded again.")
+    clear_parser.add_argument("hash", nargs="?",
+                              help="The hash, or the start of the hash, of the archive to release. Releases every archive if not provided.")
+    args = arg_parser.parse_args(argv)
+    if args.command is None or (args.command == "quarantine" and args.action is None):
+        arg_parser.print_help()
+        arg_parser.exit(2)
+    return args
+
+def set_client_libraries(manager, client_dir=None):
+    """Points the libraries the client keeps beside its executable at the installed client.
+
+    The extension manager places these libraries within the directory of the running executable. That is the client's own directory only when these tools are run from a frozen client. Otherwise it is the python interpreter's, so the libraries are moved to the client's directory, or left unset if it is not known.
+
+    Args:
+      manager (ExtensionManager): The extension manager whose libraries are set.
+      client_dir (string): The directory of the installed client.
+    """
+    if client_dir is None and getattr(sys, "frozen", False):
+        return
+    app_dir = os.path.abspath(QtCore.QCoreApplication.applicationDirPath())
+    for ext_type, library in list(manager.libraries.items()):
+        library = os.path.abspath(library)
+        if ext_type != "core" and not library.startswith(os.path.join(app_dir, "")):
+            continue
+        if client_dir is None:
+            del manager.libraries[ext_type]
+        elif ext_type == "core":
+            manager.libraries[ext_type] = os.path.join(os.path.abspath(client_dir), "extensions", "core")
+        else:
+            manager.libraries[ext_type] = os.path.join(os.path.abspath(client_dir), os.path.relpath(library, app_dir))
+
+def list_quarantine(manager, as_json=False):
+    """Prints the quarantined extension archives."""
+    entries = manager.get_quarantined()
+    if as_json:
+        print(json.dumps(entries, indent=2, sort_keys=True))
+        return 0
+    if not entries:
+        print("No extension archives are quarantined.")
+        return 0
+    for entry in entries:
+        print("{0}  {1}".format(entry['hash'][:12], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry['time']))))
+        print("  {0}".format(entry['reason']))
+        if entry['errors']:
+            print("  Invalid values: {0}".format(", ".join(entry['errors'])))
+        for path in entry['paths']:
+            print("  {0}".format(path))
+    return 0
+
+def clear_quarantine(manager, content_hash=None):
+    """Releases quarantined extension archives."""
+    try:
+        released = manager.release_quarantined(content_hash)
+    except KeyError as _excp:
+        print(_excp.args[0], file=sys.stderr)
+        return 1
+    print("Released {0} extension archives from the quarantine.".format(len(released)))
+    return 0
+
+def install(manager, archive, ext_type="user"):
+    """Installs an extension archive into a library."""
+    if ext_type not in manager.libraries:
+        print("The location of the {0} library is not known. Pass the directory of the installed client with --client-dir.".format(ext_type), file=sys.stderr)
+        return 1
+    source = sys.stdin.buffer if archive == "-" else archive
+    try:
+        added, changed, removed = manager.install_archive(source, ext_type)
+    except (ValueError, IOError) as _excp:
+        print(_excp.args[0] if _excp.args else _excp, file=sys.stderr)
+        return 1
+    if added:
+        print("Installed {0} into the {1} library.".format(", ".join(added), ext_type))
+    elif changed:
+        print("Updated {0} in the {1} library.".format(", ".join(changed), ext_type))
+    else:
+        print("The extension was already installed in the {0} library.".format(ext_type))
+    return 0
+
+def main(argv=None):
+    """Runs a command against the extension libraries of the current user.
+
+    Returns:
+      The exit status (int) of the command.
+    """
+    args = get_args(argv)
+    #The application names locate the same settings and libraries the client uses.
+    app = QtCore.QCoreApplication(sys.argv[:1])
+    app.setOrganizationName("The Open Technology Institute")
+    app.setOrganizationDomain("commotionwireless.net")
+    app.setApplicationName(QtCore.QCoreApplication.translate("main", "Commotion Client"))
+    manager = extension_manager.ExtensionManager()
+    set_client_libraries(manager, args.client_dir)
+    if args.command == "install":
+        return install(manager, args.archive, args.ext_type)
+    if args.action == "list":
+        return list_quarantine(manager, args.json)
+    return clear_quarantine(manager, args.hash)
+
+if __name__ == "__main__":
+    sys.exit(main())
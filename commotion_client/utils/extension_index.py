@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+extension_index
+
+A persistent, on-disk index of the extension archives found within an extension library.
+
+Key componenets handled within:
+ * storing the parsed config, central directory, and validation results of extension archives
+ * identifying archives that have not changed since they were last scanned
+
+Each library [core, global, user] has its own index file within the users cache directory. Entries are keyed by the absolute path of the archive and carry the archive's modification time, size, and content hash. An archive whose modification time and size are unchanged is served from the index without being opened. An archive whose modification time or size has changed, but whose content hash has not, is also served from the index.
+
+"""
+#Standard Library Imports
+import logging
+import os
+import json
+import hashlib
+import threading
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import fs_utils
+
+class ExtensionIndex(object):
+    """The persistent index of a single extension library."""
+
+    #Increment when the format of an index entry changes so that old indexes are discarded.
+    version = 2
+
+    def __init__(self, library, path=None):
+        """
+        Args:
+          library (string): The path to the extension library this index describes.
+          path (string): The path of the index file. Defaults to a file within the users cache directory.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.library = os.path.abspath(str(library))
+        self.path = path if path else self.default_path(self.library)
+        self.entries = {}
+        self.dirty = False
+        #Archives within a library can be scanned from multiple threads.
+        self._lock = threading.RLock()
+        self.load()
+
+    @staticmethod
+    def default_path(library):
+        """Returns the default index file path for a library.
+
+        Args:
+          library (string): The absolute path to an extension library.
+
+        Returns:
+          The path (string) to the libraries index file within the users cache directory.
+        """
+        library_id = hashlib.sha1(library.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(fs_utils.get_cache_dir(), "extension_index_{0}.json".format(library_id))
+
+    def load(self):
+        """Loads the index file from disk.
+
+        A missing, unreadable, or outdated index file results in an empty index.
+        """
+        with self._lock:
+            self.entries = {}
+            self.dirty = False
+            try:
+                with open(self.path, mode='r', encoding="utf-8") as index_file:
+                    data = json.load(index_file)
+            except FileNotFoundError:
+                self.log.debug(self.translate("logs", "No extension index exists for the library at {0}.".format(self.library)))
+                return
+            except (OSError, ValueError) as _excp:
+                self.log.warning(self.translate("logs", "The extension index at {0} could not be read and will be rebuilt.".format(self.path)))
+                self.log.debug(_excp)
+                return
+            if data.get('version') != self.version or data.get('library') != self.library:
+                self.log.info(self.translate("logs", "The extension index at {0} is out of date and will be rebuilt.".format(self.path)))
+                return
+            self.entries = data.get('entries', {})
+            self.log.debug(self.translate("logs", "Loaded {0} entries from the extension index at {1}.".format(len(self.entries), self.path)))
+
+    def save(self):
+        """Writes the index to disk if it has changed.
+
+        The index is written to a temporary file which then replaces the existing index so that a failed write never leaves a partial index behind.
+
+        Returns:
+          bool: True if the index is saved or unchanged, False if it could not be written.
+        """
+        with self._lock:
+            if not self.dirty:
+                return True
+            data = {'version':self.version,
+                    'library':self.library,
+                    'entries':self.entries}
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, mode='w', encoding="utf-8") as index_file:
+                    json.dump(data, index_file)
+                os.replace(temp_path, self.path)
+            except OSError as _excp:
+                self.log.warning(self.translate("logs", "The extension index at {0} could not be saved.".format(self.path)))
+                self.log.debug(_excp)
+                return False
+            self.dirty = False
+            return True
+
+    def lookup(self, path):
+        """Returns the index entry for an archive if the archive has not changed since it was indexed.
+
+        Args:
+          path (string): The path to an extension archive.
+
+        Returns:
+          The entry (dictionary) for the archive or None if the archive is not indexed or has changed.
+            {'signature':[1397661723000000000, 136809],
+             'hash':'9f86d08...',
+             'config':{'name':'unit_test_mock', ...},
+             'members':{'main.py':[1024, 512, 2309474432], 'test.conf':[215, 140, 1294722203], ...},
+             'valid':True,
+             'errors':[]}
+        """
+        path = os.path.abspath(str(path))
+        #The archive is read outside of the lock so that scans of other archives are not held up by it.
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry is None:
+            return None
+        try:
+            signature = fs_utils.file_signature(path)
+        except OSError:
+            return None
+        if entry['signature'] == signature:
+            return entry
+        #The archive was touched. Only re-parse it if its contents actually changed.
+        try:
+            content_hash = fs_utils.file_hash(path)
+        except OSError:
+            return None
+        if entry['hash'] != content_hash:
+            self.log.debug(self.translate("logs", "Extension archive {0} has changed since it was indexed.".format(path)))
+            return None
+        with self._lock:
+            #An entry replaced while the archive was hashed may describe different contents.
+            if self.entries.get(path) is not entry:
+                return None
+            entry['signature'] = signature
+            self.dirty = True
+        return entry
+
+    def update(self, path, config, members, valid=None, errors=None, content_hash=None):
+        """Adds or replaces the index entry for an archive.
+
+        Args:
+          path (string): The path to an extension archive.
+          config (dictionary): The parsed config of the extension. None if the archive contains no config and False if the config could not be parsed.
+          members (dictionary): The central directory of the archive keyed by member name with [file_size, compress_size, CRC] values. See ZipCatalog.entries.
+          valid (bool): The result of validating the config. None if it was not validated.
+          errors (list): The names of any config values that failed validation.
+          content_hash (string): The sha256 hash of the archive if it has already been calculated.
+
+        Returns:
+          The new entry (dictionary) for the archive or None if the archive could not be read.
+        """
+        path = os.path.abspath(str(path))
+        try:
+            signature = fs_utils.file_signature(path)
+            if not content_hash:
+                content_hash = fs_utils.file_hash(path)
+        except OSError as _excp:
+            self.log.debug(self.translate("logs", "Could not index extension archive {0}.".format(path)))
+            self.log.debug(_excp)
+            return None
+        entry = {'signature':signature,
+                 'hash':content_hash,
+                 'config':config,
+                 'members':dict((name, list(info)) for name, info in members.items()),
+                 'valid':valid,
+                 'errors':list(errors) if errors else []}
+        with self._lock:
+            self.entries[path] = entry
+            self.dirty = True
+        return entry
+
+    def remove(self, path):
+        """Removes an archive from the index.
+
+        Args:
+          path (string): The path to an extension archive.
+        """
+        with self._lock:
+            if self.entries.pop(os.path.abspath(str(path)), None) is not None:
+                self.dirty = True
+
+    def prune(self):
+        """Removes the entries of all archives that no longer exist within the library.
+
+        Returns:
+          A list of the paths (strings) of the entries that were removed.
+        """
+        with self._lock:
+            removed = [path for path in self.entries if not os.path.isfile(path)]
+            for path in removed:
+                del self.entries[path]
+            if removed:
+                self.dirty = True
+                self.log.debug(self.translate("logs", "Removed {0} missing archives from the extension index at {1}.".format(len(removed), self.path)))
+            return removed
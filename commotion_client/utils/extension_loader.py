@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+extension_loader
+
+Discovers and installs the extensions in the extension libraries without blocking the user interface.
+
+Key componenets handled within:
+ * scanning libraries and validating extensions on a worker thread
+ * reporting per-library progress and each extension as it is ready
+ * installing each library's extensions on the GUI thread as soon as that library is done
+ * cancelling a load part way through
+
+Each library's changes are staged in a SettingsBatch on the worker and handed to the GUI thread, which owns the settings object, to be committed. The worker then waits until that commit has finished before it stages the next library, so the registry the worker reads is never being changed by a commit at the same time, and libraries are installed in order exactly as install_loaded installs them: an extension found in both the global and the user library is installed from the global one. The user interface still fills in as each library becomes ready. A cancelled load commits nothing that was not already committed.
+
+While a load is running its extension manager's libraries must not be refreshed, and extension settings must not be written, from any other thread or by the GUI thread outside of the loader's commits. Start watching libraries once loading_finished has been emitted. Code on the GUI thread must not block waiting for a running load, because the load waits on the GUI thread to commit each library. Cancel the load first, see cancel.
+
+e.g:
+  loader = ExtensionLoader(ext_mgr)
+  loader.extensions_updated.connect(menu_bar.refresh_extensions)
+  loader.start()
+"""
+#Standard Library Imports
+import logging
+import os
+import time
+import threading
+
+#PyQt imports
+from PyQt4 import QtCore
+
+class LoadCancelled(Exception):
+    """Raised within a load's worker thread to abandon the load once it has been cancelled."""
+    pass
+
+class ExtensionLoader(QtCore.QThread):
+    """Runs the discovery and install steps of ExtensionManager.init_extension_libraries on a worker thread."""
+
+    #(extension type, extensions synced, extensions in library)
+    library_progress = QtCore.pyqtSignal(str, int, int)
+    #(extension name, extension type) for each extension that has been validated and staged to be installed
+    extension_ready = QtCore.pyqtSignal(str, str)
+    #(installed, updated, removed) lists of extension names, once for each library that is committed
+    extensions_updated = QtCore.pyqtSignal(list, list, list)
+    #True if every library was loaded, False if the load was cancelled or failed
+    loading_finished = QtCore.pyqtSignal(bool)
+    loading_failed = QtCore.pyqtSignal(str)
+    #Internal hand-offs from the worker thread to the GUI thread.
+    library_staged = QtCore.pyqtSignal(str, object)
+    worker_done = QtCore.pyqtSignal()
+
+    def __init__(self, manager, ext_types=("global", "user"), progress_interval=0.05, parent=None):
+        """
+        Args:
+          manager (ExtensionManager): The extension manager whose libraries are loaded.
+          ext_types (tuple): The extension types [global or user] of the libraries to install, in the order they are installed.
+          progress_interval (float): The minimum number of seconds between library_progress signals for a library.
+          parent (QObject): The parent of the loader.
+        """
+        super().__init__(parent)
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.manager = manager
+        self.ext_types = tuple(ext_types)
+        self.progress_interval = progress_interval
+        self.error = None
+        self._cancelled = threading.Event()
+        #Set by the GUI thread once the library handed to it has been committed, or when the load is cancelled.
+        self._committed = threading.Event()
+        self.library_staged.connect(self.commit_library)
+        self.worker_done.connect(self.finish)
+
+    def cancel(self):
+        """Stops the load after the extension currently being synced.
+
+        Libraries that have already been committed stay installed. Scanning a library cannot be interrupted, so the worker stops once the current library has been scanned. A worker waiting for the GUI thread to commit a library stops waiting, so the load can be cancelled and waited for from the GUI thread.
+        """
+        self._cancelled.set()
+        self._committed.set()
+
+    def is_cancelled(self):
+        """Checks if the load has been cancelled."""
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """Abandons the load if it has been cancelled.
+
+        Raises:
+          LoadCancelled: If the load has been cancelled.
+        """
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+
+    def run(self):
+        """Scans every library and stages the changes to each library's installed extensions. Runs on the worker thread."""
+        self.error = None
+        try:
+            self.manager.init_libraries()
+            self.check_cancelled()
+            self.manager.load_core()
+            for ext_type in self.ext_types:
+                self.check_cancelled()
+                self.load_library(ext_type)
+        except LoadCancelled:
+            self.log.info(self.translate("logs", "Loading extensions was cancelled."))
+        except Exception as _excp:
+            self.error = self.translate("logs", "Extensions could not be loaded.")
+            self.log.error(self.error)
+            self.log.exception(_excp)
+        finally:
+            self.worker_done.emit()
+
+    def load_library(self, ext_type):
+        """Scans a library and stages the changes to the extensions installed from it. Runs on the worker thread.
+
+        Args:
+          ext_type (string): The extension type [global or user] of the library.
+        """
+        path = self.manager.libraries.get(ext_type)
+        if not path or not os.path.isdir(str(path)) or not os.listdir(str(path)):
+            self.log.debug(self.translate("logs", "The {0} library is empty.".format(ext_type)))
+            return
+        self.manager.update_extension_config(ext_type)
+        config_manager = self.manager.extensions.get(ext_type)
+        if config_manager is None:
+            return
+        self.check_cancelled()
+        total = len(config_manager.configs)
+        state = {'done':0, 'emitted':time.monotonic()}
+        self.library_progress.emit(ext_type, 0, total)
+
+        def progress(name, result):
+            self.check_cancelled()
+            state['done'] += 1
+            if result in ["added", "changed"]:
+                self.extension_ready.emit(name, ext_type)
+            now = time.monotonic()
+            if state['done'] == total or now - state['emitted'] >= self.progress_interval:
+                state['emitted'] = now
+                self.library_progress.emit(ext_type, state['done'], total)
+
+        #Invalid extensions are skipped so that they do not hold back the rest of the library.
+        batch = self.manager.settings_batch(strict=False)
+        try:
+            changes = self.manager.sync_library(batch, ext_type, config_manager, progress=progress)
+        except Exception:
+            batch.rollback()
+            raise
+        self._committed.clear()
+        #A cancel from before the clear would otherwise leave the worker waiting.
+        self.check_cancelled()
+        self.library_staged.emit(ext_type, (batch,) + tuple(changes))
+        #The next library is synced against the registry this commit writes.
+        self._committed.wait()
+        self.check_cancelled()
+
+    def commit_library(self, ext_type, staged):
+        """Writes a library's staged changes to the application settings. Runs on the GUI thread.
+
+        Args:
+          ext_type (string): The extension type [global or user] of the library.
+          staged (tuple): The library's SettingsBatch followed by the lists of names of the extensions it adds, changes, and removes.
+        """
+        try:
+            self.install_library(ext_type, staged)
+        finally:
+            self._committed.set()
+
+    def install_library(self, ext_type, staged):
+        """Commits a library's staged changes and unloads the extensions they replace. See commit_library."""
+        batch, added, changed, removed = staged
+        if self.is_cancelled():
+            batch.rollback()
+            return
+        try:
+            batch.commit()
+        except IOError as _excp:
+            self.error = self.translate("logs", "The {0} extensions could not be installed. No extension settings were changed.".format(ext_type))
+            self.log.error(self.error)
+            self.log.debug(_excp)
+            return
+        for name in changed + removed:
+            self.manager.unload_extension(name)
+        self.log.debug(self.translate("logs", "Installed the {0} library: {1} added, {2} changed, {3} removed.".format(ext_type, len(added), len(changed), len(removed))))
+        if added or changed or removed:
+            self.extensions_updated.emit(added, changed, removed)
+
+    def finish(self):
+        """Announces the end of the load. Runs on the GUI thread after every library has been committed."""
+        completed = self.error is None and not self.is_cancelled()
+        if self.error is not None:
+            self.loading_failed.emit(self.error)
+        self.manager.profiler.log_report()
+        self.loading_finished.emit(completed)
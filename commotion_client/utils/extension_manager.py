@@ -40,9 +40,19 @@ import shutil
 import os
 import re
 import sys
+import gc
+import time
+import weakref
 import zipfile
 import json
 import zipimport
+import copy
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent import futures
+from functools import partial
+from collections import OrderedDict
 
 #PyQt imports
 from PyQt4 import QtCore
@@ -51,17 +61,79 @@ from PyQt4 import QtCore
 from commotion_client.utils import fs_utils
 from commotion_client.utils import validate
 from commotion_client.utils import settings
+from commotion_client.utils import extension_index
+from commotion_client.utils import zip_catalog
+from commotion_client.utils import module_cache
+from commotion_client.utils import extraction_cache
+from commotion_client.utils import extension_registry
+from commotion_client.utils import library_watcher
+from commotion_client.utils import library_snapshot
+from commotion_client.utils import quarantine
+from commotion_client.utils import extension_loader
+from commotion_client.utils import profiler
 from commotion_client import extensions
 
+#The number of bytes install_archive reads and writes at a time.
+INSTALL_CHUNK_SIZE = 65536
+
+#The number of seconds a library directory must go unmodified before its listing is cached. File systems with coarse modification times can change a directory twice within the same timestamp.
+LISTING_SETTLE_TIME = 2
+
 class ExtensionManager(object):
     
-    def __init__(self):
+    def __init__(self, use_index=True, scan_workers=None, ui_cache_size=8, extract=None, idle_timeout=None, use_quarantine=True):
+        """
+        Args:
+          use_index (bool): Keep a persistent index of each library so that unchanged extension archives are not re-read on every start.
+          scan_workers (int): The maximum number of threads used to scan extension libraries. Set to 1 to scan libraries serially. Defaults to the number of processors available (up to 8).
+          ui_cache_size (int): The number of extension user interfaces to keep loaded for re-use by load_user_interface.
+          extract (bool): Import user interfaces from extracted copies of extension archives instead of through zipimport. See extraction_cache. Defaults to the "extract_archives" value of the extension settings.
+          idle_timeout (int): The number of seconds an extension's user interfaces may go unused before unload_idle unloads it. 0 never unloads idle extensions. Defaults to the "unload_idle_minutes" value of the extension settings.
+          use_quarantine (bool): Skip extension archives that failed to load before until their contents change. See quarantine.
+        """
         self.log = logging.getLogger("commotion_client."+__name__)
         self.translate = QtCore.QCoreApplication.translate
         self.extensions = {}
         self.libraries = {}
+        self.use_index = use_index
+        self.indexes = {}
+        if scan_workers is None:
+            try:
+                scan_workers = min(multiprocessing.cpu_count(), 8)
+            except NotImplementedError:
+                scan_workers = 1
+        self.scan_workers = max(int(scan_workers), 1)
+        self.ui_cache = module_cache.ModuleCache(ui_cache_size)
+        self.watcher = None
+        #Per-extension timings of each loading stage. See profiler.LoadProfiler.
+        self.profiler = profiler.load_profiler
         self.set_library_defaults()
         self.user_settings = self.get_user_settings()
+        self.registry = extension_registry.ExtensionRegistry(self.user_settings)
+        if extract is None:
+            extract = self.user_settings.value("extract_archives", False) in [True, 'true']
+        self.extracted = extraction_cache.ExtractionCache() if extract else None
+        if idle_timeout is None:
+            try:
+                idle_timeout = int(self.user_settings.value("unload_idle_minutes", 0) or 0) * 60
+            except (TypeError, ValueError):
+                idle_timeout = 0
+        self.idle_timeout = max(int(idle_timeout), 0)
+        #The time.monotonic() time each extension's user interfaces were last loaded.
+        self.last_used = {}
+        #The path each extension was added to sys.path as.
+        self.import_paths = {}
+        #Weak references to the modules of each unloaded extension. See get_leaked_modules.
+        self.unloaded = {}
+        #Cached library listings. ext_type -> (library path, directory mtime, entry names)
+        self.listings = {}
+        self.quarantine = None
+        if use_quarantine:
+            try:
+                self.quarantine = quarantine.Quarantine()
+            except IOError as _excp:
+                self.log.warning(self.translate("logs", "Could not open the extension quarantine. Archives that failed before will be tried again."))
+                self.log.debug(_excp)
         self.config_keys = ["name",
                             "main",
                             "menu_item",
@@ -71,7 +143,8 @@ class ExtensionManager(object):
                             "toolbar",
                             "tests",
                             "initialized",
-                            "type",]
+                            "type",
+                            "hash",]
 
     def get_user_settings(self):
         """Get the currently logged in user settings object."""
@@ -102,12 +175,79 @@ class ExtensionManager(object):
         #load core and move to global if needed
         self.log.debug(self.libraries)
         self.load_core()
-        #Load all extension configs found in libraries
+        #Load all extension configs found in libraries. Libraries loaded by load_core are only refreshed.
         for name, path in self.libraries.items():
             if QtCore.QDir(path).entryInfoList() != []:
-                self.init_extension_config(name)
+                self.update_extension_config(name)
         #install all loaded config's with the existing settings
         self.install_loaded()
+        self.profiler.log_report()
+
+    def publish_snapshot(self, path=None):
+        """Publishes the loaded libraries so that other processes can attach to them instead of scanning the libraries. See library_snapshot.
+
+        Must not be called while the libraries are being loaded on another thread.
+
+        Args:
+          path (string): The path of the snapshot file. Defaults to a file within the users cache directory.
+
+        Returns:
+          The path (string) the snapshot was written to.
+
+        Raises:
+          IOError: If the snapshot could not be written.
+        """
+        libraries = dict((ext_type, config_manager.get_snapshot()) for ext_type, config_manager in self.extensions.items() if config_manager is not None)
+        return library_snapshot.publish(libraries, path)
+
+    def attach_snapshot(self, path=None):
+        """Loads the libraries from a snapshot published by this or another process.
+
+        Only libraries that have not been loaded yet, and whose directory matches the snapshot, are attached. Attached libraries are brought up to date the next time update_extension_config is run on them, which only re-reads the archives that changed after the snapshot was published.
+
+        Args:
+          path (string): The path of the snapshot file. Defaults to a file within the users cache directory.
+
+        Returns:
+          A list of the extension types (strings) of the libraries that were attached.
+        """
+        libraries = library_snapshot.attach(path)
+        if not libraries:
+            return []
+        attached = []
+        for ext_type, data in sorted(libraries.items()):
+            if ext_type in self.extensions or ext_type not in self.libraries:
+                continue
+            try:
+                if data['directory'] != os.path.abspath(str(self.libraries[ext_type])):
+                    continue
+                config_manager = ConfigManager(index=self.get_index(ext_type), quarantine=self.quarantine)
+                config_manager.restore_snapshot(data)
+            except (KeyError, TypeError, ValueError, AttributeError) as _excp:
+                self.log.debug(self.translate("logs", "The snapshot of the {0} library could not be used.".format(ext_type)))
+                self.log.debug(_excp)
+                continue
+            self.extensions[ext_type] = config_manager
+            attached.append(ext_type)
+        self.log.debug(self.translate("logs", "Attached to the published snapshot of the {0} libraries.".format(attached)))
+        return attached
+
+    def init_extension_libraries_async(self, parent=None, start=True):
+        """Runs init_extension_libraries on a worker thread.
+
+        Libraries are scanned and validated on the worker. Each library's extensions are installed on the calling thread, which must run an event loop, as soon as that library is ready. See extension_loader.
+
+        Args:
+          parent (QObject): The parent of the loader.
+          start (bool): Start the loader. Pass False to connect to all of its signals before calling its start method.
+
+        Returns:
+          An extension_loader.ExtensionLoader. Connect to its signals to follow the load, or call its cancel method to stop it.
+        """
+        loader = extension_loader.ExtensionLoader(self, parent=parent)
+        if start:
+            loader.start()
+        return loader
 
     def set_library_defaults(self):
         """Sets the default directories for core, user, and global extensions.
@@ -205,17 +345,112 @@ class ExtensionManager(object):
                 extension_types = [ext_type]
             else:
                 raise ValueError(self.translate("logs", "{0} is not an acceptable extension type.".format(ext_type)))
-        for type_ in extension_types:
+        if self.scan_workers > 1:
+            #Archives are scanned on a bounded pool shared by all libraries, while each library is merged on its own thread.
+            with futures.ThreadPoolExecutor(max_workers=self.scan_workers) as archive_pool:
+                with futures.ThreadPoolExecutor(max_workers=len(extension_types)) as library_pool:
+                    scans = [(type_, library_pool.submit(self.scan_library, type_, archive_pool)) for type_ in extension_types]
+                    #Merge in the same order as a serial scan so that results and errors are deterministic.
+                    for type_, scan in scans:
+                        self.merge_library_scan(type_, scan.result)
+        else:
+            for type_ in extension_types:
+                self.merge_library_scan(type_, partial(self.scan_library, type_))
+
+    def update_extension_config(self, ext_type):
+        """Brings the config object of a library up to date, re-reading only the files that changed since it was loaded.
+
+        Libraries that have not been loaded yet are loaded in full with init_extension_config.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+
+        Returns:
+          A tuple of lists of the names (strings) of the extensions whose configs were added, re-loaded, and removed. Empty if the library was loaded in full.
+        """
+        config_manager = self.extensions.get(ext_type)
+        if config_manager is None:
+            self.init_extension_config(ext_type)
+            return ([], [], [])
+        paths = config_manager.changed_paths()
+        if not paths:
+            return ([], [], [])
+        changes = config_manager.refresh(paths)
+        if config_manager.index:
+            config_manager.index.save()
+        if self.quarantine is not None:
+            self.quarantine.save()
+        return changes
+
+    def scan_library(self, ext_type, executor=None):
+        """Scans a library and returns a config manager for the extensions within it.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+          executor (concurrent.futures.Executor): An executor used to scan the libraries archives concurrently. If not provided archives are scanned serially.
+
+        Returns:
+          A ConfigManager for the library.
+
+        Raises:
+          ValueError: If there are no extensions within the library.
+          KeyError: If there is no path set for the library.
+        """
+        self.log.debug(self.translate("logs", "Creating  {0} config manager".format(ext_type)))
+        index = self.get_index(ext_type)
+        try:
+            return ConfigManager(self.libraries[ext_type], index, executor, self.quarantine)
+        finally:
+            if index:
+                index.prune()
+                index.save()
+            if self.quarantine is not None:
+                self.quarantine.save()
+
+    def merge_library_scan(self, ext_type, scan):
+        """Stores the result of a library scan as the libraries config manager.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+          scan (callable): Returns the ConfigManager of the library or raises the error encountered while scanning it.
+        """
+        try:
+            self.extensions[ext_type] = scan()
+        except ValueError:
+            self.log.debug(self.translate("logs", "There were no extensions found for the {0} library.".format(ext_type)))
+            return
+        except KeyError:
+            self.log.debug(self.translate("logs", "There were no library path found for the {0} library.".format(ext_type)))
+            return
+        self.log.debug(self.translate("logs", "Configs for {0} extension library loaded..".format(ext_type)))
+
+    def get_index(self, ext_type):
+        """Returns the persistent extension index for a library.
+
+        Indexes are created on first use and re-created if the path of their library changes.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+
+        Returns:
+          An ExtensionIndex for the library or None if indexing is disabled or the index could not be created.
+
+        Raises:
+          KeyError: If no path is set for the library.
+        """
+        if not self.use_index:
+            return None
+        library = os.path.abspath(self.libraries[ext_type])
+        index = self.indexes.get(ext_type)
+        if index is None or index.library != library:
             try:
-                self.log.debug(self.translate("logs", "Creating  {0} config manager".format(type_)))
-                self.extensions[type_] = ConfigManager(self.libraries[type_])
-            except ValueError:
-                self.log.debug(self.translate("logs", "There were no extensions found for the {0} library.".format(type_)))
-                continue
-            except KeyError:
-                self.log.debug(self.translate("logs", "There were no library path found for the {0} library.".format(type_)))
-                continue
-            self.log.debug(self.translate("logs", "Configs for {0} extension library loaded..".format(type_)))
+                index = extension_index.ExtensionIndex(library)
+            except IOError as _excp:
+                self.log.warning(self.translate("logs", "Could not create an extension index for the {0} library. Extensions will be scanned without one.".format(ext_type)))
+                self.log.debug(_excp)
+                return None
+            self.indexes[ext_type] = index
+        return index
 
     def check_installed(self, name=None):
         """Checks if and extension is installed.
@@ -251,90 +486,593 @@ class ExtensionManager(object):
         """
         self.log.debug(self.translate("logs", "Getting installed extensions."))
         installed_extensions = {}
-        _settings = self.user_settings
-        extensions = _settings.childGroups()
+        extensions = self.registry.names()
+        listings = {}
         for ext in extensions:
-            _type = _settings.value(ext+"/type")
-            ext_dir = QtCore.QDir(self.libraries[_type])
-            if ext_dir.exists(ext):
+            _type = self.registry.value(ext, "type")
+            if _type not in listings:
+                listings[_type] = self.get_library_listing(_type)
+            if ext in listings[_type]:
                 installed_extensions[ext] = _type
         self.log.debug(self.translate("logs", "The following extensions are installed: [{0}].".format(extensions)))
         return installed_extensions
-            
+
+    def get_library_listing(self, ext_type):
+        """Returns the names of the entries directly within a library.
+
+        The library is listed with a single listdir. The listing is cached until the library directory's modification time changes, so checking an unchanged library costs one stat.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+
+        Returns:
+          A frozenset of the names (strings) of the files and directories within the library. Empty if the library does not exist.
+        """
+        path = self.libraries.get(ext_type)
+        if not path:
+            return frozenset()
+        path = os.path.abspath(str(path))
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.listings.pop(ext_type, None)
+            return frozenset()
+        cached = self.listings.get(ext_type)
+        if cached is not None and cached[0] == path and cached[1] == mtime:
+            return cached[2]
+        try:
+            names = frozenset(os.listdir(path))
+        except OSError:
+            self.listings.pop(ext_type, None)
+            return frozenset()
+        if time.time() - mtime / 1e9 > LISTING_SETTLE_TIME:
+            self.listings[ext_type] = (path, mtime, names)
+        else:
+            self.listings.pop(ext_type, None)
+        return names
+
+    def get_orphans(self):
+        """Finds installed extensions without an archive and archives without an installed extension.
+
+        Only the entries directly within the global and user libraries are considered, as with get_installed. Hidden files, such as partially copied archives, are ignored.
+
+        Returns:
+          A dictionary with two sorted lists.
+            'settings': The names (strings) of installed extensions whose archive is missing from their library.
+            'archives': The absolute paths (strings) of the archives in a library that no extension of that type is installed from.
+
+            {'settings':['deleted_ext'], 'archives':['/path/to/user/library/new_ext']}
+        """
+        orphans = {'settings':[], 'archives':[]}
+        for ext_type in ['global', 'user']:
+            listing = self.get_library_listing(ext_type)
+            installed = set(self.registry.find("type", ext_type))
+            orphans['settings'].extend(name for name in installed if name not in listing)
+            if not listing:
+                continue
+            library = os.path.abspath(str(self.libraries[ext_type]))
+            for name in listing:
+                if name.startswith(".") or name in installed:
+                    continue
+                path = os.path.join(library, name)
+                if os.path.isfile(path):
+                    orphans['archives'].append(path)
+        orphans['settings'].sort()
+        orphans['archives'].sort()
+        return orphans
+
+    def locate_extension(self, name):
+        """Finds every loaded library that contains an extension.
+
+        Args:
+          name (string): The name of an extension.
+
+        Returns:
+          A list of (extension type, absolute archive path) tuples in core, global, user order. Empty if no loaded library contains the extension.
+            [('core', '/path/to/core/ext01'), ('global', '/path/to/global/ext01')]
+        """
+        found = []
+        for ext_type in ['core', 'global', 'user']:
+            config_manager = self.extensions.get(ext_type)
+            if config_manager is None:
+                continue
+            path = config_manager.get_path(name)
+            if path is not None:
+                found.append((ext_type, path))
+        return found
+
+    def get_duplicates(self):
+        """Finds extension names that are used by more than one archive in the global and user libraries.
+
+        Core extensions are expected to have a copy in the global library and are not reported. An extension that is in both the global and user library is only installed from the global library.
+
+        Returns:
+          A dictionary of the absolute paths (list of strings) of every archive that contains each duplicated extension name, keyed by name. Paths are in the order the archives are used, so the first is the one that is installed.
+        """
+        duplicates = {}
+        for ext_type in ['global', 'user']:
+            config_manager = self.extensions.get(ext_type)
+            if config_manager is None:
+                continue
+            for name in config_manager.names:
+                found = config_manager.duplicates.get(name, [config_manager.get_path(name)])
+                duplicates.setdefault(name, []).extend(found)
+        return dict((name, paths) for name, paths in duplicates.items() if len(paths) > 1)
+
     def load_core(self):
-        """Loads all core extensions into the globals library and re-initialized the global config.
+        """Syncs the core extensions into the global library and refreshes the global configs that changed.
         
-        This function bootstraps global library from the core library. It iterates through all extensions in the core library and populates the global config with any extensions it does not already contain and then loads them into the global config.
+        This function bootstraps global library from the core library. Each core extension archive is compared with the archive of the same name in the global library. Identical archives are skipped. Missing or different archives are copied into the global library, replacing the old archive in a single rename. Only the global configs of the archives that were copied are re-loaded.
 
+        Returns:
+          A list of the names (strings) of the core extensions that were copied into the global library.
         """
         #Core extensions are loaded from the global directory.
-        #If a core extension has been deleted from the global directory it will be replaced from the core directory.
-        self.init_extension_config('core')
-        _core_dir = QtCore.QDir(self.libraries['core'])
-        _global_dir = QtCore.QDir(self.libraries['global'])
-        _reload_globals = False
-        for ext in self.extensions['core'].configs:
+        #If a core extension has been deleted from, or changed in, the global directory it will be replaced from the core directory.
+        self.update_extension_config('core')
+        try:
+            core_manager = self.extensions['core']
+            global_library = os.path.abspath(self.libraries['global'])
+        except KeyError:
+            self.log.debug(self.translate("logs", "There are no core extensions to load into the global library."))
+            return []
+        global_manager = self.extensions.get('global')
+        copied = []
+        #Each core extension is looked up by name in the global library, so reconciling is linear in the number of core extensions.
+        for name in core_manager.names:
+            _core_ext_path = core_manager.get_path(name)
+            _global_ext_path = os.path.join(global_library, name)
             try:
-                #Check if the extension is in the globals
-                global_extensions = list(self.extensions['global'].configs.keys())
-                if ext['name'] in global_extensions:
-                    self.log.debug(self.translate("logs", "Core extension {0} was found in the global extension list.".format(ext['name'])))
-                    if not _global_dir.exists(ext['name']):
-                        raise KeyError(self.translate("Extension {0} was found in the extension list, but it did not exist in the actual library. Loading it to global.".format(ext['name'])))
+                if self.is_same_archive(core_manager, _core_ext_path, global_manager, _global_ext_path):
+                    self.log.debug(self.translate("logs", "Core extension {0} is unchanged in the global extension directory.".format(name)))
                     continue
-            except KeyError:
-                #If extension not loaded in globals it will raise a KeyError
-                _core_ext_path = _core_dir.absoluteFilePath(ext['name'])
-                _global_ext_path = _global_dir.absoluteFilePath(ext['name'])
-                self.log.info(self.translate("logs", "Core extension {0} was missing from the global extension directory. Copying it into the global extension directory from the core now.".format(ext['name'])))
-                #Copy extension into global directory
-                if QtCore.QFile(_core_ext_path).copy(_global_ext_path):
-                    self.log.debug(self.translate("logs", "Extension successfully copied."))
-                else:
-                    self.log.debug(self.translate("logs", "Extension was not copied."))
-                _reload_globals = True
-        if _reload_globals == True:
-            self.init_extension_config("global")
+                self.log.info(self.translate("logs", "Core extension {0} was missing from, or different in, the global extension directory. Copying it into the global extension directory from the core now.".format(name)))
+                fs_utils.atomic_copy(_core_ext_path, _global_ext_path)
+            except OSError as _excp:
+                self.log.warning(self.translate("logs", "Core extension {0} could not be copied into the global extension directory.".format(name)))
+                self.log.debug(_excp)
+                continue
+            self.log.debug(self.translate("logs", "Extension successfully copied."))
+            copied.append(name)
+        if copied:
+            if global_manager is None:
+                self.init_extension_config("global")
+            else:
+                global_manager.refresh([os.path.join(global_library, name) for name in copied])
+                if global_manager.index:
+                    global_manager.index.save()
+        return copied
+
+    def is_same_archive(self, source_manager, source, destination_manager, destination):
+        """Checks if two extension archives have identical contents.
+
+        Archives of different sizes are never hashed. Hashes are taken from each libraries index where possible.
+
+        Args:
+          source_manager (ConfigManager): The config manager of the library containing the source archive.
+          source (string): The path to the source archive.
+          destination_manager (ConfigManager): The config manager of the library containing the destination archive, or None if that library is not loaded.
+          destination (string): The path to the destination archive.
+
+        Returns:
+          bool: True if the destination exists and has the same contents as the source.
+
+        Raises:
+          OSError: If the source archive cannot be read.
+        """
+        if not os.path.isfile(destination):
+            return False
+        if os.path.getsize(source) != os.path.getsize(destination):
+            return False
+        if destination_manager is not None:
+            destination_hash = destination_manager.get_hash(destination)
+        else:
+            destination_hash = fs_utils.file_hash(destination)
+        return source_manager.get_hash(source) == destination_hash
 
     def install_loaded(self, ext_type=None):
-        """Installs loaded libraries by saving their settings into the application settings.
+        """Syncs the loaded libraries with the extensions installed in the application settings.
+
+        Each installed extension records the content hash of its archive. The loaded configs of a library are compared against the extensions installed from that library and only the differences are written:
+          * added: Loaded extensions that are not installed are validated and installed.
+          * changed: Installed extensions whose archive hash has changed are re-validated and their settings replaced. Whether the extension is initialized is kept.
+          * removed: Installed extensions whose archive no longer provides a config are uninstalled.
+        Unchanged extensions are not re-validated or written.
 
-        This function will install all loaded libraries into the users settings. It will add any missing configs and values that are not found. If a value exists install loaded will not change it.
-        
         Args:
           ext_type (string): A specific extension type [global or user] to load extensions from. If not provided, defaults to both.
 
         Returns:
-          List of names (strings) of extensions loaded  on success. Returns and empty list [] on failure.
+          List of names (strings) of extensions added or changed on success. Returns and empty list [] on failure.
         
-        Note on validation: Relies on save_settings to validate all fields.
+        Note on validation: Relies on build_settings to validate all fields.
         Note on core: Core extensions are never "installed" they are used to populate the global library and then installed under global settings.
         
         """
-        _settings = self.user_settings
-        _keys = _settings.childKeys()
         extension_types = ['user', 'global']
         if ext_type and str(ext_type) in extension_types:
             extension_types = [ext_type]
         saved = []
-        for type_ in extension_types:
-            try:
-                ext_configs = self.extensions[type_].configs
-            except KeyError: #Check if type has not been set yet
-                self.log.info(self.translate("logs", "No extensions of type {0} are currently loaded.".format(type_)))
+        try:
+            #All validated extensions are written together once every config has been checked. Invalid extensions are skipped rather than abandoning the rest.
+            with self.settings_batch(strict=False) as batch:
+                for type_ in extension_types:
+                    try:
+                        config_manager = self.extensions[type_]
+                    except KeyError: #Check if type has not been set yet
+                        self.log.info(self.translate("logs", "No extensions of type {0} are currently loaded.".format(type_)))
+                        continue
+                    added, changed, _ = self.sync_library(batch, type_, config_manager)
+                    saved.extend(added + changed)
+        except IOError as _excp:
+            self.log.error(self.translate("logs", "Loaded extensions could not be installed. No extension settings were changed."))
+            self.log.debug(_excp)
+            return []
+        return saved
+
+    def sync_library(self, batch, ext_type, config_manager, names=None, progress=None):
+        """Stages the differences between a loaded library and the extensions installed from it.
+
+        See install_loaded.
+
+        Args:
+          batch (SettingsBatch): The batch to stage changes in.
+          ext_type (string): The extension type [global or user] of the library.
+          config_manager (ConfigManager): The library's loaded configs.
+          names (list): Only sync the extensions with these names. Defaults to every extension in the library.
+          progress (callable): Called with the name of each loaded extension and how it was synced ("added", "changed", "unchanged", or None if it was skipped or invalid) as soon as it has been synced. Exceptions it raises abandon the sync.
+
+        Returns:
+          A tuple of lists of the names (strings) of extensions staged to be added, changed, and removed.
+        """
+        installed = set(self.registry.find("type", ext_type))
+        if names is not None:
+            installed &= set(names)
+        loaded = set()
+        added, changed, unchanged = [], [], 0
+        for _config in config_manager.configs:
+            name = _config['name']
+            if names is not None and name not in names:
                 continue
-            if not ext_configs: #Check if the type has been created and then emptied
-                self.log.info(self.translate("logs", "No extensions of type {0} are currently loaded.".format(type_)))
+            loaded.add(name)
+            result = self.sync_extension(batch, ext_type, _config, installed)
+            if result == "added":
+                added.append(name)
+            elif result == "changed":
+                changed.append(name)
+            elif result == "unchanged":
+                unchanged += 1
+            if progress is not None:
+                progress(name, result)
+        removed = sorted(installed - loaded)
+        for name in removed:
+            batch.remove(name)
+        if self.quarantine is not None:
+            self.quarantine.save()
+        self.log.info(self.translate("logs", "Synced {0} extensions: {1} added, {2} changed, {3} removed, {4} unchanged.".format(ext_type, len(added), len(changed), len(removed), unchanged)))
+        return (added, changed, removed)
+
+    def sync_extension(self, batch, ext_type, config, installed):
+        """Stages a single loaded extension if it is new to, or has changed since it was installed from, its library.
+
+        Args:
+          batch (SettingsBatch): The batch to stage changes in.
+          ext_type (string): The extension type [global or user] of the library.
+          config (dictionary): The extension's loaded config.
+          installed (set): The names of the extensions installed from the library.
+
+        Returns:
+          "added", "changed", or "unchanged". None if the extension was skipped or is invalid.
+        """
+        name = config['name']
+        if name not in self.registry:
+            #Only install if not already installed.
+            if batch.stage(config, ext_type):
+                return "added"
+            self.log.warning(self.translate("logs", "Extension {0} could not be saved.".format(name)))
+            self.quarantine_invalid(ext_type, config)
+            return None
+        if name not in installed:
+            self.log.debug(self.translate("logs", "Extension {0} is already installed as a {1} extension.".format(name, self.registry.value(name, "type"))))
+            return None
+        previous_hash = self.registry.value(name, "hash")
+        if previous_hash and previous_hash == self.get_content_hash(ext_type, name):
+            return "unchanged"
+        if batch.stage(config, ext_type, keep=["initialized"]):
+            return "changed"
+        self.log.warning(self.translate("logs", "The updated archive of extension {0} is invalid. Its current settings have been kept.".format(name)))
+        return None
+
+    def quarantine_invalid(self, ext_type, config):
+        """Quarantines the archive of a loaded extension whose config failed validation.
+
+        Args:
+          ext_type (string): The extension type [global or user] of the library.
+          config (dictionary): The extension's loaded config.
+        """
+        config_manager = self.extensions.get(ext_type)
+        if self.quarantine is None or config_manager is None:
+            return
+        path = config_manager.get_path(config.get('name'))
+        if path is None:
+            return
+        try:
+            content_hash = config_manager.get_hash(path)
+        except OSError:
+            return
+        valid, errors = config_manager.validate(path, config, content_hash)
+        self.quarantine.add(path, self.translate("logs", "The extension's config failed validation."), errors, content_hash)
+
+    def get_quarantined(self):
+        """Lists the extension archives that are skipped because they failed to load. See quarantine.Quarantine.get_entries."""
+        if self.quarantine is None:
+            return []
+        return self.quarantine.get_entries()
+
+    def release_quarantined(self, content_hash=None):
+        """Releases archives from the quarantine so that they are loaded the next time their library is updated.
+
+        Args:
+          content_hash (string): The hash, or a unique prefix of the hash, of the archive to release. Defaults to every archive.
+
+        Returns:
+          A list of the hashes (strings) of the archives that were released.
+
+        Raises:
+          KeyError: If the hash does not match exactly one quarantined archive.
+        """
+        if self.quarantine is None:
+            return []
+        paths = dict((entry['hash'], entry['paths']) for entry in self.quarantine.get_entries())
+        released = self.quarantine.release(content_hash)
+        self.quarantine.save()
+        released_paths = [path for known in released for path in paths.get(known, [])]
+        #Forget that the archives were scanned or indexed so that update_extension_config reads them again.
+        for config_manager in self.extensions.values():
+            for path in released_paths:
+                config_manager.signatures.pop(path, None)
+        for ext_type in list(self.libraries):
+            index = self.get_index(ext_type)
+            if index is None:
                 continue
-            for _config in ext_configs:
-                #Only install if not already installed in this section.
-                if _config['name'] not in _keys:
-                    #Attempt to save the extension.
-                    if not self.save_settings(_config, type_):
-                        self.log.warning(self.translate("logs", "Extension {0} could not be saved.".format(_config['name'])))
-                    else:
-                        saved.append(_config['name'])
-        return saved
+            for path in released_paths:
+                index.remove(path)
+            index.save()
+        return released
+
+    def refresh_library(self, ext_type):
+        """Picks up the extension archives added to, modified within, or removed from a library since it was loaded.
+
+        Only the files that changed are re-read and only the extensions they contain are re-installed or removed. A library that has not been loaded yet is loaded in full.
+
+        Args:
+          ext_type (string): The extension type [global or user] of the library.
+
+        Returns:
+          A tuple of lists of the names (strings) of extensions that were installed, updated, and removed.
+            (['new_ext'], ['updated_ext'], ['deleted_ext'])
+        """
+        names = None
+        if ext_type in self.extensions:
+            added, changed, removed = self.update_extension_config(ext_type)
+            names = added + changed + removed
+            if not names:
+                return ([], [], [])
+        else:
+            self.update_extension_config(ext_type)
+        config_manager = self.extensions.get(ext_type)
+        if config_manager is None:
+            return ([], [], [])
+        try:
+            with self.settings_batch(strict=False) as batch:
+                added, changed, removed = self.sync_library(batch, ext_type, config_manager, names)
+        except IOError as _excp:
+            self.log.error(self.translate("logs", "Changes to the {0} library could not be installed. No extension settings were changed.".format(ext_type)))
+            self.log.debug(_excp)
+            return ([], [], [])
+        for name in changed + removed:
+            self.unload_extension(name)
+        if self.extracted is not None:
+            for name in removed:
+                self.extracted.remove(name)
+        return (added, changed, removed)
+
+    def install_archive(self, source, ext_type="user"):
+        """Installs a single extension archive into a library.
+
+        The archive is streamed into a hidden temporary file within the library in INSTALL_CHUNK_SIZE pieces, and hashed as it is written, so that it is never held in memory. It is then validated from its zip central directory and config alone, without extracting it. A valid archive is renamed into place as the library file of its extension, replacing any earlier version, and only that extension is loaded and installed. Every other archive in the library is left alone.
+
+        If the library has already been loaded only the new archive is refreshed within it. A library that has not been loaded stays unloaded. Only the new extension's settings are written, in either case.
+
+        Args:
+          source (string or file): The path to the extension archive, or a binary file object to read it from.
+          ext_type (string): The extension type [global or user] of the library to install into.
+
+        Returns:
+          A tuple of lists of the names (strings) of extensions that were installed, updated, and removed, as refresh_library.
+            (['new_ext'], [], [])
+
+        Raises:
+          ValueError: If the library type is invalid or the archive is not a valid extension.
+          IOError: If the archive could not be read or written into the library, or the extension's settings could not be saved.
+        """
+        if ext_type not in ["user", "global"]:
+            raise ValueError(self.translate("logs", "Extensions can only be installed into the user or global library, not {0}.".format(ext_type)))
+        try:
+            library = os.path.abspath(str(self.libraries[ext_type]))
+        except KeyError:
+            raise ValueError(self.translate("logs", "No directory is specified for the {0} library.".format(ext_type)))
+        #Only the library being installed into is created, so that other libraries are left as they are.
+        try:
+            os.makedirs(library, exist_ok=True)
+        except OSError as _excp:
+            _error = self.translate("logs", "Could not create the extension library for {0}.".format(ext_type))
+            self.log.error(_error)
+            self.log.debug(_excp)
+            raise IOError(_error)
+        temp_path, content_hash = self.stream_archive(source, library)
+        try:
+            config, members = self.check_archive(temp_path, content_hash)
+            name = config['name']
+            if not isinstance(name, str) or os.path.basename(name) != name or name in [".", ".."]:
+                raise ValueError(self.translate("logs", "The extension name {0} cannot be used as a file name.".format(name)))
+            if name in self.registry and self.registry.value(name, "type") != ext_type:
+                raise ValueError(self.translate("logs", "Extension {0} is already installed as a {1} extension.".format(name, self.registry.value(name, "type"))))
+            destination = os.path.join(library, name)
+            os.replace(temp_path, destination)
+        except OSError as _excp:
+            _error = self.translate("logs", "The extension archive could not be moved into the {0} library.".format(ext_type))
+            self.log.error(_error)
+            self.log.debug(_excp)
+            self.remove_temp_archive(temp_path)
+            raise IOError(_error)
+        except Exception:
+            self.remove_temp_archive(temp_path)
+            raise
+        self.log.info(self.translate("logs", "Copied extension {0} into the {1} library.".format(name, ext_type)))
+        #The archive was already read, hashed, and validated while it was streamed in.
+        index = self.get_index(ext_type)
+        if index is not None:
+            index.update(destination, copy.deepcopy(config), members, True, [], content_hash)
+        if self.quarantine is not None:
+            self.quarantine.forget_location(destination)
+        if index is not None:
+            index.save()
+        #A loaded library picks up just this archive. A library that has not been loaded is left unloaded.
+        config_manager = self.extensions.get(ext_type)
+        if config_manager is not None:
+            config_manager.refresh([destination])
+            try:
+                config_manager.hashes[destination] = (fs_utils.file_signature(destination), content_hash)
+            except OSError:
+                pass
+        if self.registry.value(name, "hash") == content_hash:
+            self.log.info(self.translate("logs", "Extension {0} is already installed from an identical archive.".format(name)))
+            return ([], [], [])
+        record = self.build_settings(config, ext_type, content_hash)
+        if not record:
+            raise ValueError(self.translate("logs", "Extension {0} was copied into the {1} library but could not be installed.".format(name, ext_type)))
+        installed = name in self.registry
+        if installed:
+            #Updating an extension does not re-enable it.
+            record["initialized"] = self.registry.value(name, "initialized", record["initialized"])
+        self.registry.save_many({name:record})
+        if installed:
+            self.unload_extension(name)
+            return ([], [name], [])
+        return ([name], [], [])
+
+    def stream_archive(self, source, library):
+        """Copies an extension archive into a hidden temporary file within a library, hashing it along the way. See install_archive.
+
+        Args:
+          source (string or file): The path to the extension archive, or a binary file object to read it from.
+          library (string): The absolute path to the library.
+
+        Returns:
+          A tuple of the path (string) to the temporary file and the sha256 hash (string) of its contents.
+
+        Raises:
+          IOError: If the archive could not be read or written.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            handle, temp_path = tempfile.mkstemp(prefix=".install.", suffix=".tmp", dir=library)
+        except OSError as _excp:
+            _error = self.translate("logs", "Could not write to the extension library at {0}.".format(library))
+            self.log.error(_error)
+            self.log.debug(_excp)
+            raise IOError(_error)
+        try:
+            with open(handle, mode='wb') as temp_file:
+                if hasattr(source, "read"):
+                    self.copy_chunks(source, temp_file, digest)
+                else:
+                    with open(str(source), mode='rb') as source_file:
+                        self.copy_chunks(source_file, temp_file, digest)
+                size = temp_file.tell()
+        except OSError as _excp:
+            _error = self.translate("logs", "The extension archive could not be copied into the library at {0}.".format(library))
+            self.log.error(_error)
+            self.log.debug(_excp)
+            self.remove_temp_archive(temp_path)
+            raise IOError(_error)
+        self.log.debug(self.translate("logs", "Streamed {0} bytes of an extension archive into {1}.".format(size, temp_path)))
+        return (temp_path, digest.hexdigest())
+
+    def copy_chunks(self, source_file, destination_file, digest):
+        """Copies one file object to another INSTALL_CHUNK_SIZE bytes at a time, updating a hash with each chunk."""
+        for chunk in iter(lambda: source_file.read(INSTALL_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            destination_file.write(chunk)
+
+    def remove_temp_archive(self, temp_path):
+        """Removes the temporary file of an install that did not complete."""
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    def check_archive(self, path, content_hash):
+        """Validates an extension archive that is about to be installed, using only its central directory and config.
+
+        The archive is cataloged from its central directory rather than its manifest, so that a manifest cannot misreport the files that are installed. Archives whose manifest does not match their contents are rejected.
+
+        Args:
+          path (string): The path to the extension archive.
+          content_hash (string): The sha256 hash of the archive.
+
+        Returns:
+          A tuple of the archive's config (dictionary) and its central directory (dictionary). See ZipCatalog.entries.
+
+        Raises:
+          ValueError: If the archive is not a readable zip archive or does not contain a valid config.
+        """
+        try:
+            catalog = zip_catalog.ZipCatalog(path)
+        except (zipfile.BadZipFile, OSError) as _excp:
+            self.log.debug(_excp)
+            raise ValueError(self.translate("logs", "The file is not a readable zip archive."))
+        if catalog.manifest is not None and not catalog.verify_manifest():
+            raise ValueError(self.translate("logs", "The archive's manifest does not match the files in the archive."))
+        config = catalog.get_config()
+        if config is None:
+            config_name = catalog.find(".conf")
+            if not config_name:
+                raise ValueError(self.translate("logs", "The archive does not contain an extension config."))
+            try:
+                config = json.loads(catalog.read(config_name).decode('utf-8'))
+            except ValueError:
+                raise ValueError(self.translate("logs", "The config is not valid JSON."))
+        result = validate.get_validator().validate(config, catalog.entries, path)
+        errors = []
+        for error in result.errors:
+            if error.key not in errors:
+                errors.append(error.key)
+        if errors:
+            for key in errors:
+                self.log.error(self.translate("logs", "The config's {0} value is invalid and cannot be saved.".format(key)))
+            raise ValueError(self.translate("logs", "The extension's config is invalid: {0}".format(", ".join(errors))))
+        #build_settings looks the result up instead of validating the config again.
+        validate.validation_cache.put(validate.validation_cache.key(config, content_hash), True, [])
+        return (config, catalog.entries)
+
+    def watch_libraries(self, delay=500):
+        """Starts watching the user and global libraries for changes.
+
+        Changes are synced into the installed extensions by refresh_library shortly after they stop occurring.
+
+        Args:
+          delay (int): The number of milliseconds a library must be left unchanged before it is synced.
+
+        Returns:
+          The LibraryWatcher (QObject) whose signals announce the extensions that were installed, updated, or removed.
+        """
+        if self.watcher is None:
+            self.watcher = library_watcher.LibraryWatcher(self, delay)
+        self.watcher.start()
+        return self.watcher
 
     def get_extension_from_property(self, key, val):
         """Takes a property and returns all INSTALLED extensions who have the passed value set under the passed property.
@@ -352,25 +1090,46 @@ class ExtensionManager(object):
         Raises:
           KeyError: If the value requested is non-standard.
         """
-        matching_extensions = []
         if key not in self.config_keys:
             _error = self.translate("logs", "{0} is not a valid extension config value.".format(key))
             raise KeyError(_error)
-        _settings = self.user_settings
-        all_exts = _settings.childGroups()
-        for current_extension in all_exts:
-            #enter extension settings
-            _settings.beginGroup(current_extension)
-            if _settings.value(key) == val:
-                matching_extensions.append(current_extension)
-            #exit extension
-            _settings.endGroup()
+        matching_extensions = self.registry.find(key, val)
         if matching_extensions:
             return matching_extensions
         else:
             self.log.info(self.translate("logs", "No extensions had the requested value."))
             return []
 
+    def sort_by_menu_level(self, names):
+        """Orders a list of installed extensions by their menu_level.
+
+        The registry keeps the menu ordering of all installed extensions sorted as they are installed or changed, so no sorting happens here.
+
+        Args:
+          names (list): The names of installed extensions.
+
+        Returns:
+          A list of the extension names in menu order.
+        """
+        return self.registry.ordered(names)
+
+    def set_property(self, name, key, value):
+        """Sets a property of an installed extension in the user settings.
+
+        Args:
+          name (string): The extension's name.
+          key (string): The key of the value to set.
+          value: The new value.
+
+        Raises:
+          KeyError: If the key is non-standard or the extension is not installed.
+        """
+        if key not in self.config_keys:
+            raise KeyError(self.translate("logs", "{0} is not a valid extension config value.".format(key)))
+        if name not in self.registry:
+            raise KeyError(self.translate("logs", "No installed extension with the name {0} exists.".format(name)))
+        self.registry.save(name, {key:value})
+
     def get_property(self, name, key):
         """
         Get a property of an installed extension from the user settings.
@@ -389,15 +1148,11 @@ class ExtensionManager(object):
         if key not in self.config_keys:
             _error = self.translate("logs", "That is not a valid extension config value.")
             raise KeyError(_error)
-        _settings = self.user_settings
-        _settings.beginGroup(name)
-        setting_value = _settings.value(key)
+        setting_value = self.registry.value(name, key)
         if not setting_value:
             _error = self.translate("logs", "The extension config does not contain that value.")
-            _settings.endGroup()
             raise KeyError(_error)
         else:
-            _settings.endGroup()
             return setting_value
 
     def load_user_interface(self, extension_name, gui):
@@ -428,11 +1183,25 @@ class ExtensionManager(object):
         _type = self.get_property(extension_name, "type")
         extension_path = os.path.join(self.libraries[_type], extension_name)
         self.log.debug(extension_path)
-        #Get the extension
-        extension = zipimport.zipimporter(extension_path)
-        #add extension to sys path so imported modules can access other modules in the extension.
-        sys.path.append(extension_path)
-        user_interface = extension.load_module(ui_file)
+        self.last_used[extension_name] = time.monotonic()
+        user_interface = self.ui_cache.get(extension_name, gui)
+        if user_interface is None:
+            with self.profiler.timer(extension_name, "import_{0}".format(gui)):
+                #Get the extension
+                archive_hash = self.get_archive_hash(_type, extension_path)
+                extension = self.ui_cache.get_importer(extension_name, extension_path, archive_hash,
+                                                       partial(self.get_importer, extension_name, content_hash=archive_hash))
+                #add extension to sys path so imported modules can access other modules in the extension.
+                import_path = getattr(extension, "directory", extension_path)
+                if import_path not in sys.path:
+                    sys.path.append(import_path)
+                self.import_paths[extension_name] = import_path
+                #Extensions share module names, such as the default "main". zipimport re-runs a module inside whatever module object sys.modules already holds for its name, which would replace the classes of another extension's cached module, so each load starts from a fresh module.
+                sys.modules.pop(ui_file, None)
+                user_interface = extension.load_module(ui_file)
+            self.ui_cache.put(extension_name, gui, user_interface)
+        else:
+            self.log.debug(self.translate("logs", "Loaded the {0} user interface of {1} from the module cache.".format(gui, extension_name)))
         if gui == "toolbar":
             return user_interface.ToolBar
         elif gui == "main":
@@ -440,6 +1209,123 @@ class ExtensionManager(object):
         elif gui == "settings":
             return user_interface.SettingsMenu
 
+    def unload_extension(self, extension_name):
+        """Releases everything the process holds from an extension's user interfaces being loaded.
+
+        The extension's cached user interfaces and importer are dropped, its path is removed from sys.path and the import system's caches, and every module imported from it is removed from sys.modules. The modules are only freed once nothing else refers to them, so any viewports, toolbars, or settings menus created from the extension must be released by their owners. Use get_leaked_modules to check.
+
+        Extracted copies of the extension are left in the extraction cache for the next time it is loaded.
+
+        Args:
+          extension_name (string): The name of the extension.
+
+        Returns:
+          A list of the names (strings) of the modules that were unloaded.
+        """
+        modules = self.ui_cache.invalidate(extension_name)
+        self.last_used.pop(extension_name, None)
+        import_path = self.import_paths.pop(extension_name, None)
+        if import_path is not None:
+            while import_path in sys.path:
+                sys.path.remove(import_path)
+            sys.path_importer_cache.pop(import_path, None)
+            getattr(zipimport, "_zip_directory_cache", {}).pop(import_path, None)
+            #Modules imported by the extension's user interfaces through sys.path, as well as the user interfaces themselves.
+            prefix = os.path.join(import_path, "")
+            for module_name, module in list(sys.modules.items()):
+                if str(getattr(module, "__file__", None) or "").startswith(prefix):
+                    del sys.modules[module_name]
+                    modules.append(module)
+            importlib.invalidate_caches()
+        unique = list(dict((id(module), module) for module in modules).values())
+        if unique:
+            self.unloaded[extension_name] = [weakref.ref(module) for module in unique]
+        names = sorted(set(module.__name__ for module in unique))
+        self.log.debug(self.translate("logs", "Unloaded extension {0}: {1}".format(extension_name, names)))
+        return names
+
+    def unload_idle(self, max_idle=None, keep=None):
+        """Unloads the extensions whose user interfaces have not been loaded recently.
+
+        Args:
+          max_idle (int): The number of seconds an extension may go unused. Defaults to the idle_timeout of the extension manager.
+          keep (list): The names of extensions that must not be unloaded, such as the extension currently being shown.
+
+        Returns:
+          A list of the names (strings) of the extensions that were unloaded.
+        """
+        if max_idle is None:
+            max_idle = self.idle_timeout
+        if not max_idle:
+            return []
+        keep = set(keep or [])
+        now = time.monotonic()
+        idle = sorted(name for name, used in self.last_used.items() if name not in keep and now - used > max_idle)
+        for name in idle:
+            self.unload_extension(name)
+        if idle:
+            self.log.info(self.translate("logs", "Unloaded {0} extensions that had been idle for over {1} seconds.".format(len(idle), max_idle)))
+        return idle
+
+    def get_leaked_modules(self, extension_name=None):
+        """Lists the modules of unloaded extensions that have not been freed.
+
+        A full garbage collection is run first, so modules that are only kept alive by reference cycles are not reported. Extensions whose modules have all been freed are forgotten.
+
+        Args:
+          extension_name (string): Only check the modules of this extension. Defaults to every unloaded extension.
+
+        Returns:
+          A dictionary of the names (list of strings) of the modules still alive, keyed by extension name. Empty if every module was freed.
+        """
+        gc.collect()
+        names = [extension_name] if extension_name else list(self.unloaded)
+        leaked = {}
+        for name in names:
+            alive = [ref() for ref in self.unloaded.get(name, [])]
+            alive = [module for module in alive if module is not None]
+            if alive:
+                leaked[name] = sorted(module.__name__ for module in alive)
+            else:
+                self.unloaded.pop(name, None)
+        return leaked
+
+    def get_importer(self, extension_name, archive, content_hash=None):
+        """Returns the importer that an extension's user interfaces are loaded with.
+
+        When the extraction cache is enabled the archive is imported from its extraction, so its modules' bytecode is cached. If the archive cannot be extracted it is imported through zipimport instead.
+
+        Args:
+          extension_name (string): The name of the extension.
+          archive (string): The path to the extension archive.
+          content_hash (string): The sha256 hash the archive is expected to have, if known.
+
+        Returns:
+          An extraction_cache.DirectoryImporter or a zipimport.zipimporter.
+        """
+        if self.extracted is not None:
+            try:
+                return extraction_cache.DirectoryImporter(self.extracted.get_path(extension_name, archive, content_hash))
+            except IOError:
+                self.log.warning(self.translate("logs", "Extension {0} could not be extracted. It will be imported from its archive.".format(extension_name)))
+        return zipimport.zipimporter(archive)
+
+    def get_archive_hash(self, ext_type, path):
+        """Returns the indexed content hash of an extension archive.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+          path (string): The path to the extension archive.
+
+        Returns:
+          The sha256 hash (string) of the archive or None if the archive is not indexed or has changed since it was indexed.
+        """
+        index = self.indexes.get(ext_type)
+        if index is None:
+            return None
+        entry = index.lookup(path)
+        return entry['hash'] if entry else None
+
     def get_config(self, name):
         """Returns a config from an installed extension.
                 
@@ -452,17 +1338,30 @@ class ExtensionManager(object):
         Raises:
           KeyError: If an installed extension of the specified name does not exist.
         """
-        config  = {}
-        _settings = self.user_settings
-        extensions  = _settings.childGroups()
-        if name not in extensions:
+        if name not in self.registry:
             raise KeyError(self.translate("logs", "No installed extension with the name {0} exists.".format(name)))
-        _settings.beginGroup(name)
-        extension_config = _settings.childKeys()
-        for key in extension_config:
-            config[key] = _settings.value(key)
-        _settings.endGroup()
-        return config
+        return self.registry.get(name)
+
+    def get_catalog(self, ext_type, name):
+        """Returns the catalog of a loaded extension's archive.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+          name (string): The name of the extension archive.
+
+        Returns:
+          The ZipCatalog of the extension's archive or None if the extension has not been loaded.
+        """
+        if not name:
+            return None
+        try:
+            config_manager = self.extensions[ext_type]
+            path = os.path.join(os.path.abspath(self.libraries[ext_type]), str(name))
+        except KeyError:
+            return None
+        if config_manager is None:
+            return None
+        return config_manager.catalogs.get(path)
 
     def remove_extension_settings(self, name):
         """Removes an extension and its core properties from the applications extension settings.
@@ -481,8 +1380,7 @@ class ExtensionManager(object):
         #make sure that a string of "" is not passed to this function because that would remove all keys.
         self.reset_settings_group()
         if len(str(name)) > 0:
-            _settings = self.user_settings
-            _settings.remove(str(name))
+            self.registry.remove(str(name))
             return True
         else:
             self.log.debug(self.translate("logs", "A zero length string was passed as the name of an extension to be removed. This would delete all the extensions if it was allowed to succeed."))
@@ -492,7 +1390,7 @@ class ExtensionManager(object):
     def save_settings(self, extension_config, extension_type="global"):
         """Saves an extensions core properties into the applications extension settings.
         
-        long description
+        Nothing is written unless the whole config is valid. To save many extensions at once use settings_batch.
         
         Args:
           extension_config (dict) An extension config in dictionary format.
@@ -501,16 +1399,61 @@ class ExtensionManager(object):
         Returns:
           bool: True if successful, False on any failures
         """
-        _settings = self.user_settings
+        with self.profiler.timer(extension_config.get('name'), "save_settings"):
+            record = self.build_settings(extension_config, extension_type)
+            if not record:
+                return False
+            self.registry.save(record['name'], record)
+            return True
+
+    def settings_batch(self, strict=True):
+        """Returns a transaction that writes many extensions' settings at once.
+
+        e.g:
+          with ext_mgr.settings_batch() as batch:
+              for config in configs:
+                  batch.stage(config, "global")
+
+        Args:
+          strict (bool): Abandon the whole batch if any config fails validation. Pass False to skip invalid configs and write the rest.
+
+        Returns:
+          A SettingsBatch that commits when its with block exits cleanly and rolls back if the block raises.
+        """
+        return SettingsBatch(self, strict)
+
+    def build_settings(self, extension_config, extension_type="global", content_hash=None):
+        """Validates an extension's config and builds the record that would be saved into the applications extension settings.
+        
+        The config is validated once with ClientConfig.validate_all, whose results are cached by the config's contents and the archive's hash.
+
+        Args:
+          extension_config (dict) An extension config in dictionary format.
+          extension_type (string): Type of extension "user" or "global". Defaults to global.
+          content_hash (string): The sha256 hash of the extension's archive, if it is already known. Otherwise it is looked up.
+        
+        Returns:
+          The record (dictionary) to save, or False if the config is invalid.
+        """
+        record = {}
         #get extension dir
         try:
             extension_dir = self.libraries[extension_type]
         except KeyError:
             self.log.warning(self.translate("logs", "Invalid extension type. Please check the extension type and try again."))
             return False
+        #Extension Name
+        try:
+            extension_name = extension_config['name']
+        except KeyError:
+            _error = self.translate("logs", "The extension is missing a name value which is required.")
+            self.log.error(_error)
+            return False
+        if content_hash is None:
+            content_hash = self.get_content_hash(extension_type, extension_name)
         #create validator
         try:
-            config_validator = validate.ClientConfig(extension_config, extension_dir)
+            config_validator = validate.ClientConfig(extension_config, extension_dir, self.get_catalog(extension_type, extension_name), content_hash)
         except KeyError as _excp:
             self.log.warning(self.translate("logs", "The extension is missing a name value which is required."))
             self.log.debug(_excp)
@@ -519,110 +1462,190 @@ class ExtensionManager(object):
             self.log.warning(self.translate("logs", "The extension was not found on the system and therefore cannot be saved."))
             self.log.debug(_excp)
             return False
-        #Extension Name
-        try:
-            extension_name = extension_config['name']
-            if config_validator.name():
-                _settings.beginGroup(extension_name)
-                _settings.setValue("name", extension_name)
-            else:
-                _error = self.translate("logs", "The extension's name is invalid and cannot be saved.")
+        if not config_validator.validate_all():
+            for val in config_validator.errors:
+                _error = self.translate("logs", "The config's {0} value is invalid and cannot be saved.".format(val))
                 self.log.error(_error)
-                return False
-        except KeyError:
-            _error = self.translate("logs", "The extension is missing a name value which is required.")
-            self.log.error(_error)
             return False
+        record["name"] = extension_name
         #Extension Main
         try:
             _main = extension_config['main']
-            if not config_validator.gui(_main):
-                _error = self.translate("logs", "The config's main value is invalid and cannot be saved.")
-                self.log.error(_error)
-                return False
         except KeyError:
             _main = "main" #Set this for later default values
-            if not config_validator.gui(_main):
-                _settings.setValue("main", _main)
         else:
-            _settings.setValue("main", _main)
+            record["main"] = _main
         #Extension Settings & Toolbar
         for val in ["settings", "toolbar"]:
+            #Defaults to main, which was checked and set before
+            record[val] = extension_config.get(val, _main)
+        #Extension Parent, Menu Item, Menu Level, and Tests
+        defaults = {"parent":"Extensions",
+                    "menu_item":extension_name,
+                    "menu_level":10,
+                    "tests":"tests"}
+        for val, default in defaults.items():
             try:
-                _config_value = extension_config[val]
-                if not config_validator.gui(val):
-                    _error = self.translate("logs", "The config's {0} value is invalid and cannot be saved.".format(val))
-                    self.log.error(_error)
-                    return False
+                record[val] = extension_config[val]
             except KeyError:
-                #Defaults to main, which was checked and set before
-                _settings.setValue(val, _main)
-            else:
-                _settings.setValue(val, _config_value)
-        #Extension Parent
-        try:
-            _parent = extension_config["parent"]
-            if config_validator.parent():
-                _settings.setValue("parent", _parent)
-            else:
-                _error = self.translate("logs", "The config's parent value is invalid and cannot be saved.")
-                self.log.error(_error)
-                return False
-        except KeyError:
-            self.log.debug(self.translate("logs", "Config for {0} does not contain a {1} value. Setting {1} to default value.".format(extension_name, "parent")))
-            _settings.setValue("parent", "Extensions")
-        #Extension Menu Item
-        try:
-            _menu_item = extension_config["menu_item"]
-            if config_validator.menu_item():
-                _settings.setValue("menu_item", _menu_item)
-            else:
-                _error = self.translate("logs", "The config's menu_item value is invalid and cannot be saved.")
-                self.log.error(_error)
-                return False
-        except KeyError:
-            self.log.debug(self.translate("logs", "Config for {0} does not contain a {1} value. Setting {1} to default value.".format(extension_name, "menu_item")))
-            _settings.setValue("menu_item", extension_name)
-        #Extension Menu Level
+                self.log.debug(self.translate("logs", "Config for {0} does not contain a {1} value. Setting {1} to default value.".format(extension_name, val)))
+                record[val] = default
+        #Write extension type
+        record["type"] = extension_type
+        record["initialized"] = 'true'
+        #Record the archive's contents so that later syncs can tell if it has changed.
+        if content_hash:
+            record["hash"] = content_hash
+        return record
+
+    def validate_library(self, ext_type):
+        """Validates every loaded config of a library in one pass.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+
+        Returns:
+          A list of validate.ValidationResult's, one for each loaded extension, listing every problem found.
+
+        Raises:
+          KeyError: If the library has not been loaded.
+        """
+        return self.extensions[ext_type].validate_configs()
+
+    def get_content_hash(self, ext_type, name):
+        """Returns the content hash of an extension's archive within a library.
+
+        Args:
+          ext_type (string): The extension library type [global, user, or core].
+          name (string): The name of the extension.
+
+        Returns:
+          The sha256 hash (string) of the extension's archive or None if the archive cannot be read.
+        """
         try:
-            _menu_level = extension_config["menu_level"]
-            if config_validator.menu_level():
-                _settings.setValue("menu_level", _menu_level)
-            else:
-                _error = self.translate("logs", "The config's menu_level value is invalid and cannot be saved.")
-                self.log.error(_error)
-                return False
+            path = os.path.join(os.path.abspath(self.libraries[ext_type]), str(name))
         except KeyError:
-            self.log.debug(self.translate("logs", "Config for {0} does not contain a {1} value. Setting {1} to default value.".format(extension_name, "menu_level")))
-            _settings.setValue("menu_level", 10)
-        #Extension Tests
+            return None
         try:
-            _tests = extension_config['tests']
-            if config_validator.tests():
-                _settings.setValue("tests", _tests)
-            else:
-                _error = self.translate("logs", "Extension {0} does not contain the {1} file listed in the config for its tests. Please either remove the listing to allow for the default value, or add the appropriate file.".format(extension_name, _config_value))
-                self.log.error(_error)
-                return False
-        except KeyError:
-            self.log.debug(self.translate("logs", "Config for {0} does not contain a {1} value. Setting {1} to default value.".format(extension_name, "tests")))
-            _settings.setValue("tests", "tests")
-        #Write extension type
-        _settings.setValue("type", extension_type)
-        _settings.setValue("initialized", 'true')
-        _settings.endGroup()
+            config_manager = self.extensions.get(ext_type)
+            if config_manager is not None:
+                return config_manager.get_hash(config_manager.get_path(name) or path)
+            return fs_utils.file_hash(path)
+        except OSError as _excp:
+            self.log.debug(self.translate("logs", "Could not hash the archive of extension {0}.".format(name)))
+            self.log.debug(_excp)
+            return None
+
+class SettingsBatch(object):
+    """A transaction that validates many extension configs and writes them to the application settings at once.
+
+    Configs are validated as they are staged. Nothing is written until the batch is committed, at which point every staged record is written in one pass followed by a single settings sync. If the write fails the settings of every extension in the batch are restored. Used as a context manager the batch commits when its block exits cleanly and is rolled back, with nothing written, if the block raises.
+
+    By default a batch is all or nothing. An invalid config rolls the whole batch back. A batch created with strict=False is best-effort: invalid configs are skipped and the rest are written.
+    """
+
+    def __init__(self, manager, strict=True):
+        """
+        Args:
+          manager (ExtensionManager): The extension manager whose settings are written.
+          strict (bool): Abandon the whole batch if any config fails validation. Pass False to skip invalid configs and write the rest.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.manager = manager
+        self.strict = strict
+        self.records = OrderedDict()
+        self.removals = []
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def stage(self, extension_config, extension_type="global", keep=None):
+        """Validates an extension config and adds it to the batch.
+
+        The staged record replaces any settings the extension already has.
+
+        Args:
+          extension_config (dict) An extension config in dictionary format.
+          extension_type (string): Type of extension "user" or "global". Defaults to global.
+          keep (list): Keys whose currently installed values should be kept rather than replaced.
+
+        Returns:
+          bool: True if the config was valid and staged, False if it was not.
+
+        Raises:
+          ValueError: If the batch is strict and the config is invalid. The batch is rolled back first.
+        """
+        with self.manager.profiler.timer(extension_config.get('name'), "build_settings"):
+            record = self.manager.build_settings(extension_config, extension_type)
+        if not record:
+            if self.strict:
+                self.rollback()
+                raise ValueError(self.translate("logs", "Extension {0} is invalid. No extensions in this batch will be saved.".format(extension_config.get('name'))))
+            return False
+        for key in keep or []:
+            current = self.manager.registry.value(record['name'], key)
+            if current is not None:
+                record[key] = current
+        self.records[record['name']] = record
+        if record['name'] in self.removals:
+            self.removals.remove(record['name'])
         return True
 
+    def remove(self, name):
+        """Adds the removal of an installed extension's settings to the batch.
+
+        Args:
+          name (string): The name of the extension.
+        """
+        self.records.pop(name, None)
+        if name not in self.removals:
+            self.removals.append(name)
+
+    def commit(self):
+        """Writes all staged records to the application settings.
+
+        Returns:
+          A list of the names (strings) of the extensions written.
+
+        Raises:
+          IOError: If the settings could not be written. The settings are restored first.
+        """
+        if self.committed:
+            return list(self.records.keys())
+        if self.records or self.removals:
+            self.manager.registry.save_many(self.records, self.removals)
+        self.committed = True
+        return list(self.records.keys())
+
+    def rollback(self):
+        """Discards every staged record and removal."""
+        if self.records or self.removals:
+            self.log.debug(self.translate("logs", "Discarded {0} staged extension records and {1} removals.".format(len(self.records), len(self.removals))))
+        self.records.clear()
+        del self.removals[:]
+
 class ConfigManager(object):
     """A object for loading config data from a library.
 
     This object should only be used to load configs and saving/checking those values against the users settings. Any value checking should take place in the users settings.
     """
 
-    def __init__(self, path=None):
+    def __init__(self, path=None, index=None, executor=None, quarantine=None):
         """
         Args:
           path (string): The path to an extension library.
+          index (ExtensionIndex): A persistent index of the library. Unchanged archives are served from the index without being opened.
+          executor (concurrent.futures.Executor): An executor used to catalog and load archives concurrently. Results are always returned in the order the archives were found. If not provided archives are loaded serially.
+          quarantine (Quarantine): Archives that failed to load before. They are skipped without being opened, and archives that fail are added to it.
         """
         #set function logger
         self.log = logging.getLogger("commotion_client."+__name__)
@@ -631,6 +1654,24 @@ class ConfigManager(object):
         self.configs = []
         self.directory = None
         self.paths = []
+        self.index = index
+        self.executor = executor
+        self.quarantine = quarantine
+        self.profiler = profiler.load_profiler
+        #Archive catalogs keyed by absolute path.
+        self.catalogs = {}
+        #Absolute archive paths keyed by the name of the extension loaded from them.
+        self.sources = {}
+        #Loaded configs keyed by extension name. Where archives share a name only one is kept. See index_configs.
+        self.names = {}
+        #Every archive path of each extension name that more than one archive in the library uses.
+        self.duplicates = {}
+        #Content hashes of archives that are not indexed. absolute path -> (signature, hash)
+        self.hashes = {}
+        #Loaded configs keyed by the absolute path of their archive.
+        self.loaded = {}
+        #Signatures of every file scanned within the library. absolute path -> [mtime, size]
+        self.signatures = {}
         if path:
             self.directory = path
             try:
@@ -640,7 +1681,8 @@ class ConfigManager(object):
                 raise ValueError(self.translate("logs", "The path {0} is empty. ConfigManager could not be created".format(path)))
             else:
                 self.log.info(self.translate("logs", "Extensions found in the {0} directory. Attempting to load extension configs.".format(path)))
-                self.configs = list(self.get())
+                list(self.get())
+                self.index_configs()
 
     def has_configs(self):
         """Provides the status of a ConfigManagers config files.
@@ -653,6 +1695,36 @@ class ConfigManager(object):
         else:
             return False
             
+    def get_snapshot(self):
+        """Returns everything the config manager has read from its library. See restore_snapshot.
+
+        Returns:
+          A dictionary that can be serialized as JSON.
+        """
+        return {'directory':os.path.abspath(str(self.directory)),
+                'paths':list(self.paths),
+                'configs':dict(self.loaded),
+                'members':dict((path, catalog.entries) for path, catalog in self.catalogs.items() if path in self.loaded),
+                'signatures':dict(self.signatures),
+                'hashes':dict((path, [signature, content_hash]) for path, (signature, content_hash) in self.hashes.items())}
+
+    def restore_snapshot(self, data):
+        """Loads the state of a library from a snapshot instead of scanning it.
+
+        Args:
+          data (dictionary): A snapshot returned by get_snapshot, possibly in another process.
+
+        Raises:
+          KeyError: If the snapshot is missing a value.
+        """
+        self.directory = data['directory']
+        self.paths = list(data['paths'])
+        self.loaded = dict(data['configs'])
+        self.signatures = dict((path, list(signature)) for path, signature in data['signatures'].items())
+        self.hashes = dict((path, (list(signature), content_hash)) for path, (signature, content_hash) in data['hashes'].items())
+        self.catalogs = dict((path, zip_catalog.ZipCatalog(path, entries=members)) for path, members in data['members'].items())
+        self.index_configs()
+
     def find(self, name=None):
         """
         Function used to obtain a config file from the ConfigManager.
@@ -667,12 +1739,41 @@ class ConfigManager(object):
             return False
         if not name:
             return self.configs
-        elif name != None:
-            for conf in self.configs:
-                if conf["name"] and conf["name"] == name:
-                    return conf
+        config = self.names.get(name)
+        if config is None:
             self.log.error(self.translate("logs", "No config of the chosed type named {0} found".format(name)))
             return False
+        return config
+
+    def index_configs(self):
+        """Rebuilds the name-keyed lookups of the loaded configs.
+
+        When more than one archive in the library contains an extension of the same name the archive nearest the top of the library, then first in path order, is used and the rest are recorded in duplicates.
+        """
+        self.names = {}
+        self.sources = {}
+        paths = {}
+        for path in sorted((os.path.abspath(str(path)) for path in self.paths), key=lambda path: (path.count(os.sep), path)):
+            config = self.loaded.get(path)
+            if not config:
+                continue
+            name = config.get('name')
+            paths.setdefault(name, []).append(path)
+            if name not in self.names:
+                self.names[name] = config
+                self.sources[name] = path
+        self.configs = list(self.names.values())
+        self.duplicates = dict((name, found) for name, found in paths.items() if len(found) > 1)
+        for name, found in sorted(self.duplicates.items()):
+            self.log.warning(self.translate("logs", "More than one archive in {0} contains extension {1}. Only {2} will be used. Ignoring: {3}".format(self.directory, name, found[0], ", ".join(found[1:]))))
+
+    def get_duplicates(self):
+        """Returns the extension names that more than one archive in the library contains.
+
+        Returns:
+          A dictionary of the absolute paths (list of strings) of every archive that contains each duplicated extension name, keyed by name. The first path is the archive being used.
+        """
+        return dict((name, list(found)) for name, found in self.duplicates.items())
 
     def get_paths(self, directory):
         """Returns the paths to all extensions with config files within a directory.
@@ -695,27 +1796,142 @@ class ConfigManager(object):
         else:
             path = dir_obj.absolutePath()
 
-        config_files = []
+        archives = []
         try:
             for root, dirs, files in fs_utils.walklevel(path):
-                for file_name in files:
-                    if zipfile.is_zipfile(os.path.join(root, file_name)):
-                        ext_zip = zipfile.ZipFile(os.path.join(root, file_name), 'r')
-                        ext_names = ext_zip.namelist()
-                        for member_name in ext_names:
-                            if member_name.endswith(".conf"):
-                                config_files.append(os.path.join(root, file_name))
+                #Sorted so that the order of configs does not depend on the file system.
+                for file_name in sorted(files):
+                    archives.append(os.path.join(root, file_name))
         except AssertionError:
             self.log.warn(self.translate("logs", "Extension library at path {0} does not exist. No Config files identified.".format(path)))
             raise
         except TypeError:
             self.log.warn(self.translate("logs", "No extensions found at path {0}. No Config files identified.".format(path)))
             raise
+        config_files = [file_path for file_path, has_config in self.map_archives(self.scan, archives) if has_config]
         if config_files:
             return config_files
         else:
             raise TypeError(self.translate("logs", "No config files found at path {0}. No Config files loaded.".format(path)))
 
+    def map_archives(self, function, items):
+        """Applies a function to a list of items using the config manager's executor if it has one.
+
+        Returns:
+          An iterator over the results in the same order as the items.
+        """
+        if self.executor:
+            return self.executor.map(function, items)
+        return map(function, items)
+
+    def scan(self, file_path):
+        """Checks if a file within the library is an extension archive with a config.
+
+        Args:
+          file_path (string): The path to a file in the library.
+
+        Returns:
+          A tuple of the file's path and a bool that is True if the file is an archive containing a config.
+        """
+        with self.profiler.timer(os.path.basename(str(file_path)), "discover"):
+            return self.scan_archive(file_path)
+
+    def scan_archive(self, file_path):
+        """Checks if a file is an extension archive with a config. See scan."""
+        try:
+            self.signatures[os.path.abspath(file_path)] = fs_utils.file_signature(file_path)
+        except OSError:
+            return (file_path, False)
+        if self.quarantine is not None:
+            entry = self.quarantine.check(file_path)
+            if entry is not None:
+                self.log.debug(self.translate("logs", "Skipping quarantined extension archive {0}: {1}".format(file_path, entry['reason'])))
+                return (file_path, False)
+        if self.index:
+            entry = self.index.lookup(file_path)
+            if entry is not None:
+                #Archives without a config were indexed with a config of None.
+                if entry['config'] is not None:
+                    self.catalogs[os.path.abspath(file_path)] = zip_catalog.ZipCatalog(file_path, entries=entry['members'])
+                    return (file_path, True)
+                return (file_path, False)
+        catalog = self.open_catalog(file_path)
+        if catalog is None:
+            #Hidden files are archives part way through being copied into the library.
+            if self.quarantine is not None and not os.path.basename(str(file_path)).startswith("."):
+                self.quarantine.add(file_path, self.translate("logs", "The file is not a readable zip archive."))
+            return (file_path, False)
+        if catalog.manifest is not None or catalog.find(".conf"):
+            return (file_path, True)
+        if self.index:
+            self.index.update(file_path, None, catalog.entries)
+        return (file_path, False)
+
+    def changed_paths(self):
+        """Lists the files within the library that have been added, modified, or removed since they were scanned.
+
+        Only the library's directory listing and the modification time and size of each file are read. No archives are opened.
+
+        Returns:
+          A sorted list of the absolute paths (strings) of the files that have changed.
+        """
+        current = {}
+        try:
+            for root, dirs, files in fs_utils.walklevel(os.path.abspath(str(self.directory))):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    try:
+                        current[path] = fs_utils.file_signature(path)
+                    except OSError:
+                        continue
+        except (NotADirectoryError, TypeError):
+            self.log.debug(self.translate("logs", "The library at {0} no longer exists.".format(self.directory)))
+        changed = [path for path, signature in current.items() if self.signatures.get(path) != signature]
+        changed.extend(path for path in self.signatures if path not in current)
+        return sorted(changed)
+
+    def refresh(self, paths):
+        """Re-scans and re-loads specific files within the library, leaving every other loaded config untouched.
+
+        Args:
+          paths (list): Paths to files within the library that have been added, modified, or removed.
+
+        Returns:
+          A tuple of lists of the names (strings) of the extensions whose configs were added, re-loaded, and removed.
+            (['new_ext'], ['updated_ext'], ['deleted_ext'])
+        """
+        previous_sources = dict(self.sources)
+        refreshed = set()
+        library_paths = set(self.paths)
+        for path in paths:
+            path = os.path.abspath(str(path))
+            refreshed.add(path)
+            self.catalogs.pop(path, None)
+            self.hashes.pop(path, None)
+            config = False
+            exists = os.path.isfile(path)
+            if exists and self.scan(path)[1]:
+                config = self.load(path)
+            elif not exists:
+                self.signatures.pop(path, None)
+                if self.index:
+                    self.index.remove(path)
+            self.loaded.pop(path, None)
+            if config:
+                library_paths.add(path)
+                self.loaded[path] = config
+            else:
+                library_paths.discard(path)
+        self.paths = sorted(library_paths)
+        self.index_configs()
+        #Compare which archive each name is served from, so an archive shadowed by a duplicate does not count as a change.
+        added = sorted(name for name in self.sources if name not in previous_sources)
+        removed = sorted(name for name in previous_sources if name not in self.sources)
+        changed = sorted(name for name, path in self.sources.items()
+                         if name in previous_sources and (path != previous_sources[name] or path in refreshed))
+        self.log.debug(self.translate("logs", "Refreshed {0} files in the library at {1}.".format(len(paths), self.directory)))
+        return (added, changed, removed)
+
     def get(self, paths=None):
         """
         Generator to retreive config files for the paths passed to it
@@ -728,13 +1944,63 @@ class ConfigManager(object):
             self.log.debug(self.translate("logs", "No paths found. Attempting to load all extension manager paths list."))
             paths = self.paths
             self.log.debug(self.translate("logs", "Found paths:{0}.".format(paths)))
-        for path in paths:
-            if fs_utils.is_file(path):
-                config = self.load(path)
-                if config:
-                    yield config
-            else:
-                self.log.warning(self.translate("logs", "Config file {0} does not exist and therefore cannot be loaded.".format(path)))
+        for path, config in zip(paths, self.map_archives(self.load_existing, paths)):
+            if config:
+                self.loaded[os.path.abspath(str(path))] = config
+                yield config
+
+    def get_path(self, name):
+        """Returns the path of the archive an extension's config was loaded from.
+
+        Args:
+          name (string): The name of a loaded extension.
+
+        Returns:
+          The absolute path (string) to the extension's archive or None if no config of that name has been loaded.
+        """
+        return self.sources.get(name)
+
+    def get_hash(self, path):
+        """Returns the content hash of an extension archive.
+
+        Indexed archives are served from the index. The hashes of other archives are calculated once and then reused until the archive's modification time or size changes.
+
+        Args:
+          path (string): The path to an extension archive.
+
+        Returns:
+          The sha256 hash (string) of the archive.
+
+        Raises:
+          OSError: If the archive cannot be read.
+        """
+        path = os.path.abspath(str(path))
+        if self.index:
+            entry = self.index.lookup(path)
+            if entry is not None:
+                return entry['hash']
+        signature = fs_utils.file_signature(path)
+        known = self.hashes.get(path)
+        if known is not None and known[0] == signature:
+            return known[1]
+        content_hash = fs_utils.file_hash(path)
+        self.hashes[path] = (signature, content_hash)
+        return content_hash
+
+    def load_existing(self, path):
+        """Loads the config of an archive if the archive exists.
+
+        Args:
+          path (string): The path to an extension archive.
+
+        Returns:
+          (dictionary) The config of the extension or False if it could not be loaded.
+        """
+        if not fs_utils.is_file(path):
+            self.log.warning(self.translate("logs", "Config file {0} does not exist and therefore cannot be loaded.".format(path)))
+            return False
+        with self.profiler.timer(os.path.basename(str(path)), "load_config"):
+            return self.load(path)
 
     def load(self, path):
         """This function loads the formatted config file and returns it.
@@ -754,23 +2020,127 @@ class ConfigManager(object):
         myfile = QtCore.QFile(str(path))
         if not myfile.exists():
             return False
-        if not zipfile.is_zipfile(str(path)):
+        if self.index:
+            entry = self.index.lookup(path)
+            if entry is not None:
+                self.log.debug(self.translate("logs", "Config for extension {0} loaded from the extension index.".format(path)))
+                if not entry['config']:
+                    return False
+                #The index keeps the validation results of each archive so that they survive restarts.
+                if entry['valid'] is not None:
+                    validate.validation_cache.put(validate.validation_cache.key(entry['config'], entry['hash']), entry['valid'], entry['errors'])
+                return copy.deepcopy(entry['config'])
+        catalog = self.get_catalog(path)
+        if catalog is None:
             return False
-        with zipfile.ZipFile(path, 'r') as zip_ext:
-            for file_name in zip_ext.namelist():
-                if file_name.endswith(".conf"):
-                    config = zip_ext.read(file_name)
-                    self.log.debug(self.translate("logs", "Config found in extension {0}.".format(path)))
+        members = catalog.entries
+        #Archives packaged with a manifest carry their config within it.
+        data = catalog.get_config()
+        if data is not None:
+            self.log.debug(self.translate("logs", "Config of extension {0} loaded from its manifest.".format(path)))
+        else:
+            config_name = catalog.find(".conf")
+            if config_name:
+                config = catalog.read(config_name)
+                self.log.debug(self.translate("logs", "Config found in extension {0}.".format(path)))
         if config:
             try:
                 data = json.loads(config.decode('utf-8'))
                 self.log.info(self.translate("logs", "Successfully loaded {0}'s config file.".format(path)))
             except ValueError:
                 self.log.warning(self.translate("logs", "Failed to load {0} due to a non-json or otherwise invalid file type".format(path)))
+                if self.index:
+                    self.index.update(path, False, members, False, ["config"])
+                if self.quarantine is not None:
+                    self.quarantine.add(path, self.translate("logs", "The config is not valid JSON."), ["config"])
                 return False
+        if self.index:
+            try:
+                content_hash = self.get_hash(path)
+            except OSError:
+                content_hash = None
+            valid, errors = self.validate(path, data, content_hash) if data else (False, ["config"])
+            self.index.update(path, copy.deepcopy(data) if data else False, members, valid, errors, content_hash)
         if data:
             self.log.debug(self.translate("logs", "Config file loaded.".format(path)))
             return data
         else:
             self.log.debug(self.translate("logs", "Failed to load config file.".format(path)))
             return False
+
+    def validate_configs(self, validator=None):
+        """Validates every loaded config against its archive in one pass.
+
+        Args:
+          validator (LibraryValidator): The validator to use. Defaults to a validator for the current platform.
+
+        Returns:
+          A list of validate.ValidationResult's in library order.
+        """
+        if validator is None:
+            validator = validate.LibraryValidator()
+        archives = []
+        for path in self.paths:
+            config = self.loaded.get(path)
+            if config is None:
+                continue
+            catalog = self.get_catalog(path)
+            archives.append((path, config, catalog.entries if catalog is not None else {}))
+        return validator.validate_library(archives)
+
+    def validate(self, path, config, content_hash=None):
+        """Validates a config against the archive it was loaded from.
+
+        Args:
+          path (string): The path to the extension archive.
+          config (dictionary): The config loaded from the archive.
+          content_hash (string): The sha256 hash of the archive. Validation results are only cached when it is provided.
+
+        Returns:
+          A tuple containing the validity (bool) of the config and a list of the config values that were invalid.
+            (False, ['menu_item', 'toolbar'])
+        """
+        try:
+            validator = validate.ClientConfig(config, os.path.dirname(os.path.abspath(str(path))), self.get_catalog(path), content_hash)
+        except KeyError:
+            return (False, ["config"])
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return (False, ["name"])
+        if validator.validate_all():
+            return (True, [])
+        return (False, validator.errors)
+
+    def open_catalog(self, path):
+        """Catalogs an extension archive and keeps the catalog for later queries.
+
+        Args:
+          path (string): The path to an extension archive.
+
+        Archives with a manifest are cataloged from the manifest alone.
+
+        Returns:
+          The ZipCatalog of the archive or None if the file is not a readable zip archive.
+        """
+        path = os.path.abspath(str(path))
+        try:
+            catalog = zip_catalog.open_catalog(path)
+        except (zipfile.BadZipFile, OSError) as _excp:
+            self.log.debug(self.translate("logs", "{0} is not a readable extension archive.".format(path)))
+            self.log.debug(_excp)
+            return None
+        self.catalogs[path] = catalog
+        return catalog
+
+    def get_catalog(self, path):
+        """Returns the catalog of an extension archive, cataloging the archive if it has not been already.
+
+        Args:
+          path (string): The path to an extension archive.
+
+        Returns:
+          The ZipCatalog of the archive or None if the file is not a readable zip archive.
+        """
+        catalog = self.catalogs.get(os.path.abspath(str(path)))
+        if catalog is None:
+            catalog = self.open_catalog(path)
+        return catalog
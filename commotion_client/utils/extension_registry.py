@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+extension_registry
+
+An in-memory registry of the extensions installed in the application settings.
+
+Key componenets handled within:
+ * loading installed extension records from the application settings once
+ * answering installed extension queries from memory
+ * maintaining hash indexes over commonly queried properties and the menu ordering
+ * writing changes through to the application settings
+
+"""
+#Standard Library Imports
+import logging
+import copy
+import bisect
+
+#PyQt imports
+from PyQt4 import QtCore
+
+class ExtensionRegistry(object):
+    """The installed extension records of a settings object.
+
+    The registry reads every extension settings group once, when it is created or re-loaded. All further queries are answered from memory. Changes made through the registry are written to the settings as they are made. Changes made to the settings directly are only seen after the registry is re-loaded.
+
+    The properties listed in indexed_keys are kept in hash indexes so that finding all extensions with a value costs one dictionary lookup. The menu ordering of all extensions is kept sorted by menu_level as records change.
+    """
+
+    indexed_keys = ["parent", "type", "menu_level", "initialized", "main"]
+    #The menu level given to extensions without a valid menu_level.
+    default_menu_level = 10
+
+    def __init__(self, settings):
+        """
+        Args:
+          settings (QSettings): A settings object whose current group is the "extensions" group.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.settings = settings
+        #extension name -> {key: value}
+        self.records = {}
+        #key -> value -> {extension name: None}  (dictionaries are used as insertion ordered sets)
+        self.indexes = {}
+        #[(menu_level, extension name)] kept sorted
+        self.menu_order = []
+        self.load()
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def load(self):
+        """(Re)loads all installed extension records from the settings."""
+        records = {}
+        for name in self.settings.childGroups():
+            self.settings.beginGroup(name)
+            records[name] = dict((key, self.settings.value(key)) for key in self.settings.childKeys())
+            self.settings.endGroup()
+        self.records = records
+        self.indexes = dict((key, {}) for key in self.indexed_keys)
+        self.menu_order = []
+        for name, record in records.items():
+            self.add_to_indexes(name, record)
+        self.log.debug(self.translate("logs", "Loaded {0} installed extension records from the application settings.".format(len(records))))
+
+    def names(self):
+        """Returns a list of the names of all installed extensions."""
+        return list(self.records.keys())
+
+    def get(self, name):
+        """Returns a copy of an installed extension's record.
+
+        Args:
+          name (string): The extension's name.
+
+        Returns:
+          The record (dictionary) of the extension.
+
+        Raises:
+          KeyError: If no extension of that name is installed.
+        """
+        return copy.copy(self.records[name])
+
+    def value(self, name, key, default=None):
+        """Returns a single value from an installed extension's record.
+
+        Args:
+          name (string): The extension's name.
+          key (string): The key of the value requested.
+          default: The value returned if the extension or key does not exist.
+        """
+        return self.records.get(name, {}).get(key, default)
+
+    def find(self, key, val):
+        """Returns the names of all installed extensions whose record has the value val for key.
+
+        Args:
+          key (string): The name of a property.
+          val: The value that the property must have.
+
+        Returns:
+          A list of extension names.
+        """
+        if key in self.indexes and self.is_hashable(val):
+            return list(self.indexes[key].get(val, {}).keys())
+        return [name for name, record in self.records.items() if record.get(key) == val]
+
+    def ordered(self, names=None):
+        """Returns extension names in menu order (by menu_level, then by name).
+
+        Args:
+          names (list): The extensions to order. Defaults to all installed extensions.
+
+        Returns:
+          A list of extension names.
+        """
+        if names is None:
+            return [name for _, name in self.menu_order]
+        wanted = set(names)
+        return [name for _, name in self.menu_order if name in wanted]
+
+    def add_to_indexes(self, name, record):
+        """Adds an extension's record to the property indexes and menu ordering."""
+        for key in self.indexed_keys:
+            val = record.get(key)
+            if self.is_hashable(val):
+                self.indexes[key].setdefault(val, {})[name] = None
+        bisect.insort(self.menu_order, (self.menu_level(record), name))
+
+    def remove_from_indexes(self, name, record):
+        """Removes an extension's record from the property indexes and menu ordering."""
+        for key in self.indexed_keys:
+            val = record.get(key)
+            if not self.is_hashable(val):
+                continue
+            matching = self.indexes[key].get(val)
+            if matching is not None:
+                matching.pop(name, None)
+                if not matching:
+                    del self.indexes[key][val]
+        position = bisect.bisect_left(self.menu_order, (self.menu_level(record), name))
+        if position < len(self.menu_order) and self.menu_order[position] == (self.menu_level(record), name):
+            del self.menu_order[position]
+
+    def menu_level(self, record):
+        """Returns the menu level (int) of a record, or the default menu level if it has no valid level."""
+        try:
+            return int(record.get("menu_level"))
+        except (TypeError, ValueError):
+            return self.default_menu_level
+
+    @staticmethod
+    def is_hashable(val):
+        """Checks if a value can be used as an index key."""
+        try:
+            hash(val)
+        except TypeError:
+            return False
+        return True
+
+    def save(self, name, record):
+        """Writes values to an extension's record and its settings group.
+
+        Keys that are not in the record passed are left unchanged.
+
+        Args:
+          name (string): The extension's name.
+          record (dictionary): The values to write.
+        """
+        self.settings.beginGroup(name)
+        try:
+            for key, val in record.items():
+                self.settings.setValue(key, val)
+        finally:
+            self.settings.endGroup()
+        existing = self.records.get(name)
+        if existing is not None:
+            self.remove_from_indexes(name, existing)
+        updated = dict(existing) if existing else {}
+        updated.update(record)
+        self.records[name] = updated
+        self.add_to_indexes(name, updated)
+
+    def save_many(self, records, removals=None):
+        """Writes the records of many extensions in a single pass followed by a single settings sync.
+
+        Each record passed replaces the extension's existing record. If any write fails every extension touched is restored to the record it had before the call.
+
+        Args:
+          records (dictionary): Extension names mapped to the record (dictionary) to write for that extension.
+          removals (list): The names of extensions whose records should be removed.
+
+        Raises:
+          IOError: If the settings could not be written. The registry and settings are rolled back first.
+        """
+        removals = list(removals or [])
+        previous = dict((name, copy.copy(self.records.get(name))) for name in list(records) + removals)
+        try:
+            for name in removals:
+                self.remove(name)
+            for name, record in records.items():
+                if name in self.records:
+                    self.remove(name)
+                self.save(name, record)
+            self.settings.sync()
+            if self.settings.status() != QtCore.QSettings.NoError:
+                raise IOError(self.translate("logs", "The application settings could not be written."))
+        except Exception:
+            self.log.warning(self.translate("logs", "Writing {0} extension records failed. Restoring their previous settings.".format(len(previous))))
+            self.restore(previous)
+            raise
+        self.log.debug(self.translate("logs", "Wrote {0} and removed {1} extension records in the application settings.".format(len(records), len(removals))))
+
+    def restore(self, previous):
+        """Restores extensions to earlier records.
+
+        Args:
+          previous (dictionary): Extension names mapped to the record (dictionary) they should have, or None if they should not be installed.
+        """
+        for name, record in previous.items():
+            self.remove(name)
+            if record is not None:
+                self.save(name, record)
+        self.settings.sync()
+
+    def remove(self, name):
+        """Removes an extension's record and its settings group.
+
+        Args:
+          name (string): The extension's name.
+        """
+        self.settings.remove(name)
+        record = self.records.pop(name, None)
+        if record is not None:
+            self.remove_from_indexes(name, record)
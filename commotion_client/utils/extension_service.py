@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+extension_service
+
+The extension manager shared by every part of the running application.
+
+Key componenets handled within:
+ * creating a single ExtensionManager, and with it the library paths, settings, registry, and caches, on first use
+ * loading the extension libraries in the background and then watching them for changes
+ * announcing the extensions that were installed, updated, or removed to every component
+ * publishing the loaded libraries for other processes, and starting from a published snapshot, see library_snapshot
+
+Components should get the manager from the service rather than creating an ExtensionManager of their own. Each ExtensionManager keeps its own registry, module cache, and indexes, so separate instances repeat the same set up and drift out of sync with one another.
+
+e.g:
+  service = extension_service.get_service()
+  service.extensions_updated.connect(menu_bar.refresh_extensions)
+  service.load()
+"""
+#Standard Library Imports
+import logging
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import extension_manager
+
+class ExtensionService(QtCore.QObject):
+    """Owns an extension manager along with its background loader and library watcher."""
+
+    #(installed, updated, removed) lists of extension names
+    extensions_updated = QtCore.pyqtSignal(list, list, list)
+    #(extension type, extensions synced, extensions in library)
+    library_progress = QtCore.pyqtSignal(str, int, int)
+    #True if every library was loaded, False if the load was cancelled or failed
+    loading_finished = QtCore.pyqtSignal(bool)
+
+    def __init__(self, manager=None, parent=None, snapshot=True):
+        """
+        Args:
+          manager (ExtensionManager): The extension manager to share. One is created the first time it is needed if not provided.
+          parent (QObject): The parent of the service.
+          snapshot (bool): Start loading from the published library snapshot, and publish a new snapshot whenever the libraries have been loaded or changed.
+        """
+        super().__init__(parent)
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self._manager = manager
+        self.snapshot = snapshot
+        self.loader = None
+        #Set from when a load starts until its loading_finished signal is delivered on this thread.
+        self.loading = False
+        self.watcher = None
+        #Start watching the libraries once the current load has finished.
+        self.watch_after_load = False
+
+    @property
+    def manager(self):
+        """The shared ExtensionManager."""
+        if self._manager is None:
+            self.log.debug(self.translate("logs", "Creating the shared extension manager."))
+            self._manager = extension_manager.ExtensionManager()
+        return self._manager
+
+    def is_loading(self):
+        """Checks if the extension libraries are being loaded in the background."""
+        return self.loading
+
+    def load(self):
+        """Loads the extension libraries on a worker thread.
+
+        Extensions are announced through extensions_updated as each library is installed. Does nothing if a load is already running.
+
+        Returns:
+          The extension_loader.ExtensionLoader running the load.
+        """
+        if self.is_loading():
+            self.log.debug(self.translate("logs", "Extensions are already being loaded."))
+            return self.loader
+        if self.watcher is not None:
+            #The loader and the watcher must not sync the same libraries at once.
+            self.watcher.stop()
+            self.watch_after_load = True
+        if self.snapshot and not self.manager.extensions:
+            #Only the archives that changed since the snapshot was published are read.
+            self.manager.attach_snapshot()
+        self.loading = True
+        self.loader = self.manager.init_extension_libraries_async(self, start=False)
+        self.loader.library_progress.connect(self.library_progress)
+        self.loader.extensions_updated.connect(self.extensions_updated)
+        self.loader.loading_finished.connect(self.loaded)
+        self.loader.start()
+        return self.loader
+
+    def load_now(self):
+        """Installs the extension libraries on the calling thread if no extensions are installed yet."""
+        if not self.manager.check_installed():
+            self.manager.init_extension_libraries()
+
+    def loaded(self, completed):
+        """Finishes a background load and starts any library watching that was waiting for it."""
+        self.loading = False
+        if not completed:
+            self.log.warning(self.translate("logs", "Not all extensions could be loaded."))
+        else:
+            self.publish()
+        if self.watch_after_load:
+            self.watch_after_load = False
+            self.start_watching()
+        self.loading_finished.emit(completed)
+
+    def cancel_loading(self):
+        """Cancels a background load and waits for its worker thread to stop."""
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.wait()
+            self.loader = None
+        self.loading = False
+
+    def start_watching(self):
+        """Updates the installed extensions as archives are added to, updated in, or removed from the libraries.
+
+        If the libraries are being loaded, watching starts once they have been.
+
+        Returns:
+          The LibraryWatcher watching the libraries, or None if watching will start after the current load.
+        """
+        if self.is_loading():
+            self.watch_after_load = True
+            return None
+        if self.watcher is None:
+            self.watcher = self.manager.watch_libraries()
+            self.watcher.extensions_updated.connect(self.extensions_updated)
+            self.watcher.extensions_updated.connect(self.libraries_changed)
+        else:
+            self.watcher.start()
+        return self.watcher
+
+    def libraries_changed(self, added, changed, removed):
+        """Publishes the libraries again after the watcher has synced changes to them."""
+        self.publish()
+
+    def publish(self):
+        """Publishes a snapshot of the loaded libraries, if snapshots are enabled.
+
+        Returns:
+          bool: True if a snapshot was published.
+        """
+        if not self.snapshot:
+            return False
+        try:
+            self.manager.publish_snapshot()
+        except IOError:
+            return False
+        return True
+
+    def stop(self):
+        """Cancels any background load and stops watching the libraries."""
+        self.watch_after_load = False
+        self.cancel_loading()
+        if self.watcher is not None:
+            self.watcher.stop()
+
+_service = None
+
+def get_service():
+    """Returns the application's ExtensionService, creating it on first use.
+
+    The service is created without a parent so that it lives as long as the application rather than any one window.
+    """
+    global _service
+    if _service is None:
+        _service = ExtensionService()
+    return _service
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+extraction_cache
+
+A per-user cache of extension archives extracted to plain directories.
+
+Key componenets handled within:
+ * extracting an extension archive once and verifying it against the archive's hash
+ * detecting extractions that are stale because their archive changed
+ * importing user interface modules from an extraction with the standard path finder
+ * evicting extractions by age and by the total size of the cache
+
+Modules imported through zipimport are compiled on every run because zipimport cannot write bytecode back into an archive. Modules imported from an extraction are cached in __pycache__ like any other module, so large extensions only pay for compiling once.
+
+Each extraction is written to a temporary directory beside its final location, verified, and then renamed into place, so other processes never see a partial extraction.
+
+e.g:
+  cache = ExtractionCache()
+  importer = DirectoryImporter(cache.get_path("unit_test_mock", "path/to/unit_test_mock"))
+  main = importer.load_module("main")
+"""
+#Standard Library Imports
+import logging
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import zipfile
+import importlib
+import importlib.machinery
+import importlib.util
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import fs_utils
+
+#The file, within each extraction, that records the archive it was extracted from.
+MARKER_NAME = ".commotion_extraction.json"
+
+class ExtractionCache(object):
+    """Extension archives extracted into a cache directory, one directory per extension.
+
+    An extraction is current while its archive has the signature (modification time and size) it had when it was extracted, or has been touched without its contents changing. The modification time of each extraction's marker is updated whenever it is used, and is what eviction by age is based on.
+    """
+
+    def __init__(self, directory=None, max_size=256 * 1024 * 1024, max_age=30 * 24 * 60 * 60):
+        """
+        Args:
+          directory (string): The directory extractions are kept in. Defaults to "extracted" within the users cache directory.
+          max_size (int): The total number of bytes all extractions may use before the least recently used are evicted.
+          max_age (int): The number of seconds an extraction may go unused before it is evicted.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self._directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+
+    @property
+    def directory(self):
+        """The directory (string) extractions are kept in. Created on first use."""
+        if self._directory is None:
+            self._directory = fs_utils.get_cache_dir("extracted")
+        return self._directory
+
+    def get_path(self, extension, archive, content_hash=None):
+        """Returns the directory an extension archive is extracted in, extracting it if it is missing or stale.
+
+        Args:
+          extension (string): The name of the extension.
+          archive (string): The path to the extension archive.
+          content_hash (string): The sha256 hash the archive is expected to have, if known.
+
+        Returns:
+          The absolute path (string) of the extracted extension.
+
+        Raises:
+          IOError: If the archive could not be extracted or does not match its expected hash.
+        """
+        archive = os.path.abspath(str(archive))
+        path = os.path.join(self.directory, extension)
+        marker = self.read_marker(path)
+        if marker is not None and self.is_current(marker, archive, content_hash):
+            self.touch(path)
+            return path
+        self.extract(extension, archive, content_hash)
+        self.evict(keep=[extension])
+        return path
+
+    def is_current(self, marker, archive, content_hash=None):
+        """Checks that an extraction was made from the current contents of an archive.
+
+        Args:
+          marker (dictionary): The marker of an extraction.
+          archive (string): The absolute path to the extension archive.
+          content_hash (string): The sha256 hash the archive is expected to have, if known.
+
+        Returns:
+          bool: True if the extraction can be used.
+        """
+        if marker.get('archive') != archive:
+            return False
+        if content_hash and marker.get('hash') != content_hash:
+            return False
+        try:
+            signature = fs_utils.file_signature(archive)
+        except OSError:
+            return False
+        if signature == marker.get('signature'):
+            return True
+        #Touched, but possibly unchanged. Compare the contents before extracting again.
+        try:
+            if fs_utils.file_hash(archive) != marker.get('hash'):
+                return False
+        except OSError:
+            return False
+        marker['signature'] = signature
+        try:
+            self.write_marker(os.path.join(self.directory, marker['extension']), marker)
+        except OSError:
+            pass
+        return True
+
+    def extract(self, extension, archive, content_hash=None):
+        """Extracts an archive into a temporary directory and renames it over the extension's extraction.
+
+        Args:
+          extension (string): The name of the extension.
+          archive (string): The absolute path to the extension archive.
+          content_hash (string): The sha256 hash the archive is expected to have, if known.
+
+        Raises:
+          IOError: If the archive could not be extracted or does not match its expected hash.
+        """
+        path = os.path.join(self.directory, extension)
+        temp_path = None
+        try:
+            signature = fs_utils.file_signature(archive)
+            archive_hash = fs_utils.file_hash(archive)
+            if content_hash and archive_hash != content_hash:
+                raise IOError(self.translate("logs", "The archive {0} does not match its expected hash.".format(archive)))
+            temp_path = tempfile.mkdtemp(prefix="." + extension + ".", suffix=".tmp", dir=self.directory)
+            #Reading each member checks it against the CRC in the archive.
+            with zipfile.ZipFile(archive, 'r') as compressed_extension:
+                compressed_extension.extractall(temp_path)
+                size = sum(info.file_size for info in compressed_extension.infolist())
+            self.write_marker(temp_path, {'extension':extension,
+                                          'archive':archive,
+                                          'signature':signature,
+                                          'hash':archive_hash,
+                                          'size':size})
+            if os.path.isdir(path):
+                self.remove(extension)
+            os.rename(temp_path, path)
+            temp_path = None
+        except (OSError, zipfile.BadZipFile) as _excp:
+            _error = self.translate("logs", "Could not extract extension {0} from {1}.".format(extension, archive))
+            self.log.warning(_error)
+            self.log.debug(_excp)
+            raise IOError(_error)
+        finally:
+            if temp_path is not None:
+                shutil.rmtree(temp_path, ignore_errors=True)
+        #The path finder caches directory listings.
+        importlib.invalidate_caches()
+        self.log.debug(self.translate("logs", "Extracted extension {0} into {1}.".format(extension, path)))
+
+    def read_marker(self, path):
+        """Returns the marker of an extraction or None if it has none."""
+        try:
+            with open(os.path.join(path, MARKER_NAME), encoding="utf-8") as marker_file:
+                marker = json.load(marker_file)
+        except (OSError, ValueError):
+            return None
+        return marker if isinstance(marker, dict) else None
+
+    def write_marker(self, path, marker):
+        """Writes the marker of an extraction.
+
+        Raises:
+          OSError: If the marker could not be written.
+        """
+        with open(os.path.join(path, MARKER_NAME), mode='w', encoding="utf-8") as marker_file:
+            json.dump(marker, marker_file)
+
+    def touch(self, path):
+        """Marks an extraction as used now."""
+        try:
+            os.utime(os.path.join(path, MARKER_NAME))
+        except OSError:
+            pass
+
+    def get_extractions(self):
+        """Lists every extraction in the cache.
+
+        Returns:
+          A list of (extension name, last used time, size in bytes) tuples, least recently used first. Extractions without a readable marker have a last used time and size of 0.
+        """
+        extractions = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return extractions
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            marker = self.read_marker(path)
+            try:
+                used = os.stat(os.path.join(path, MARKER_NAME)).st_mtime
+            except OSError:
+                used = 0
+            extractions.append((name, used, marker.get('size', 0) if marker else 0))
+        return sorted(extractions, key=lambda extraction: (extraction[1], extraction[0]))
+
+    def evict(self, keep=None):
+        """Removes extractions that have not been used within max_age, then the least recently used until the cache fits within max_size.
+
+        Args:
+          keep (list): Names of extensions whose extractions must not be removed.
+
+        Returns:
+          A list of the names (strings) of the extensions whose extractions were removed.
+        """
+        keep = set(keep or [])
+        extractions = self.get_extractions()
+        now = time.time()
+        evicted = []
+        #Temporary directories left behind by interrupted extractions.
+        try:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.startswith(".") and os.path.isdir(path) and now - os.stat(path).st_mtime > self.max_age:
+                    shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+        total = sum(size for _, _, size in extractions)
+        for name, used, size in extractions:
+            if name in keep:
+                continue
+            if now - used > self.max_age or total > self.max_size:
+                self.remove(name)
+                evicted.append(name)
+                total -= size
+        if evicted:
+            self.log.debug(self.translate("logs", "Evicted {0} extension extractions from the cache.".format(len(evicted))))
+        return evicted
+
+    def remove(self, extension):
+        """Removes an extension's extraction.
+
+        The extraction is renamed out of the way before it is deleted so that it is never seen half deleted.
+
+        Args:
+          extension (string): The name of the extension.
+        """
+        path = os.path.join(self.directory, extension)
+        if not os.path.isdir(path):
+            return
+        trash = tempfile.mkdtemp(prefix="." + extension + ".", suffix=".old", dir=self.directory)
+        try:
+            os.rename(path, os.path.join(trash, extension))
+        except OSError:
+            shutil.rmtree(trash, ignore_errors=True)
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def clear(self):
+        """Removes every extraction."""
+        for name, _, _ in self.get_extractions():
+            self.remove(name)
+
+class DirectoryImporter(object):
+    """Loads the modules of an extracted extension with the standard path finder.
+
+    Matches the load_module interface of zipimport.zipimporter so that either can be cached by module_cache.ModuleCache.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+          directory (string): The path to an extracted extension.
+        """
+        self.directory = directory
+
+    def load_module(self, fullname):
+        """Imports a module from the extracted extension.
+
+        The module replaces any module of the same name in sys.modules, as zipimporter.load_module does.
+
+        Args:
+          fullname (string): The name of a module within the extension.
+
+        Returns:
+          The loaded module.
+
+        Raises:
+          ImportError: If the module does not exist within the extension.
+        """
+        if not hasattr(importlib.util, "module_from_spec"):
+            #Python 3.3 and 3.4 load modules through the finder's loader.
+            loader = importlib.machinery.PathFinder.find_module(fullname, [self.directory])
+            if loader is None:
+                raise ImportError("There is no module named {0} in {1}.".format(fullname, self.directory), name=fullname)
+            sys.modules.pop(fullname, None)
+            return loader.load_module(fullname)
+        spec = importlib.machinery.PathFinder.find_spec(fullname, [self.directory])
+        if spec is None:
+            raise ImportError("There is no module named {0} in {1}.".format(fullname, self.directory), name=fullname)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[fullname] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[fullname]
+            raise
+        return module
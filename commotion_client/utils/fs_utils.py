@@ -12,9 +12,13 @@ from PyQt4 import QtCore
 
 #Standard Library Imports
 import os
+import sys
 import logging
 import uuid
 import json
+import hashlib
+import shutil
+import tempfile
 
 translate = QtCore.QCoreApplication.translate
 log = logging.getLogger("commotion_client."+__name__)
@@ -73,6 +77,100 @@ def make_temp_dir(new=None):
     return temp_full
 
 
+def get_cache_dir(sub_dir=None):
+    """Returns the path to the per-user Commotion cache directory, creating it if it does not exist.
+
+    OS Defaults:
+      Linux: $XDG_CACHE_HOME/Commotion (defaults to $HOME/.cache/Commotion)
+      OSX: $HOME/Library/Caches/Commotion
+      Windows: %LOCALAPPDATA%\\Commotion\\cache
+
+    Args:
+      sub_dir (string): An optional sub-directory within the cache directory to return.
+
+    Returns:
+      The absolute path (string) to the cache directory.
+
+    Raises:
+      IOError: If the cache directory could not be created.
+    """
+    home = QtCore.QDir.homePath()
+    platform_dirs = {
+        'darwin': os.path.join(home, "Library", "Caches", "Commotion"),
+        'win32': os.path.join(os.getenv('LOCALAPPDATA') or os.getenv('APPDATA') or home, "Commotion", "cache"),
+        'linux': os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(home, ".cache"), "Commotion")}
+    cache_path = platform_dirs.get(sys.platform, os.path.join(home, ".cache", "Commotion"))
+    if sub_dir:
+        cache_path = os.path.join(cache_path, sub_dir)
+    cache_dir = QtCore.QDir(cache_path)
+    if not cache_dir.exists() and not cache_dir.mkpath(cache_dir.absolutePath()):
+        _error = translate("logs", "Error creating cache directory {0}".format(cache_path))
+        log.debug(_error)
+        raise IOError(_error)
+    return cache_dir.absolutePath()
+
+def file_signature(path):
+    """Returns a cheap signature of a file that changes whenever the file is modified.
+
+    Args:
+      path (string): The path to a file.
+
+    Returns:
+      A list containing the modification time (in nanoseconds) and the size of the file.
+        [1397661723000000000, 136809]
+
+    Raises:
+      OSError: If the file cannot be accessed.
+    """
+    stats = os.stat(path)
+    return [stats.st_mtime_ns, stats.st_size]
+
+def file_hash(path, chunk_size=65536):
+    """Returns the sha256 hash of a files contents.
+
+    The file is read in chunks so that large files are never held in memory.
+
+    Args:
+      path (string): The path to a file.
+      chunk_size (int): The number of bytes to read at a time.
+
+    Returns:
+      The hex digest (string) of the files contents.
+
+    Raises:
+      OSError: If the file cannot be read.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as _file:
+        for chunk in iter(lambda: _file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def atomic_copy(source, destination):
+    """Copies a file so that the destination is either left untouched or completely replaced.
+
+    The file is copied to a temporary file beside the destination, which is then renamed over the destination. shutil.copyfile uses the operating system's in-kernel copy (sendfile, fcopyfile) where one is available.
+
+    Args:
+      source (string): The path to the file to copy.
+      destination (string): The path to copy the file to.
+
+    Raises:
+      OSError: If the file could not be copied. Any temporary file is removed first.
+    """
+    directory = os.path.dirname(os.path.abspath(destination))
+    handle, temp_path = tempfile.mkstemp(prefix=".{0}.".format(os.path.basename(destination)), suffix=".tmp", dir=directory)
+    os.close(handle)
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, destination)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
 def clean_dir(path=None):
     """ Cleans a directory. If not given a path it will clean the FULL temporary directory"""
     log = logging.getLogger("commotion_client."+__name__)
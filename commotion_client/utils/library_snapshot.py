@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+library_snapshot
+
+A snapshot of the loaded extension libraries that other processes can start from instead of scanning the libraries again.
+
+Key componenets handled within:
+ * publishing the loaded configs, archive catalogs, and file signatures of every library to a file in the users cache directory
+ * attaching to a published snapshot
+
+The running client publishes a snapshot whenever its libraries have been loaded or have changed. A restarting client, a second instance, or a script that uses an ExtensionManager attaches to the snapshot and then only re-reads the archives whose modification time or size has changed since the snapshot was published. See ExtensionManager.attach_snapshot.
+
+The snapshot is written to a temporary file that is then renamed over the published snapshot, so a reader always reads either the old or the new snapshot in full.
+
+Snapshots are read with a plain read rather than a memory map. The json module can only parse a complete str, so mapping the file would still copy all of it into bytes and then into a str, and would save nothing.
+
+"""
+#Standard Library Imports
+import logging
+import os
+import json
+import time
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import fs_utils
+
+#Increment when the format of a snapshot changes so that old snapshots are ignored.
+SNAPSHOT_VERSION = 1
+
+def default_path():
+    """Returns the path (string) of the snapshot file within the users cache directory.
+
+    Raises:
+      IOError: If the cache directory could not be created.
+    """
+    return os.path.join(fs_utils.get_cache_dir(), "extension_snapshot.json")
+
+def publish(libraries, path=None):
+    """Writes a snapshot of loaded libraries.
+
+    Args:
+      libraries (dictionary): The library data of each extension type [core, global, or user] as returned by ConfigManager.get_snapshot.
+      path (string): The path of the snapshot file. Defaults to default_path().
+
+    Returns:
+      The path (string) the snapshot was written to.
+
+    Raises:
+      IOError: If the snapshot could not be written.
+    """
+    translate = QtCore.QCoreApplication.translate
+    log = logging.getLogger("commotion_client."+__name__)
+    if path is None:
+        path = default_path()
+    data = {'version':SNAPSHOT_VERSION,
+            'created':time.time(),
+            'pid':os.getpid(),
+            'libraries':libraries}
+    temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    try:
+        with open(temp_path, mode='w', encoding="utf-8") as snapshot_file:
+            json.dump(data, snapshot_file)
+        os.replace(temp_path, path)
+    except OSError as _excp:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        _error = translate("logs", "Could not publish the extension library snapshot to {0}.".format(path))
+        log.warning(_error)
+        log.debug(_excp)
+        raise IOError(_error)
+    log.debug(translate("logs", "Published a snapshot of {0} extension libraries to {1}.".format(len(libraries), path)))
+    return path
+
+def attach(path=None):
+    """Reads a published snapshot.
+
+    Args:
+      path (string): The path of the snapshot file. Defaults to default_path().
+
+    Returns:
+      A dictionary of the library data of each extension type, or None if there is no snapshot or it is unreadable or out of date.
+    """
+    translate = QtCore.QCoreApplication.translate
+    log = logging.getLogger("commotion_client."+__name__)
+    try:
+        if path is None:
+            path = default_path()
+        with open(path, mode='r', encoding="utf-8") as snapshot_file:
+            data = json.load(snapshot_file)
+    except FileNotFoundError:
+        log.debug(translate("logs", "No extension library snapshot has been published."))
+        return None
+    except (OSError, ValueError) as _excp:
+        #ValueError includes empty files, invalid JSON, and invalid UTF-8.
+        log.debug(translate("logs", "The extension library snapshot could not be read."))
+        log.debug(_excp)
+        return None
+    if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION or not isinstance(data.get('libraries'), dict):
+        log.debug(translate("logs", "The extension library snapshot is out of date and will be ignored."))
+        return None
+    return data['libraries']
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+library_watcher
+
+Watches the extension libraries for extension archives being added, updated, or removed.
+
+Key componenets handled within:
+ * watching the user and global library directories for changes
+ * debouncing and coalescing bursts of file system events
+ * syncing only the changed archives into the installed extensions
+ * announcing the extensions that changed
+
+File system watchers report a change to a directory when a file within it is created, removed, or renamed. Extension archives should be updated by writing a new file and renaming it over the old one, which is how the client itself replaces archives. Archives that are re-written in place are picked up the next time anything else in their library changes.
+
+"""
+#Standard Library Imports
+import logging
+import os
+
+#PyQt imports
+from PyQt4 import QtCore
+
+class LibraryWatcher(QtCore.QObject):
+    """Keeps the installed extensions in sync with the archives in the user and global libraries.
+
+    Every change to a library restarts a single shot timer. Once a library has been left alone for the watcher's delay, all libraries that changed are synced with ExtensionManager.refresh_library, which only re-reads the archives that changed.
+    """
+
+    #(added, changed, removed) lists of extension names
+    extensions_updated = QtCore.pyqtSignal(list, list, list)
+    extensions_added = QtCore.pyqtSignal(list)
+    extensions_changed = QtCore.pyqtSignal(list)
+    extensions_removed = QtCore.pyqtSignal(list)
+
+    def __init__(self, manager, delay=500, parent=None):
+        """
+        Args:
+          manager (ExtensionManager): The extension manager whose libraries are watched.
+          delay (int): The number of milliseconds a library must be left unchanged before it is synced.
+          parent (QObject): The parent of the watcher.
+        """
+        super().__init__(parent)
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.manager = manager
+        #directory path -> extension type
+        self.watched = {}
+        #extension types with changes that have not been synced yet
+        self.pending = set()
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.queue_directory)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.sync)
+
+    def start(self, ext_types=("user", "global")):
+        """Starts watching libraries.
+
+        Args:
+          ext_types (tuple): The extension types [global or user] of the libraries to watch.
+        """
+        for ext_type in ext_types:
+            self.watch_library(ext_type)
+
+    def stop(self):
+        """Stops watching all libraries and discards any changes that have not been synced."""
+        self.timer.stop()
+        if self.watched:
+            self.watcher.removePaths(list(self.watched.keys()))
+        self.watched.clear()
+        self.pending.clear()
+
+    def watch_library(self, ext_type):
+        """Watches a library directory and the directories directly below it.
+
+        Extension archives can be up to one level below a library directory. Directories that are already watched are skipped, so this can be called again to pick up new sub-directories.
+
+        Args:
+          ext_type (string): The extension type [global or user] of the library.
+        """
+        try:
+            library = os.path.abspath(str(self.manager.libraries[ext_type]))
+        except KeyError:
+            self.log.debug(self.translate("logs", "No directory is set for the {0} library. It will not be watched.".format(ext_type)))
+            return
+        if not os.path.isdir(library):
+            self.log.debug(self.translate("logs", "The {0} library at {1} does not exist. It will not be watched.".format(ext_type, library)))
+            return
+        directories = [library]
+        for name in os.listdir(library):
+            if os.path.isdir(os.path.join(library, name)):
+                directories.append(os.path.join(library, name))
+        for directory in directories:
+            if directory in self.watched:
+                continue
+            if self.watcher.addPath(directory) is False:
+                self.log.warning(self.translate("logs", "Could not watch {0} for extension changes.".format(directory)))
+                continue
+            self.watched[directory] = ext_type
+        self.log.debug(self.translate("logs", "Watching the {0} library at {1}.".format(ext_type, library)))
+
+    def queue_directory(self, directory):
+        """Marks the library containing a changed directory as needing a sync and (re)starts the delay before syncing.
+
+        Args:
+          directory (string): The path of a watched directory that changed.
+        """
+        ext_type = self.watched.get(os.path.abspath(str(directory)))
+        if ext_type is None:
+            return
+        self.pending.add(ext_type)
+        self.timer.start()
+
+    def sync(self):
+        """Syncs every library with pending changes and announces the extensions that changed.
+
+        Returns:
+          A tuple of lists of the names (strings) of extensions that were installed, updated, and removed.
+        """
+        pending = sorted(self.pending)
+        self.pending.clear()
+        added, changed, removed = [], [], []
+        for ext_type in pending:
+            result = self.manager.refresh_library(ext_type)
+            added.extend(result[0])
+            changed.extend(result[1])
+            removed.extend(result[2])
+            #Forget directories that were removed and watch any that were created.
+            missing = [path for path, type_ in self.watched.items() if type_ == ext_type and not os.path.isdir(path)]
+            if missing:
+                self.watcher.removePaths(missing)
+                for directory in missing:
+                    del self.watched[directory]
+            self.watch_library(ext_type)
+        if added or changed or removed:
+            self.log.info(self.translate("logs", "Extension libraries changed: {0} installed, {1} updated, {2} removed.".format(len(added), len(changed), len(removed))))
+            if added:
+                self.extensions_added.emit(added)
+            if changed:
+                self.extensions_changed.emit(changed)
+            if removed:
+                self.extensions_removed.emit(removed)
+            self.extensions_updated.emit(added, changed, removed)
+        return (added, changed, removed)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+module_cache
+
+A least-recently-used cache of the user interface modules loaded from extension archives.
+
+Key componenets handled within:
+ * re-using zipimporters and loaded user interface modules between viewport changes
+ * evicting the least recently used modules when the cache is full
+ * invalidating the modules of an extension when its archive changes
+
+"""
+#Standard Library Imports
+import logging
+import zipimport
+from collections import OrderedDict
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import fs_utils
+
+class ModuleCache(object):
+    """Caches loaded user interface modules keyed by (extension, gui type).
+
+    Each cached module remembers the signature (modification time and size) and content hash of the archive it was loaded from. A module whose archive has a new signature, but the same content hash, is still served. A module whose archive contents have changed is dropped along with every other module and the importer of that extension.
+    """
+
+    def __init__(self, max_size=8):
+        """
+        Args:
+          max_size (int): The maximum number of user interface modules to keep loaded.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.max_size = max(int(max_size), 1)
+        #(extension, gui) -> {'module', 'archive', 'signature', 'hash'}
+        self.modules = OrderedDict()
+        #extension -> {'importer', 'archive', 'signature', 'hash'}
+        self.importers = {}
+
+    def __len__(self):
+        return len(self.modules)
+
+    def __contains__(self, key):
+        return key in self.modules
+
+    def get(self, extension, gui):
+        """Returns a cached user interface module if its archive has not changed.
+
+        Args:
+          extension (string): The name of the extension.
+          gui (string): The user interface type (settings, main, or toolbar)
+
+        Returns:
+          The cached module or None if it is not cached or its archive has changed.
+        """
+        record = self.modules.get((extension, gui))
+        if record is None:
+            return None
+        if not self.is_current(record):
+            self.log.debug(self.translate("logs", "The archive of extension {0} has changed. Its cached modules will be reloaded.".format(extension)))
+            self.invalidate(extension)
+            return None
+        self.modules.move_to_end((extension, gui))
+        return record['module']
+
+    def put(self, extension, gui, module):
+        """Adds a user interface module to the cache, evicting the least recently used module if the cache is full.
+
+        The importer of the extension must have been retrieved with get_importer first.
+
+        Args:
+          extension (string): The name of the extension.
+          gui (string): The user interface type (settings, main, or toolbar)
+          module (module): The loaded user interface module.
+        """
+        source = self.importers[extension]
+        self.modules[(extension, gui)] = {'module':module,
+                                          'archive':source['archive'],
+                                          'signature':source['signature'],
+                                          'hash':source['hash']}
+        self.modules.move_to_end((extension, gui))
+        while len(self.modules) > self.max_size:
+            (evicted, evicted_gui), _ = self.modules.popitem(last=False)
+            self.log.debug(self.translate("logs", "Evicted the {0} user interface of extension {1} from the module cache.".format(evicted_gui, evicted)))
+            if not any(name == evicted for name, _ in self.modules):
+                self.importers.pop(evicted, None)
+
+    def get_importer(self, extension, archive, content_hash=None, factory=None):
+        """Returns the importer for an extension archive, creating it if it is not cached or the archive has changed.
+
+        Args:
+          extension (string): The name of the extension.
+          archive (string): The path to the extension archive.
+          content_hash (string): The sha256 hash of the archive, if known. When provided, touching an archive without changing its contents does not invalidate its modules.
+          factory (callable): Creates the importer from the archive path. Defaults to zipimport.zipimporter. The importer must have a load_module method.
+
+        Returns:
+          An importer for the archive.
+
+        Raises:
+          zipimport.ZipImportError: If the archive cannot be imported from.
+          OSError: If the archive cannot be accessed.
+        """
+        source = self.importers.get(extension)
+        if source is not None and source['archive'] == archive and self.is_current(source):
+            return source['importer']
+        if source is not None:
+            self.invalidate(extension)
+        signature = fs_utils.file_signature(archive)
+        importer = (factory or zipimport.zipimporter)(archive)
+        self.importers[extension] = {'importer':importer,
+                                     'archive':archive,
+                                     'signature':signature,
+                                     'hash':content_hash}
+        return importer
+
+    def is_current(self, record):
+        """Checks that the archive a record was created from has not changed.
+
+        Args:
+          record (dictionary): A cached module or importer record.
+
+        Returns:
+          bool: True if the archive's signature, or its contents, are unchanged.
+        """
+        try:
+            signature = fs_utils.file_signature(record['archive'])
+        except OSError:
+            return False
+        if signature == record['signature']:
+            return True
+        if not record['hash']:
+            return False
+        #Touched, but possibly unchanged. Compare the contents before throwing modules away.
+        try:
+            if fs_utils.file_hash(record['archive']) != record['hash']:
+                return False
+        except OSError:
+            return False
+        record['signature'] = signature
+        return True
+
+    def invalidate(self, extension):
+        """Drops all cached modules and the importer of an extension.
+
+        Args:
+          extension (string): The name of the extension.
+
+        Returns:
+          A list of the modules (module) that were dropped.
+        """
+        dropped = [key for key in self.modules if key[0] == extension]
+        modules = [self.modules.pop(key)['module'] for key in dropped]
+        source = self.importers.pop(extension, None)
+        if source is not None:
+            #zipimport keeps the archive's directory in a module wide cache which would otherwise go stale.
+            directory_cache = getattr(zipimport, "_zip_directory_cache", {})
+            directory_cache.pop(source['archive'], None)
+        return modules
+
+    def clear(self):
+        """Drops every cached module and importer."""
+        for extension in list(self.importers):
+            self.invalidate(extension)
+        self.modules.clear()
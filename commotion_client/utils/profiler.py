@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+profiler
+
+Per-extension timings of the stages of discovering, validating, installing, and loading extensions.
+
+Key componenets handled within:
+ * timing each loading stage of each extension
+ * reporting the slowest extensions and stages
+ * dumping timings to a file for comparison between runs
+
+All extension code shares the load_profiler instance so that timings from the extension manager, validators, and main window end up in a single report.
+
+e.g:
+  with profiler.load_profiler.timer("unit_test_mock", "load_config"):
+      config = config_manager.load(path)
+  profiler.load_profiler.log_report()
+
+"""
+#Standard Library Imports
+import logging
+import os
+import json
+import time
+import threading
+import contextlib
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import fs_utils
+
+class LoadProfiler(object):
+    """Collects how long each loading stage takes for each extension.
+
+    Each (extension, stage) pair keeps the number of times it was timed, the total time taken, and the longest single time. Timings can be recorded from multiple threads.
+    """
+
+    def __init__(self, enabled=True):
+        """
+        Args:
+          enabled (bool): Record timings. A disabled profiler's timers do nothing.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.enabled = enabled
+        #extension -> stage -> [calls, total seconds, longest seconds]
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def timer(self, extension, stage):
+        """Times the block it wraps as a stage of loading an extension.
+
+        Args:
+          extension (string): The name of the extension.
+          stage (string): The loading stage. e.g. "load_config"
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(extension, stage, time.perf_counter() - start)
+
+    def record(self, extension, stage, seconds):
+        """Adds a timing to an extension's loading stage.
+
+        Args:
+          extension (string): The name of the extension.
+          stage (string): The loading stage.
+          seconds (float): The time the stage took.
+        """
+        with self._lock:
+            timing = self.timings.setdefault(str(extension), {}).setdefault(stage, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def reset(self):
+        """Discards all timings."""
+        with self._lock:
+            self.timings = {}
+
+    def get_report(self, extension=None):
+        """Returns the timings of every stage, slowest first.
+
+        Args:
+          extension (string): Only report the stages of this extension.
+
+        Returns:
+          A list of dictionaries sorted by total time.
+            [{'extension':'unit_test_mock', 'stage':'load_config', 'calls':1, 'total':0.0042, 'longest':0.0042}, ...]
+        """
+        with self._lock:
+            report = [{'extension':name, 'stage':stage, 'calls':timing[0], 'total':timing[1], 'longest':timing[2]}
+                      for name, stages in self.timings.items() if extension is None or name == extension
+                      for stage, timing in stages.items()]
+        return sorted(report, key=lambda row: (-row['total'], row['extension'], row['stage']))
+
+    def get_totals(self):
+        """Returns the total time spent loading each extension, slowest first.
+
+        Returns:
+          A list of (extension name, total seconds) tuples.
+            [('unit_test_mock', 0.0123), ('other_extension', 0.0021)]
+        """
+        with self._lock:
+            totals = [(name, sum(timing[1] for timing in stages.values())) for name, stages in self.timings.items()]
+        return sorted(totals, key=lambda total: (-total[1], total[0]))
+
+    def log_report(self, limit=20, level=logging.DEBUG):
+        """Logs the slowest extensions and stages.
+
+        Args:
+          limit (int): The maximum number of extensions and stages to log.
+          level (int): The logging level to log the report at.
+        """
+        if not self.log.isEnabledFor(level):
+            return
+        totals = self.get_totals()
+        if not totals:
+            return
+        self.log.log(level, self.translate("logs", "Slowest extensions to load:"))
+        for name, total in totals[:limit]:
+            self.log.log(level, self.translate("logs", "  {0}: {1:.2f} ms".format(name, total * 1000)))
+        self.log.log(level, self.translate("logs", "Slowest extension loading stages:"))
+        for row in self.get_report()[:limit]:
+            self.log.log(level, self.translate("logs", "  {0} {1}: {2:.2f} ms over {3} calls (longest {4:.2f} ms)".format(row['extension'], row['stage'], row['total'] * 1000, row['calls'], row['longest'] * 1000)))
+
+    def dump(self, path=None):
+        """Writes all timings to a JSON file.
+
+        Args:
+          path (string): The file to write. Defaults to "extension_profile.json" within the users cache directory.
+
+        Returns:
+          The path (string) of the file written.
+
+        Raises:
+          IOError: If the file could not be written.
+        """
+        if not path:
+            path = os.path.join(fs_utils.get_cache_dir(), "extension_profile.json")
+        data = {'created':time.time(),
+                'totals':self.get_totals(),
+                'stages':self.get_report()}
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, mode='w', encoding="utf-8") as profile_file:
+                json.dump(data, profile_file, indent=2)
+            os.replace(temp_path, path)
+        except OSError as _excp:
+            _error = self.translate("logs", "Could not write the extension load profile to {0}.".format(path))
+            self.log.warning(_error)
+            self.log.debug(_excp)
+            raise IOError(_error)
+        self.log.info(self.translate("logs", "Wrote the extension load profile to {0}.".format(path)))
+        return path
+
+#The profiler shared by all extension loading code.
+load_profiler = LoadProfiler()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+quarantine
+
+A persistent list of extension archives that failed to load, so that they are not opened, parsed, and validated again on every start.
+
+Key componenets handled within:
+ * recording the content hash, location, and reason for each archive that failed
+ * skipping a quarantined archive with a single stat until its contents change
+ * listing and releasing quarantined archives
+
+Entries are keyed by the sha256 hash of the archive's contents. Each entry also records every library path the archive failed at along with the file's modification time and size there. An archive is skipped only at a path it failed at, because some failures, such as an archive whose file name does not match its extension name, depend on where the archive is. Replacing an archive with different contents releases it automatically.
+
+The quarantine is stored in the users cache directory.
+
+"""
+#Standard Library Imports
+import logging
+import os
+import json
+import time
+import threading
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#Commotion Client Imports
+from commotion_client.utils import fs_utils
+
+class Quarantine(object):
+    """The persistent quarantine of extension archives that could not be loaded."""
+
+    #Increment when the format of an entry changes so that old quarantines are discarded.
+    version = 1
+
+    def __init__(self, path=None):
+        """
+        Args:
+          path (string): The path of the quarantine file. Defaults to a file within the users cache directory.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.path = path if path else os.path.join(fs_utils.get_cache_dir(), "extension_quarantine.json")
+        #content hash -> {'reason', 'errors', 'time', 'paths':{absolute path:signature}}
+        self.entries = {}
+        #absolute path -> content hash
+        self.locations = {}
+        self.dirty = False
+        #Archives within a library can be scanned from multiple threads.
+        self._lock = threading.RLock()
+        self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        """Loads the quarantine file from disk.
+
+        A missing, unreadable, or outdated quarantine file results in an empty quarantine.
+        """
+        with self._lock:
+            self.entries = {}
+            self.locations = {}
+            self.dirty = False
+            try:
+                with open(self.path, mode='r', encoding="utf-8") as quarantine_file:
+                    data = json.load(quarantine_file)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError) as _excp:
+                self.log.warning(self.translate("logs", "The extension quarantine at {0} could not be read. Archives that failed before will be tried again.".format(self.path)))
+                self.log.debug(_excp)
+                return
+            if not isinstance(data, dict) or data.get('version') != self.version:
+                return
+            self.entries = data.get('entries', {})
+            for content_hash, entry in self.entries.items():
+                for path in entry['paths']:
+                    self.locations[path] = content_hash
+
+    def save(self):
+        """Writes the quarantine to disk if it has changed.
+
+        Returns:
+          bool: True if the quarantine is saved or unchanged, False if it could not be written.
+        """
+        with self._lock:
+            if not self.dirty:
+                return True
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, mode='w', encoding="utf-8") as quarantine_file:
+                    json.dump({'version':self.version, 'entries':self.entries}, quarantine_file)
+                os.replace(temp_path, self.path)
+            except OSError as _excp:
+                self.log.warning(self.translate("logs", "The extension quarantine at {0} could not be saved.".format(self.path)))
+                self.log.debug(_excp)
+                return False
+            self.dirty = False
+            return True
+
+    def add(self, path, reason, errors=None, content_hash=None):
+        """Quarantines an archive at a path.
+
+        Args:
+          path (string): The path to the extension archive that failed.
+          reason (string): Why the archive failed.
+          errors (list): The names of any config values that failed validation.
+          content_hash (string): The sha256 hash of the archive if it has already been calculated.
+
+        Returns:
+          The content hash (string) of the quarantined archive, or None if the archive could not be read.
+        """
+        path = os.path.abspath(str(path))
+        try:
+            signature = fs_utils.file_signature(path)
+            if not content_hash:
+                content_hash = fs_utils.file_hash(path)
+        except OSError as _excp:
+            self.log.debug(self.translate("logs", "Could not quarantine extension archive {0}.".format(path)))
+            self.log.debug(_excp)
+            return None
+        with self._lock:
+            self.forget_location(path)
+            entry = self.entries.setdefault(content_hash, {'paths':{}})
+            entry['reason'] = reason
+            entry['errors'] = list(errors) if errors else []
+            entry['time'] = time.time()
+            entry['paths'][path] = signature
+            self.locations[path] = content_hash
+            self.dirty = True
+        self.log.warning(self.translate("logs", "Quarantined extension archive {0}: {1} It will be skipped until it changes.".format(path, reason)))
+        return content_hash
+
+    def check(self, path):
+        """Returns the quarantine entry of an archive if it failed at this path and has not changed since.
+
+        An archive whose modification time and size are unchanged is matched with a single stat. An archive that was touched is hashed once to see if its contents changed.
+
+        Args:
+          path (string): The path to an extension archive.
+
+        Returns:
+          The entry (dictionary) of the quarantined archive, including its 'hash', or None if it is not quarantined.
+        """
+        path = os.path.abspath(str(path))
+        with self._lock:
+            content_hash = self.locations.get(path)
+            if content_hash is None:
+                return None
+            entry = self.entries[content_hash]
+            try:
+                signature = fs_utils.file_signature(path)
+                if signature != entry['paths'][path]:
+                    if fs_utils.file_hash(path) != content_hash:
+                        #The archive was replaced. Give it another try.
+                        self.forget_location(path)
+                        return None
+                    entry['paths'][path] = signature
+                    self.dirty = True
+            except OSError:
+                self.forget_location(path)
+                return None
+            return dict(entry, hash=content_hash)
+
+    def forget_location(self, path):
+        """Stops skipping the archive recorded at a path. Entries left without any paths are removed."""
+        with self._lock:
+            content_hash = self.locations.pop(path, None)
+            if content_hash is None:
+                return
+            entry = self.entries[content_hash]
+            entry['paths'].pop(path, None)
+            if not entry['paths']:
+                del self.entries[content_hash]
+            self.dirty = True
+
+    def get_entries(self):
+        """Lists every quarantined archive.
+
+        Returns:
+          A list of entries (dictionaries), most recently quarantined first. Each has the archive's 'hash', the 'reason' it failed, any validation 'errors', the 'time' it was quarantined, and the 'paths' it failed at.
+        """
+        with self._lock:
+            entries = [dict(entry, hash=content_hash, paths=sorted(entry['paths'])) for content_hash, entry in self.entries.items()]
+        return sorted(entries, key=lambda entry: entry['time'], reverse=True)
+
+    def release(self, content_hash=None):
+        """Removes archives from the quarantine so that they are loaded again.
+
+        Args:
+          content_hash (string): The hash, or a unique prefix of the hash, of the archive to release. Defaults to every archive.
+
+        Returns:
+          A list of the hashes (strings) of the archives that were released.
+
+        Raises:
+          KeyError: If the hash does not match exactly one quarantined archive.
+        """
+        with self._lock:
+            if content_hash is None:
+                released = list(self.entries)
+            else:
+                released = [known for known in self.entries if known.startswith(content_hash)]
+                if len(released) != 1:
+                    raise KeyError(self.translate("logs", "{0} does not match exactly one quarantined extension archive.".format(content_hash)))
+            for known in released:
+                for path in self.entries.pop(known)['paths']:
+                    self.locations.pop(path, None)
+            if released:
+                self.dirty = True
+        self.log.info(self.translate("logs", "Released {0} extension archives from the quarantine.".format(len(released))))
+        return released
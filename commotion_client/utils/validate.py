@@ -17,21 +17,306 @@ import sys
 import re
 import ipaddress
 import os
+import json
+import hashlib
+import threading
 import zipfile
+from collections import OrderedDict
+from collections import namedtuple
 
 #PyQt imports
 from PyQt4 import QtCore
 
 #Commotion Client Imports
 from commotion_client.utils import fs_utils
+from commotion_client.utils import zip_catalog
+from commotion_client.utils import profiler
+
+#Characters that cannot be used within file names on each platform.
+RESERVED_CHARACTERS = {"cygwin" : re.compile(r'[|\\?*<":>+\[\]/\x00-\x1f]'),
+                       "win32" : re.compile(r'[|\\?*<":>+\[\]/\x00-\x1f]'),
+                       "darwin" : re.compile(r"[:/\x00]"),
+                       "linux" : re.compile(r"[/\x00]")}
+
+#The extension config (.conf) format. Values are checked in this order.
+#  type: The check applied to the value [file_name, module, menu_text, menu_level, or flag]
+#  required: The config must contain the value.
+#  default: The value used when the config does not contain one.
+#  default_from: The key whose value is used when the config does not contain one.
+#  must_exist: The module file must exist within the extension's archive.
+CONFIG_SCHEMA = OrderedDict([
+    ("name", {"type":"file_name", "required":True}),
+    ("main", {"type":"module", "default":"main", "must_exist":True}),
+    ("settings", {"type":"module", "default_from":"main", "must_exist":True}),
+    ("toolbar", {"type":"module", "default_from":"main", "must_exist":True}),
+    ("parent", {"type":"menu_text", "default":"Extensions"}),
+    ("menu_item", {"type":"menu_text", "default_from":"name"}),
+    ("menu_level", {"type":"menu_level", "default":10}),
+    ("tests", {"type":"module", "default":"tests", "must_exist":False}),
+    ("initialized", {"type":"flag"}),
+])
+
+#The files a module named in a config may be packaged as. Extensions packaged as bytecode only have no .py files.
+MODULE_SUFFIXES = (".py", ".pyc")
+
+def module_exists(module, members):
+    """Checks if a module is packaged as source or bytecode within an extension.
+
+    Args:
+      module (string): The module name from a config. e.g. "main"
+      members: The names of the extension archive's members. Anything supporting ``in``.
+
+    Returns:
+      bool: True if the source or bytecode of the module is within the extension.
+    """
+    return any(str(module) + suffix in members for suffix in MODULE_SUFFIXES)
+
+#A single problem with an extension's config.
+ValidationError = namedtuple("ValidationError", ["key", "message"])
+#The outcome of validating one extension. errors is a list of ValidationError's.
+ValidationResult = namedtuple("ValidationResult", ["extension", "path", "valid", "errors"])
+
+def get_platform(platform=None):
+    """Returns the platform name used to look up platform specific rules (e.g. "linux" for "linux2")."""
+    platform = platform or sys.platform
+    if platform.startswith("linux"):
+        return "linux"
+    return platform
+
+class LibraryValidator(object):
+    """Validates extension configs against a declarative schema.
+
+    The schema is compiled into a list of checks when the validator is created, so a single validator can check a whole library of configs without any per-extension set up. Every value of every config is checked and all problems are reported.
+
+    e.g:
+      validator = LibraryValidator()
+      for result in validator.validate_library([(path, config, catalog.entries)]):
+          if not result.valid:
+              print(result.extension, [error.key for error in result.errors])
+    """
+
+    def __init__(self, schema=None, platform=None, profiler=None):
+        """
+        Args:
+          schema (OrderedDict): The config format to validate against. Defaults to CONFIG_SCHEMA.
+          platform (string): The platform whose file name rules apply. Defaults to the current platform.
+          profiler (LoadProfiler): If provided, each value check is timed as a "validate_<key>" stage.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.schema = schema if schema is not None else CONFIG_SCHEMA
+        self.platform = get_platform(platform)
+        self.reserved = RESERVED_CHARACTERS.get(self.platform)
+        if self.reserved is None:
+            self.log.warning(self.translate("logs", "Your system, {0} is not recognized. This may cause instability if file uses chars that your system does not allow.").format(self.platform))
+        self.profiler = profiler
+        #The schema compiled into (key, spec, check) tuples.
+        self.checks = self.compile(self.schema)
+
+    def compile(self, schema):
+        """Compiles a schema into the list of checks run on each config."""
+        check_types = {"file_name":self.check_file_name,
+                       "module":self.check_module,
+                       "menu_text":self.check_menu_text,
+                       "menu_level":self.check_menu_level,
+                       "flag":None}
+        checks = []
+        for key, spec in schema.items():
+            try:
+                checks.append((key, spec, check_types[spec["type"]]))
+            except KeyError:
+                raise ValueError(self.translate("logs", "The config schema value {0} has an unknown type.".format(key)))
+        return checks
+
+    def validate(self, config, members=None, path=None):
+        """Validates a single extension config.
+
+        Args:
+          config (dictionary): The config for the extension.
+          members (dictionary or set): The names of the files within the extension's archive. If not provided the existence of files is not checked.
+          path (string): The path to the extension's archive. Only used in the result.
+
+        Returns:
+          A ValidationResult listing every problem found.
+        """
+        if not isinstance(config, dict):
+            return ValidationResult(None, path, False, [ValidationError("config", "The config is not a set of key value pairs.")])
+        extension = config.get("name")
+        errors = [ValidationError(key, "{0} is not a valid config value.".format(key)) for key in config if key not in self.schema]
+        values = {}
+        for key, spec, check in self.checks:
+            if key in config:
+                value = config[key]
+            elif spec.get("required"):
+                errors.append(ValidationError(key, "The config must contain a {0} value.".format(key)))
+                continue
+            elif "default_from" in spec:
+                value = values.get(spec["default_from"])
+            else:
+                value = spec.get("default")
+            values[key] = value
+            if check is None or value is None:
+                continue
+            if self.profiler is not None:
+                with self.profiler.timer(extension, "validate_{0}".format(key)):
+                    message = check(value, spec, members)
+            else:
+                message = check(value, spec, members)
+            if message:
+                errors.append(ValidationError(key, message))
+        return ValidationResult(extension, path, not errors, errors)
+
+    def validate_library(self, archives):
+        """Validates many extension configs in one pass.
+
+        Args:
+          archives (iterable): (path, config, members) tuples for each extension. See validate.
+
+        Returns:
+          A list of ValidationResult's in the order the archives were given.
+        """
+        results = [self.validate(config, members, path) for path, config, members in archives]
+        invalid = len([result for result in results if not result.valid])
+        self.log.debug(self.translate("logs", "Validated {0} extension configs. {1} were invalid.".format(len(results), invalid)))
+        return results
+
+    def check_file_name(self, value, spec=None, members=None):
+        """Returns why a value cannot be used as a file name on this platform, or None if it can."""
+        value = str(value)
+        if not value:
+            return "The value is empty."
+        if self.platform in ["win32", "cygwin"]:
+            if len(os.path.join(QtCore.QDir.currentPath(), "extensions", value)) > 255:
+                return "The full extension path cannot be greater than 260 chars."
+        elif len(value) >= 260:
+            return "File names can not be greater than 260 chars on your system."
+        if self.reserved is not None and self.reserved.search(value):
+            return "The value uses invalid characters for your system."
+        return None
+
+    def check_module(self, value, spec, members=None):
+        """Returns why a value cannot name a python module within the extension, or None if it can."""
+        file_name = str(value) + ".py"
+        message = self.check_file_name(file_name)
+        if message:
+            return message
+        if members is not None and spec.get("must_exist") and not module_exists(value, members):
+            return "The module {0} does not exist within the extension.".format(value)
+        return None
+
+    def check_menu_text(self, value, spec=None, members=None):
+        """Returns why a value cannot be used as menu text, or None if it can."""
+        if not 3 < len(str(value)) < 40:
+            return "Menu items must be between 3 and 40 chars long."
+        return None
+
+    def check_menu_level(self, value, spec=None, members=None):
+        """Returns why a value cannot be used as a menu level, or None if it can."""
+        try:
+            level = int(value)
+        except (TypeError, ValueError):
+            return "The menu_level is not a number."
+        if not 1 <= level <= 100:
+            return "The menu_level must be a number between 1 and 100."
+        return None
+
+#Compiled validators shared by every ClientConfig, keyed by platform.
+_validators = {}
+
+def get_validator(platform=None):
+    """Returns the shared LibraryValidator for a platform, compiling it on first use.
+
+    Args:
+      platform (string): The platform whose file name rules apply. Defaults to the current platform.
+    """
+    platform = get_platform(platform)
+    validator = _validators.get(platform)
+    if validator is None:
+        validator = _validators[platform] = LibraryValidator(platform=platform, profiler=profiler.load_profiler)
+    return validator
+
+class ValidationCache(object):
+    """The results of validating extension configs.
+
+    Results are keyed by a hash of the config's contents, the content hash of the extension's archive, and the platform, which together determine the outcome of ClientConfig.validate_all. Re-validating an unchanged extension is a single dictionary lookup.
+    """
+
+    def __init__(self, max_size=4096):
+        """
+        Args:
+          max_size (int): The maximum number of results to keep. The least recently used results are dropped first.
+        """
+        self.max_size = max(int(max_size), 1)
+        #(config hash, archive hash, platform) -> (valid, errors)
+        self.results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.results)
+
+    @staticmethod
+    def key(config, archive_hash=None, platform=None):
+        """Returns the cache key for validating a config against an archive.
+
+        Args:
+          config (dictionary): The config for the extension.
+          archive_hash (string): The sha256 hash of the extension archive, or None if the config is validated without its archive.
+          platform (string): The platform validated on. Defaults to the current platform.
+
+        Returns:
+          A (config hash, archive hash, platform) tuple.
+        """
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return (config_hash, archive_hash, platform or sys.platform)
+
+    def get(self, key):
+        """Returns a cached validation result.
+
+        Args:
+          key (tuple): A key from ValidationCache.key.
+
+        Returns:
+          A tuple of the validity (bool) and a list of the invalid config values, or None if the result is not cached.
+        """
+        with self._lock:
+            result = self.results.get(key)
+            if result is not None:
+                self.results.move_to_end(key)
+                return (result[0], list(result[1]))
+        return None
+
+    def put(self, key, valid, errors=None):
+        """Caches a validation result.
+
+        Args:
+          key (tuple): A key from ValidationCache.key.
+          valid (bool): If the config was valid.
+          errors (list): The config values that were invalid.
+        """
+        with self._lock:
+            self.results[key] = (bool(valid), list(errors or []))
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_size:
+                self.results.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self.results.clear()
+
+#The validation results shared by all ClientConfig validators.
+validation_cache = ValidationCache()
 
 class ClientConfig(object):
 
-    def __init__(self, config, directory=None):
+    def __init__(self, config, directory=None, catalog=None, archive_hash=None, cache=validation_cache):
         """
         Args:
           config (dictionary): The config for the extension.
           directory (string): Absolute Path to the directory containing the extension zipfile. If not specified the validator will ONLY check the validity of the config passed to it.
+          catalog (ZipCatalog): A catalog of the extension zipfile. If not specified the zipfile will be cataloged the first time a file is checked.
+          archive_hash (string): The sha256 hash of the extension zipfile. Results of validate_all are only cached when the archive's hash is known or there is no archive to check.
+          cache (ValidationCache): Where validate_all results are cached. None disables caching.
         """
         self.config_values = ["name",
                               "main",
@@ -45,6 +330,11 @@ class ClientConfig(object):
         self.log = logging.getLogger("commotion_client."+__name__)
         self.translate = QtCore.QCoreApplication.translate
         self.config = config
+        self._extension_path = None
+        self.catalog = catalog
+        self.archive_hash = archive_hash
+        self.cache = cache
+        self._valid_name = None
         if directory:
             #set extension directory to point at config zipfile in that directory
             self.extension_path = directory
@@ -64,6 +354,7 @@ class ClientConfig(object):
             if val not in self.config_values:
                 raise KeyError(self.translate("logs", "The config file specified has the value {0} within it which is not a valid value.".format(val)))
         self._config = value
+        self._valid_name = None
                                      
 
     @property
@@ -92,39 +383,47 @@ class ClientConfig(object):
     def validate_all(self):
         """Run all validation functions on an uncompressed extension.
         
+        The config is checked against CONFIG_SCHEMA by the shared LibraryValidator, which reports every invalid value.
+
         @brief Will set self.errors if any errors are found.
         @return bool True if valid, False if invalid. 
         """
         self.errors = None
         if not self.config:
             raise NameError(self.translate("logs", "ClientConfig validator requires at least a config has been specified"))            
+        cache_key = self.cache_key()
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.log.debug(self.translate("logs", "Validation of extension {0} served from the validation cache.".format(self.config['name'])))
+                self.errors = cached[1] or None
+                return cached[0]
+        members = None
+        if self.extension_path:
+            catalog = self.get_catalog()
+            members = catalog.entries if catalog is not None else {}
+        result = get_validator().validate(self.config, members, self.extension_path)
         errors = []
-        if not self.name():
-            errors.append("name")
-            self.log.info(self.translate("logs", "The name of extension {0} is invalid.".format(self.config['name'])))
-        if not self.tests():
-            errors.append("tests")
-            self.log.info(self.translate("logs", "The extension {0}'s tests is invalid.".format(self.config['name'])))
-        if not self.menu_level():
-            errors.append("menu_level")
-            self.log.info(self.translate("logs", "The extension {0}'s menu_level is invalid.".format(self.config['name'])))
-        if not self.menu_item():
-            errors.append("menu_item")
-            self.log.info(self.translate("logs", "The extension {0}'s menu_item is invalid.".format(self.config['name'])))
-        if not self.parent():
-            errors.append("parent")
-            self.log.info(self.translate("logs", "The extension {0}'s parent is invalid.".format(self.config['name'])))
-        else:
-            for gui_name in ['main', 'settings', 'toolbar']:
-                if not self.gui(gui_name):
-                    self.log.info(self.translate("logs", "The extension {0}'s {1} is invalid.".format(self.config['name'], gui_name)))
-                    errors.append(gui_name)
+        for error in result.errors:
+            self.log.info(self.translate("logs", "The extension {0}'s {1} is invalid. {2}".format(self.config['name'], error.key, error.message)))
+            if error.key not in errors:
+                errors.append(error.key)
+        if cache_key is not None:
+            self.cache.put(cache_key, not errors, errors)
         if errors:
             self.errors = errors
             return False
         else:
             return True
 
+    def cache_key(self):
+        """Returns the validation cache key of this validator, or None if its results cannot be cached."""
+        if self.cache is None:
+            return None
+        if self.extension_path and not self.archive_hash:
+            return None
+        return self.cache.key(self.config, self.archive_hash if self.extension_path else None)
+
 
     def gui(self, gui_name):
         """Validate of one of the gui objects config values. (main, settings, or toolbar)
@@ -145,17 +444,26 @@ class ClientConfig(object):
         if not self.check_path(file_name):
             self.log.warning(self.translate("logs", "The extensions {0} file name is invalid for this system.".format(gui_name)))
             return False
-        if not self.check_exists(file_name):
+        if not self.check_module_exists(val):
             self.log.warning(self.translate("logs", "The extensions {0} file does not exist.".format(gui_name)))
             return False
         return True
 
     def name(self):
+        #The name is checked by validate_all and again as the default menu_item.
+        if self._valid_name is None:
+            self._valid_name = self.check_name()
+        return self._valid_name
+
+    def check_name(self):
         try:
             name_val = str(self.config['name'])
         except KeyError:
             self.log.warning(self.translate("logs", "There is no name value in the config file. This value is required."))
             return False
+        if not name_val:
+            self.log.warning(self.translate("logs", "The name value in the config file is empty. This value is required."))
+            return False
         if not self.check_path_length(name_val):
             self.log.warning(self.translate("logs", "This value is too long for your system."))
             return False
@@ -201,7 +509,7 @@ class ClientConfig(object):
         except ValueError:
             self.log.info(self.translate("logs", "The 'menu_level' value set in the config is not a number and is therefore invalid."))
             return False
-        if not 0 < val > 100:
+        if not 1 <= val <= 100:
             self.log.warning(self.translate("logs", "The menu_level is invalid. Choose a number between 1 and 100"))
             return False
         return True
@@ -216,7 +524,7 @@ class ClientConfig(object):
         if not self.check_path(file_name):
             self.log.warning(self.translate("logs", "The extensions 'tests' file name is invalid for this system."))
             return False
-        if not self.check_exists(file_name):
+        if not self.check_module_exists(val):
             self.log.info(self.translate("logs", "The extensions 'tests' file does not exist. But tests are not required. Shame on you though, SHAME!."))
         return True
         
@@ -240,14 +548,44 @@ class ClientConfig(object):
         if not self.extension_path:
             self.log.debug(self.translate("logs", "No extension directory was specified so file checking was skipped."))
             return True
-        ext_zip = zipfile.ZipFile(self.extension_path, 'r')
-        files = ext_zip.namelist()
-        if not str(file_name) in files:
+        catalog = self.get_catalog()
+        if catalog is None:
+            self.log.warning(self.translate("logs", "The extension {0} could not be read so the file '{1}' cannot exist.".format(self.extension_path, file_name)))
+            return False
+        if not catalog.contains(str(file_name)):
             self.log.warning(self.translate("logs", "The specified file '{0}' does not exist.".format(file_name)))
             return False
         else:
             return True
             
+    def check_module_exists(self, module):
+        """Checks if a module exists within an extension as source or as bytecode.
+
+        @param module string The module name from a config file
+        """
+        if not self.extension_path:
+            return True
+        catalog = self.get_catalog()
+        if catalog is not None and module_exists(module, catalog.entries):
+            return True
+        return self.check_exists(str(module) + ".py")
+
+    def get_catalog(self):
+        """Returns the catalog of the extension zipfile, cataloging it on first use.
+
+        The members of archives with a manifest are taken from the manifest without reading the central directory.
+
+        Returns:
+          The ZipCatalog of the extension or None if the zipfile cannot be read.
+        """
+        if self.catalog is None and self.extension_path:
+            try:
+                self.catalog = zip_catalog.open_catalog(self.extension_path, preload=())
+            except (zipfile.BadZipFile, OSError) as _excp:
+                self.log.debug(_excp)
+                return None
+        return self.catalog
+
     def check_path(self, file_name):
         """Runs all path checking functions on a string.
 
@@ -266,14 +604,10 @@ class ClientConfig(object):
 
         @param file_name string The string to check for validity
         """
-        # file length limit
-        platform = sys.platform
-        reserved = {"cygwin" : r"[|\?*<\":>+[]/]",
-                    "win32" : r"[|\?*<\":>+[]/]",
-                    "darwin" : "[:]",
-                    "linux" : "[/\x00]"}
-        if platform and reserved[platform]:
-            if re.search(file_name, reserved[platform]):
+        platform = get_platform()
+        reserved = RESERVED_CHARACTERS.get(platform)
+        if reserved is not None:
+            if reserved.search(str(file_name)):
                 self.log.warning(self.translate("logs", "The extension's config file contains an invalid main value."))
                 return False
             else:
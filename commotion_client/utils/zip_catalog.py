@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+zip_catalog
+
+An in-memory catalog of the contents of an extension archive.
+
+Key componenets handled within:
+ * reading an archive's central directory (names, sizes, and CRCs) with a single open
+ * handing out member data on demand
+ * deterministically closing archive file handles
+ * reading the manifest written into extension archives when they are packaged
+
+Extension archives built by build/scripts/zip_extensions.py start with a manifest member holding the archive's config, the name, size, CRC, and sha256 hash of every other member, and the extension's entry points. The manifest is stored uncompressed as the first member of the archive so that it can be read with a single read at the start of the file, without reading the archive's central directory.
+
+"""
+#Standard Library Imports
+import logging
+import os
+import json
+import struct
+import zlib
+import zipfile
+from collections import OrderedDict
+
+#PyQt imports
+from PyQt4 import QtCore
+
+#The name of the manifest member of an extension archive. Keep in sync with build/scripts/zip_extensions.py
+MANIFEST_NAME = "commotion_manifest.json"
+#The manifest format version this client understands.
+MANIFEST_FORMAT = 1
+#The manifest is read in the first read of the archive, so it is only trusted while it is small.
+MANIFEST_MAX_SIZE = 1024 * 1024
+
+#signature, version, flags, compression, time, date, CRC, compressed size, size, name length, extra length
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+#general purpose flags for encrypted members and members whose sizes follow their data
+_UNREADABLE_FLAGS = 0x01 | 0x08
+
+def read_manifest(path):
+    """Reads the manifest from the start of an extension archive.
+
+    Args:
+      path (string): The path to a zip archive.
+
+    Returns:
+      The manifest (dictionary) or None if the archive does not start with a readable manifest.
+
+    Raises:
+      OSError: If the file cannot be opened.
+    """
+    with open(str(path), 'rb') as archive:
+        header = archive.read(_LOCAL_HEADER.size + len(MANIFEST_NAME))
+        if len(header) < _LOCAL_HEADER.size + len(MANIFEST_NAME):
+            return None
+        signature, _, flags, compression, _, _, crc, compressed_size, size, name_length, extra_length = _LOCAL_HEADER.unpack_from(header)
+        if (signature != _LOCAL_HEADER_SIGNATURE or flags & _UNREADABLE_FLAGS or
+                compression != zipfile.ZIP_STORED or compressed_size != size or size > MANIFEST_MAX_SIZE):
+            return None
+        if header[_LOCAL_HEADER.size:] != MANIFEST_NAME.encode('utf-8') or name_length != len(MANIFEST_NAME):
+            return None
+        archive.seek(extra_length, os.SEEK_CUR)
+        data = archive.read(size)
+    if len(data) != size or zlib.crc32(data) & 0xffffffff != crc:
+        return None
+    try:
+        manifest = json.loads(data.decode('utf-8'))
+    except ValueError:
+        return None
+    if not is_manifest(manifest):
+        return None
+    return manifest
+
+def is_manifest(manifest):
+    """Checks that a decoded manifest is in a format this client understands.
+
+    Args:
+      manifest: The decoded contents of a manifest member.
+
+    Returns:
+      bool: True if the manifest can be trusted in place of the archive's central directory and config.
+    """
+    return (isinstance(manifest, dict) and
+            manifest.get("format") == MANIFEST_FORMAT and
+            isinstance(manifest.get("config"), dict) and
+            isinstance(manifest.get("files"), dict))
+
+def open_catalog(path, preload=(".conf",)):
+    """Catalogs an archive from its manifest, falling back to reading its central directory.
+
+    Args:
+      path (string): The path to a zip archive.
+      preload (tuple): Suffixes of members to preload when the archive has no manifest.
+
+    Returns:
+      A ZipCatalog of the archive.
+
+    Raises:
+      zipfile.BadZipFile: If the file is not a zip archive.
+      OSError: If the file cannot be opened.
+    """
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return ZipCatalog(path, manifest=manifest)
+    return ZipCatalog(path, preload)
+
+class ZipCatalog(object):
+    """The central directory of a zip archive held in memory.
+
+    The archive is opened once, when the catalog is created, to read its central directory and any members matching the preload suffixes. The file handle is closed before the constructor returns. Members that were not preloaded are read on demand. Reads made within a ``with`` block share one file handle, which is closed when the block exits.
+
+    e.g:
+      catalog = ZipCatalog("path/to/extension")
+      if catalog.contains("main.py"):
+          with catalog:
+              main = catalog.read("main.py")
+              toolbar = catalog.read("test_bar.py")
+    """
+
+    def __init__(self, path, preload=(".conf",), entries=None, manifest=None):
+        """
+        Args:
+          path (string): The path to a zip archive.
+          preload (tuple): Suffixes of members whose data should be read while the archive is open.
+          entries (dictionary): A central directory that has already been read, keyed by member name, with [file_size, compress_size, CRC] values. When provided the archive is not opened.
+          manifest (dictionary): The archive's manifest, already read with read_manifest. When provided the archive is not opened and the members are taken from the manifest. Compressed sizes are not recorded in manifests and are None.
+
+        Raises:
+          zipfile.BadZipFile: If the file is not a zip archive.
+          OSError: If the file cannot be opened.
+        """
+        self.log = logging.getLogger("commotion_client."+__name__)
+        self.translate = QtCore.QCoreApplication.translate
+        self.path = os.path.abspath(str(path))
+        self.entries = OrderedDict()
+        self._data = {}
+        self._zip = None
+        self.manifest = None
+        if manifest is not None:
+            self.set_manifest(manifest)
+            return
+        if entries is not None:
+            for name, info in entries.items():
+                self.entries[name] = list(info)
+            return
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            for info in archive.infolist():
+                self.entries[info.filename] = [info.file_size, info.compress_size, info.CRC]
+                if preload and info.filename.endswith(tuple(preload)):
+                    self._data[info.filename] = archive.read(info)
+            if MANIFEST_NAME in self.entries:
+                self.load_manifest(archive.read(MANIFEST_NAME))
+        self.log.debug(self.translate("logs", "Cataloged {0} members of archive {1}.".format(len(self.entries), self.path)))
+
+    def set_manifest(self, manifest):
+        """Takes the catalog's members from an archive's manifest.
+
+        Args:
+          manifest (dictionary): A manifest that passes is_manifest.
+        """
+        self.manifest = manifest
+        self.entries[MANIFEST_NAME] = [None, None, None]
+        for name, info in manifest["files"].items():
+            self.entries[name] = [info.get("size"), None, info.get("crc")]
+
+    def load_manifest(self, data):
+        """Keeps the manifest of an archive that was cataloged from its central directory.
+
+        Args:
+          data (bytes): The contents of the manifest member.
+        """
+        try:
+            manifest = json.loads(data.decode('utf-8'))
+        except ValueError:
+            manifest = None
+        if is_manifest(manifest):
+            self.manifest = manifest
+        else:
+            self.log.debug(self.translate("logs", "The manifest of archive {0} is not readable and will be ignored.".format(self.path)))
+
+    def verify_manifest(self):
+        """Checks that the archive's manifest agrees with its central directory and config file.
+
+        Only catalogs read from the central directory can be verified. Catalogs created from a manifest take their members from it.
+
+        Returns:
+          bool: True if the manifest records every member with its size and CRC, and records the config file's contents. False if it does not or if the archive has no manifest.
+        """
+        if self.manifest is None:
+            return False
+        recorded = {}
+        for name, info in self.manifest["files"].items():
+            if not isinstance(info, dict):
+                return False
+            recorded[name] = [info.get("size"), info.get("crc")]
+        members = dict((name, [info[0], info[2]]) for name, info in self.entries.items() if name != MANIFEST_NAME)
+        if recorded != members:
+            return False
+        config_file = self.manifest.get("config_file")
+        if config_file not in members:
+            return False
+        try:
+            config = json.loads(self.read(config_file).decode('utf-8'))
+        except ValueError:
+            return False
+        return config == self.manifest["config"]
+
+    def get_config(self):
+        """Returns the config recorded in the archive's manifest.
+
+        Returns:
+          A copy of the config (dictionary) or None if the archive has no manifest.
+        """
+        if self.manifest is None:
+            return None
+        return json.loads(json.dumps(self.manifest["config"]))
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def open(self):
+        """Opens a file handle that is shared by all reads until the catalog is closed."""
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.path, 'r')
+
+    def close(self):
+        """Closes the catalog's file handle if one is open."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    @property
+    def closed(self):
+        """True if the catalog does not currently hold a file handle."""
+        return self._zip is None
+
+    def namelist(self):
+        """Returns a list of the names of all members of the archive."""
+        return list(self.entries.keys())
+
+    def contains(self, name):
+        """Checks if a member exists within the archive.
+
+        Args:
+          name (string): The name of a member.
+
+        Returns:
+          bool: True if the member exists, False if it does not.
+        """
+        return name in self.entries
+
+    def info(self, name):
+        """Returns the central directory record of a member.
+
+        Args:
+          name (string): The name of a member.
+
+        Returns:
+          A list containing the uncompressed size, compressed size, and CRC of the member.
+            [1024, 512, 2309474432]
+
+        Raises:
+          KeyError: If the member does not exist.
+        """
+        return self.entries[name]
+
+    def find(self, suffix):
+        """Returns the name of the last member whose name ends with a suffix.
+
+        The last member is used, in central directory order, so that archives with more than one config load the same config they always have.
+
+        Args:
+          suffix (string): A file name suffix. e.g. ".conf"
+
+        Returns:
+          The name (string) of the member or None if no member matches.
+        """
+        found = None
+        for name in self.entries:
+            if name.endswith(suffix):
+                found = name
+        return found
+
+    def read(self, name):
+        """Returns the data of a member.
+
+        Preloaded members are returned from memory. Other members are read from the catalog's open file handle, or from a file handle that is opened and closed for this read.
+
+        Args:
+          name (string): The name of a member.
+
+        Returns:
+          The (bytes) contents of the member.
+
+        Raises:
+          KeyError: If the member does not exist.
+        """
+        if name in self._data:
+            return self._data[name]
+        if name not in self.entries:
+            raise KeyError(self.translate("logs", "There is no member named {0} in the archive {1}.".format(name, self.path)))
+        if self._zip is not None:
+            return self._zip.read(name)
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            return archive.read(name)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+"""
+extension_manager_benchmark.py
+
+Times the ExtensionManager against synthetic extension libraries of increasing size.
+
+For each library size a set of zipped extensions with realistic configs is generated, packaged with build/scripts/zip_extensions.py, and split between the core and user libraries. The following are then timed:
+ * init_extension_libraries, from empty settings and caches (cold) and again with the library indexes in place (warm)
+ * init_extension_config, without and with the library indexes
+ * get_installed
+ * get_extension_from_property
+ * MenuBar.populate_menu
+ * load_user_interface, for the first import of an extension and from the module cache
+
+Results are written as JSON so that runs can be compared over time. Everything the benchmark writes (libraries, settings, and caches) is kept within its working directory, so the users own settings are never touched.
+
+This is not a unit test and is not found by tests/run_tests.py. Run it from the root of the repository. Qt needs a display; on a headless box run it under xvfb-run, or with QT_QPA_PLATFORM=offscreen where Qt supports it.
+
+e.g:
+  xvfb-run -a python3 tests/benchmarks/extension_manager_benchmark.py --sizes 10 100 --output benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import platform
+import argparse
+import tempfile
+
+#Qt builds with platform plugins can run without any display at all.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "build", "scripts"))
+
+SIZES = [10, 100, 1000, 5000]
+PARENTS = ["Extensions", "Networking", "Mesh Tools", "Security", "Diagnostics", "Applications", "Settings", "Advanced"]
+
+MAIN_MODULE = '''"""
+{name}
+
+A synthetic extension generated by the extension manager benchmark.
+"""
+from PyQt4 import QtCore
+from PyQt4 import QtGui
+
+import {name}_helpers as helpers
+
+class ViewPort(QtGui.QWidget):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values = helpers.defaults()
+
+class SettingsMenu(QtGui.QWidget):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+class ToolBar(QtGui.QWidget):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+'''
+
+HELPER_FUNCTION = '''
+def helper_{num}(value, scale={num}):
+    """Scales a value."""
+    results = []
+    for item in range(scale % 7 + 1):
+        if item % 2:
+            results.append(value * item)
+        else:
+            results.append(str(value) + str(item))
+    return results
+'''
+
+def get_args():
+    """Parses the benchmark options."""
+    parser = argparse.ArgumentParser(description="Benchmark the extension manager against synthetic extension libraries.")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=SIZES, help="The numbers of extensions to generate libraries of.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="The number of times each operation is timed.")
+    parser.add_argument("-o", "--output", help="The file to write the JSON results to. Printed if not provided.")
+    parser.add_argument("-w", "--workdir", help="The directory libraries, settings, and caches are created in. A temporary directory that is removed afterwards is used if not provided.")
+    parser.add_argument("-b", "--bytecode", default="source", choices=["source", "both", "bytecode"], help="What the synthetic extensions are packaged with. See build/scripts/zip_extensions.py")
+    parser.add_argument("--extract", action="store_true", help="Import user interfaces from the extraction cache instead of through zipimport.")
+    parser.add_argument("--ui-samples", type=int, default=20, help="The number of extensions load_user_interface is timed against.")
+    parser.add_argument("--seed", type=int, default=2014, help="The seed the synthetic configs are generated from.")
+    return parser.parse_args()
+
+def make_extension(directory, name, rand):
+    """Writes the source directory of a synthetic extension.
+
+    Args:
+      directory (string): The directory to create the extension within.
+      name (string): The name of the extension.
+      rand (random.Random): The source of the extension's config values.
+
+    Returns:
+      The path (string) of the extension's source directory.
+    """
+    source = os.path.join(directory, name)
+    os.makedirs(os.path.join(source, "ui"))
+    config = {"name":name,
+              "menu_item":"Synthetic {0}".format(name.split("_")[-1]),
+              "parent":rand.choice(PARENTS),
+              "menu_level":rand.randint(1, 100),
+              "main":"main",
+              "tests":"tests"}
+    if rand.random() < 0.5:
+        config["settings"] = "main"
+    if rand.random() < 0.3:
+        config["toolbar"] = "main"
+    files = {name + ".conf":json.dumps(config, indent=2),
+             "__init__.py":"",
+             "main.py":MAIN_MODULE.format(name=name),
+             name + "_helpers.py":"".join(HELPER_FUNCTION.format(num=num) for num in range(rand.randint(20, 80))) + "\ndef defaults():\n    return {}\n",
+             "tests.py":"import unittest\n",
+             os.path.join("ui", "__init__.py"):"",
+             os.path.join("ui", "main.ui"):"<ui version=\"4.0\">\n" + "  <widget/>\n" * rand.randint(50, 500) + "</ui>\n"}
+    for file_name, contents in files.items():
+        with open(os.path.join(source, file_name), mode='w', encoding="utf-8") as source_file:
+            source_file.write(contents)
+    return source
+
+def build_libraries(workdir, size, bytecode, seed):
+    """Generates and packages the synthetic libraries for one library size.
+
+    One in ten extensions is a core extension. The rest are user extensions.
+
+    Args:
+      workdir (string): The benchmark's working directory.
+      size (int): The number of extensions to generate.
+      bytecode (string): What the extensions are packaged with.
+      seed (int): The seed the configs are generated from.
+
+    Returns:
+      A dictionary of the library paths keyed by library type.
+    """
+    import zip_extensions
+    rand = random.Random(seed)
+    base = os.path.join(workdir, str(size))
+    libraries = {'core':os.path.join(base, "core"),
+                 'global':os.path.join(base, "global"),
+                 'user':os.path.join(base, "user")}
+    for path in libraries.values():
+        os.makedirs(path)
+    sources = os.path.join(base, "sources")
+    for num in range(size):
+        name = "synthetic_{0:05d}".format(num)
+        source = make_extension(sources, name, rand)
+        library = libraries['core'] if num % 10 == 0 else libraries['user']
+        zip_extensions.zip_extension(source, library, bytecode)
+    shutil.rmtree(sources)
+    return libraries
+
+def measure(operation, repeat, setup=None):
+    """Times an operation.
+
+    Args:
+      operation (callable): The operation to time.
+      repeat (int): The number of times to time it.
+      setup (callable): Called, untimed, before each run.
+
+    Returns:
+      A dictionary of timing statistics in seconds.
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        runs.append(time.perf_counter() - start)
+    #The statistics module is not available on Python 3.3.
+    ordered = sorted(runs)
+    middle = len(ordered) // 2
+    median = ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+    return {"runs":len(runs),
+            "min":ordered[0],
+            "median":median,
+            "mean":sum(runs) / len(runs),
+            "max":ordered[-1]}
+
+def benchmark_size(size, libraries, args):
+    """Times every operation against the libraries of one size.
+
+    Args:
+      size (int): The number of extensions in the libraries.
+      libraries (dictionary): The library paths keyed by library type.
+      args (Namespace): The benchmark options.
+
+    Returns:
+      A list of result dictionaries.
+    """
+    from PyQt4 import QtCore
+    from commotion_client.GUI.menu_bar import MenuBar
+    from commotion_client.utils import validate
+    from commotion_client.utils.extension_manager import ExtensionManager
+
+    cache = os.environ["XDG_CACHE_HOME"]
+    results = []
+    #load_user_interface adds each extension to sys.path.
+    saved_path = list(sys.path)
+
+    def record(operation, timing):
+        timing.update({"size":size, "operation":operation})
+        results.append(timing)
+        print("{0:>6} {1:<40} median {2:9.2f} ms".format(size, operation, timing["median"] * 1000), file=sys.stderr)
+
+    def new_manager():
+        #Large enough to hold every sampled user interface, so that cached loads are cache hits.
+        manager = ExtensionManager(ui_cache_size=max(args.ui_samples, 8), extract=args.extract)
+        manager.libraries = dict(libraries)
+        return manager
+
+    def reset_state():
+        #Empty settings, indexes, and caches, as on first boot.
+        manager = new_manager()
+        manager.user_settings.clear()
+        manager.user_settings.sync()
+        shutil.rmtree(cache, ignore_errors=True)
+        os.makedirs(cache)
+        validate.validation_cache.clear()
+        for path in os.listdir(libraries['global']):
+            os.remove(os.path.join(libraries['global'], path))
+
+    record("init_extension_libraries (cold)", measure(lambda: new_manager().init_extension_libraries(), args.repeat, reset_state))
+    record("init_extension_libraries (warm)", measure(lambda: new_manager().init_extension_libraries(), args.repeat))
+    manager = ExtensionManager(use_index=False)
+    manager.libraries = dict(libraries)
+    record("init_extension_config (no index)", measure(manager.init_extension_config, args.repeat))
+    manager = new_manager()
+    record("init_extension_config (indexed)", measure(manager.init_extension_config, args.repeat))
+
+    manager = new_manager()
+    manager.init_extension_libraries()
+    record("get_installed", measure(manager.get_installed, args.repeat))
+    record("get_extension_from_property", measure(lambda: [manager.get_extension_from_property("parent", parent) for parent in PARENTS], args.repeat))
+
+    menu = MenuBar(ext_mgr=manager)
+    manager.watcher.stop()
+
+    def clear_menu():
+        QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    record("MenuBar.populate_menu", measure(menu.populate_menu, args.repeat, clear_menu))
+
+    samples = sorted(manager.get_installed().keys())[:args.ui_samples]
+
+    def forget_interfaces():
+        manager.ui_cache.clear()
+        for name in ["main"] + [sample + "_helpers" for sample in samples]:
+            sys.modules.pop(name, None)
+        if manager.extracted is not None:
+            manager.extracted.clear()
+    record("load_user_interface (first import)", measure(lambda: [manager.load_user_interface(name, "main") for name in samples], args.repeat, forget_interfaces))
+    record("load_user_interface (cached)", measure(lambda: [manager.load_user_interface(name, "main") for name in samples], args.repeat))
+    menu.deleteLater()
+    clear_menu()
+    forget_interfaces()
+    sys.path[:] = saved_path
+    sys.path_importer_cache.clear()
+    return results
+
+def run(args):
+    """Builds the libraries and runs the benchmark for every size.
+
+    Returns:
+      The benchmark report (dictionary).
+    """
+    #Settings and caches are kept within the working directory.
+    os.environ["XDG_CACHE_HOME"] = os.path.join(args.workdir, "cache")
+    from PyQt4 import QtCore
+    from PyQt4 import QtGui
+    app = QtGui.QApplication(sys.argv)
+    app.setOrganizationName("CommotionBenchmark")
+    app.setApplicationName("extension_manager_benchmark")
+    QtCore.QSettings.setDefaultFormat(QtCore.QSettings.IniFormat)
+    QtCore.QSettings.setPath(QtCore.QSettings.IniFormat, QtCore.QSettings.UserScope, os.path.join(args.workdir, "settings"))
+    report = {"created":time.time(),
+              "python":platform.python_version(),
+              "platform":platform.platform(),
+              "qt":QtCore.QT_VERSION_STR,
+              "pyqt":QtCore.PYQT_VERSION_STR,
+              "options":{"repeat":args.repeat, "bytecode":args.bytecode, "extract":args.extract, "ui_samples":args.ui_samples, "seed":args.seed},
+              "results":[]}
+    for size in args.sizes:
+        start = time.perf_counter()
+        libraries = build_libraries(args.workdir, size, args.bytecode, args.seed)
+        print("{0:>6} extensions generated in {1:.1f} s".format(size, time.perf_counter() - start), file=sys.stderr)
+        report["results"].extend(benchmark_size(size, libraries, args))
+        shutil.rmtree(os.path.join(args.workdir, str(size)))
+    app.deleteLater()
+    return report
+
+def main():
+    args = get_args()
+    remove_workdir = args.workdir is None
+    if remove_workdir:
+        args.workdir = tempfile.mkdtemp(prefix="commotion_benchmark_")
+    else:
+        args.workdir = os.path.abspath(args.workdir)
+        os.makedirs(args.workdir, exist_ok=True)
+    try:
+        report = run(args)
+    finally:
+        if remove_workdir:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, mode='w', encoding="utf-8") as results:
+            results.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
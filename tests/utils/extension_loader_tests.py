@@ -0,0 +1,102 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/extension_loader.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import os
+import shutil
+
+from commotion_client.utils import extension_manager
+from commotion_client.utils import extension_loader
+
+class ExtensionLoaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.app.setOrganizationName("test_case");
+        self.app.setApplicationName("testing_app");
+        library = os.path.abspath("tests/temp/user_library")
+        os.makedirs(library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "unit_test_mock"))
+        self.ext_mgr = extension_manager.ExtensionManager(use_index=False)
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.libraries['global'] = os.path.abspath("tests/temp/global_library")
+        self.ext_mgr.libraries['core'] = os.path.abspath("tests/temp/pineapple/")
+        self.signals = {'progress':[], 'ready':[], 'updated':[], 'finished':[]}
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        self.ext_mgr.user_settings.clear()
+        self.ext_mgr = None
+        shutil.rmtree(os.path.abspath("tests/temp/user_library"), ignore_errors=True)
+        shutil.rmtree(os.path.abspath("tests/temp/global_library"), ignore_errors=True)
+
+    def run_loader(self, loader):
+        loader.library_progress.connect(lambda *args: self.signals['progress'].append(args))
+        loader.extension_ready.connect(lambda *args: self.signals['ready'].append(args))
+        loader.extensions_updated.connect(lambda *args: self.signals['updated'].append(args))
+        loader.loading_finished.connect(self.signals['finished'].append)
+        loader.start()
+        #The worker waits for this thread to commit each library it hands over.
+        while not loader.wait(10):
+            self.app.processEvents()
+        #Deliver the hand-offs queued for the GUI thread.
+        self.app.processEvents()
+
+    def test_load(self):
+        loader = self.ext_mgr.init_extension_libraries_async(start=False)
+        loader.progress_interval = 0
+        self.run_loader(loader)
+        self.assertEqual(self.signals['finished'], [True])
+        self.assertEqual(sorted(name for name, _ in self.signals['ready']), ["unit_test_mock"])
+        self.assertEqual(self.signals['progress'][0], ("user", 0, 1))
+        self.assertEqual(self.signals['progress'][-1], ("user", 1, 1))
+        self.assertEqual(self.signals['updated'], [(["unit_test_mock"], [], [])])
+        self.assertTrue(self.ext_mgr.check_installed("unit_test_mock"))
+
+    def test_load_same_name_in_both_libraries(self):
+        global_library = self.ext_mgr.libraries['global']
+        os.makedirs(global_library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(global_library, "unit_test_mock"))
+        loader = self.ext_mgr.init_extension_libraries_async(start=False)
+        self.run_loader(loader)
+        self.assertEqual(self.signals['finished'], [True])
+        #the global library is committed before the user library is synced, so the global copy is the one installed
+        self.assertEqual(self.signals['updated'], [(["unit_test_mock"], [], [])])
+        self.assertEqual(self.ext_mgr.registry.value("unit_test_mock", "type"), "global")
+
+    def test_cancel(self):
+        loader = extension_loader.ExtensionLoader(self.ext_mgr)
+        loader.cancel()
+        self.run_loader(loader)
+        self.assertEqual(self.signals['finished'], [False])
+        self.assertEqual(self.signals['updated'], [])
+        self.assertFalse(self.ext_mgr.check_installed())
@@ -61,9 +61,22 @@ import os
 import sys
 import copy
 import types
+import shutil
+import zipfile
+import json
+import tempfile
+import gc
+import zlib
+import weakref
 
 
 from commotion_client.utils import extension_manager
+from commotion_client.utils import extension_index
+from commotion_client.utils import extension_registry
+from commotion_client.utils import fs_utils
+from commotion_client.utils import profiler
+from commotion_client.utils import validate
+from commotion_client.utils import zip_catalog
 
 class ExtensionSettingsTestCase(unittest.TestCase):
 
@@ -108,6 +121,28 @@ class LoadConfigSettings(ExtensionSettingsTestCase):
             contains = (ext in k)
             self.assertTrue(contains, "Core extension {0} should have been loaded, but was not.".format(ext))
 
+    def test_load_core_sync(self):
+        """Test that core extensions are only copied into the global library when they are missing or different."""
+        self.ext_mgr.libraries['core'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.libraries['global'] = os.path.abspath("tests/temp/global/")
+        os.makedirs(self.ext_mgr.libraries['global'])
+        global_archive = os.path.join(self.ext_mgr.libraries['global'], "unit_test_mock")
+        #missing archives are copied and loaded
+        self.assertEqual(self.ext_mgr.load_core(), ["unit_test_mock"])
+        self.assertEqual(fs_utils.file_hash(global_archive), fs_utils.file_hash("tests/mock/extensions/unit_test_mock"))
+        self.assertEqual(self.ext_mgr.extensions['global'].get_path("unit_test_mock"), global_archive)
+        #identical archives are skipped
+        self.assertEqual(self.ext_mgr.load_core(), [])
+        #changed archives are replaced and only their configs re-loaded
+        with zipfile.ZipFile(global_archive, 'a') as extension:
+            extension.writestr("pineapple.txt", "pineapple")
+        global_manager = self.ext_mgr.extensions['global']
+        self.assertEqual(self.ext_mgr.load_core(), ["unit_test_mock"])
+        self.assertIs(self.ext_mgr.extensions['global'], global_manager)
+        self.assertEqual(fs_utils.file_hash(global_archive), fs_utils.file_hash("tests/mock/extensions/unit_test_mock"))
+        #no temporary files are left behind
+        self.assertEqual(os.listdir(self.ext_mgr.libraries['global']), ["unit_test_mock"])
+
     def test_init_extension_config(self):
         """Test that init extension config properly handles the various use cases."""
         #ext_type MUST be core|global|user
@@ -138,6 +173,27 @@ class LoadConfigSettings(ExtensionSettingsTestCase):
         self.ext_mgr.extensions['global'] = None
         self.ext_mgr.extensions['core'] = None        
         
+    def test_parallel_init_extension_config(self):
+        """Test that a concurrent library scan produces the same configs as a serial scan."""
+        library = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, library, ignore_errors=True)
+        for num in range(5):
+            shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "unit_test_mock_{0}".format(num)))
+        results = {}
+        for workers in [1, 4]:
+            ext_mgr = extension_manager.ExtensionManager(use_index=False, scan_workers=workers)
+            ext_mgr.libraries['user'] = library
+            ext_mgr.libraries['global'] = os.path.abspath("tests/mock/extensions/")
+            ext_mgr.libraries['core'] = os.path.join(library, "pineapple")
+            ext_mgr.init_extension_config()
+            #a missing library is skipped the same way in both modes
+            self.assertNotIn('core', ext_mgr.extensions)
+            results[workers] = dict((type_, (manager.paths, manager.configs)) for type_, manager in ext_mgr.extensions.items())
+        self.assertEqual(results[1], results[4])
+        self.assertEqual(len(results[4]['user'][0]), 5)
+        #the copies share a name, so only one config is kept
+        self.assertEqual(len(results[4]['user'][1]), 1)
+
 class GetConfigSettings(ExtensionSettingsTestCase):
 
     def test_get_installed(self):
@@ -147,6 +203,8 @@ class GetConfigSettings(ExtensionSettingsTestCase):
         #add a value to settings
         self.ext_mgr.user_settings.setValue("test/type", "global")
         self.ext_mgr.user_settings.sync()
+        #settings written outside of the extension manager are only seen once the registry is re-loaded.
+        self.ext_mgr.registry.load()
         one_item = self.ext_mgr.get_installed()
         self.assertEqual(len(one_item), 1)
         self.assertIn("test", one_item)
@@ -160,6 +218,8 @@ class GetConfigSettings(ExtensionSettingsTestCase):
         #add a value to settings
         self.ext_mgr.user_settings.setValue("test/type", "global")
         self.ext_mgr.user_settings.sync()
+        #settings written outside of the extension manager are only seen once the registry is re-loaded.
+        self.ext_mgr.registry.load()
         self.assertTrue(self.ext_mgr.check_installed())
         self.assertTrue(self.ext_mgr.check_installed("test"))
         self.assertFalse(self.ext_mgr.check_installed("pineapple"))
@@ -273,9 +333,89 @@ class ExtensionLibraries(ExtensionSettingsTestCase):
             self.ext_mgr.load_user_interface("unit_test_mock", "pineapple")
         #reject uninitialized extensions
         self.ext_mgr.user_settings.setValue("unit_test_mock/initialized", False)
+        self.ext_mgr.registry.load()
         with self.assertRaises(AttributeError):
             self.ext_mgr.load_user_interface("unit_test_mock", "toolbar")
 
+    def test_load_user_interface_cache(self):
+        sys.path.append("tests/mock/assets")
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        main = self.ext_mgr.load_user_interface("unit_test_mock", "main")
+        self.assertIn(("unit_test_mock", "main"), self.ext_mgr.ui_cache)
+        #a second request is served from the cache
+        self.assertIs(self.ext_mgr.load_user_interface("unit_test_mock", "main"), main)
+        #an invalidated extension is imported again
+        self.ext_mgr.ui_cache.invalidate("unit_test_mock")
+        self.assertNotIn(("unit_test_mock", "main"), self.ext_mgr.ui_cache)
+        self.ext_mgr.load_user_interface("unit_test_mock", "main")
+        self.assertIn(("unit_test_mock", "main"), self.ext_mgr.ui_cache)
+        #the least recently used interface is evicted when the cache is full
+        self.ext_mgr.ui_cache.max_size = 1
+        self.ext_mgr.load_user_interface("unit_test_mock", "toolbar")
+        self.assertNotIn(("unit_test_mock", "main"), self.ext_mgr.ui_cache)
+        self.assertIn(("unit_test_mock", "toolbar"), self.ext_mgr.ui_cache)
+
+    def test_load_user_interface_shared_module_name(self):
+        library = os.path.abspath("tests/temp/user_library")
+        os.makedirs(library)
+        for name in ["alpha_mock", "beta_mock"]:
+            with zipfile.ZipFile(os.path.join(library, name), 'w') as extension:
+                extension.writestr("test.conf", json.dumps({"name":name, "menu_item":name, "parent":"Testing", "main":"main", "tests":"main"}))
+                extension.writestr("main.py", "NAME = {0!r}\nclass ViewPort(object):\n    extension = NAME\nclass ToolBar(object):\n    extension = NAME\nclass SettingsMenu(object):\n    extension = NAME\n".format(name))
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        try:
+            #both extensions load their user interfaces from a module named main
+            alpha = self.ext_mgr.load_user_interface("alpha_mock", "main")
+            self.assertEqual(alpha.extension, "alpha_mock")
+            self.assertEqual(self.ext_mgr.load_user_interface("beta_mock", "main").extension, "beta_mock")
+            #the cached module of the first extension still holds its own classes
+            self.assertIs(self.ext_mgr.load_user_interface("alpha_mock", "main"), alpha)
+            self.assertEqual(alpha.extension, "alpha_mock")
+            self.assertEqual(self.ext_mgr.load_user_interface("alpha_mock", "toolbar").extension, "alpha_mock")
+        finally:
+            self.ext_mgr.unload_extension("alpha_mock")
+            self.ext_mgr.unload_extension("beta_mock")
+
+    def test_unload_extension(self):
+        sys.path.append("tests/mock/assets")
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        archive = os.path.abspath("tests/mock/extensions/unit_test_mock")
+        viewport = self.ext_mgr.load_user_interface("unit_test_mock", "main")
+        self.ext_mgr.load_user_interface("unit_test_mock", "toolbar")
+        module = sys.modules["main"]
+        self.assertIn(archive, sys.path)
+        #extensions that have been used recently are not idle
+        self.ext_mgr.idle_timeout = 60
+        self.assertEqual(self.ext_mgr.unload_idle(), [])
+        self.ext_mgr.last_used["unit_test_mock"] -= 120
+        self.assertEqual(self.ext_mgr.unload_idle(keep=["unit_test_mock"]), [])
+        self.assertEqual(self.ext_mgr.unload_idle(), ["unit_test_mock"])
+        #nothing loaded from the extension is cached or importable any more
+        for gui in ["main", "settings", "toolbar"]:
+            self.assertNotIn(("unit_test_mock", gui), self.ext_mgr.ui_cache)
+        self.assertNotIn("unit_test_mock", self.ext_mgr.ui_cache.importers)
+        self.assertNotIn(archive, sys.path)
+        prefix = os.path.join(archive, "")
+        self.assertEqual([name for name, loaded in list(sys.modules.items()) if str(getattr(loaded, "__file__", None) or "").startswith(prefix)], [])
+        #modules are reported until the last reference to them is released
+        self.assertIn("main", self.ext_mgr.get_leaked_modules()["unit_test_mock"])
+        #a weak reference keeps the first import comparable without holding its module open
+        viewport_ref = weakref.ref(viewport)
+        del module, viewport
+        gc.collect()
+        self.assertEqual(self.ext_mgr.get_leaked_modules(), {})
+        #unloaded extensions are imported again from scratch
+        reloaded = self.ext_mgr.load_user_interface("unit_test_mock", "main")
+        self.assertIsNot(reloaded, viewport_ref())
+        self.assertEqual(reloaded.__name__, "ViewPort")
+        self.ext_mgr.unload_extension("unit_test_mock")
+
     def test_get_config(self):
         #setup directory with extension
         self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
@@ -294,12 +434,53 @@ class ExtensionLibraries(ExtensionSettingsTestCase):
                         "tests":"units",
                         "type":"user",
                         "menu_level":10,
-                        "initialized":True}
+                        "initialized":True,
+                        "hash":fs_utils.file_hash("tests/mock/extensions/unit_test_mock")}
         self.assertDictEqual(config, correct_vals)
         #test that a key error is raised on un-implemented extensions
         with self.assertRaises(KeyError):
             self.ext_mgr.get_config("pineapple")
 
+    def test_registry_write_through(self):
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        #installed records are written to the settings as well as the registry
+        self.assertIn("unit_test_mock", self.ext_mgr.registry)
+        self.assertEqual(self.ext_mgr.user_settings.value("unit_test_mock/menu_item"), "A Mock Testing Object")
+        #a new registry loaded from the settings holds the same records
+        reloaded = extension_registry.ExtensionRegistry(self.ext_mgr.user_settings)
+        self.assertEqual(reloaded.names(), ["unit_test_mock"])
+        self.assertEqual(reloaded.value("unit_test_mock", "parent"), "Testing")
+        #removal is also written through
+        self.ext_mgr.remove_extension_settings("unit_test_mock")
+        self.assertNotIn("unit_test_mock", self.ext_mgr.registry)
+        self.assertNotIn("unit_test_mock", self.ext_mgr.user_settings.childGroups())
+
+    def test_registry_property_indexes(self):
+        registry = self.ext_mgr.registry
+        registry.save("ext_a", {"name":"ext_a", "parent":"Testing", "menu_level":30, "type":"user"})
+        registry.save("ext_b", {"name":"ext_b", "parent":"Testing", "menu_level":5, "type":"global"})
+        registry.save("ext_c", {"name":"ext_c", "parent":"Advanced", "type":"global"})
+        self.assertEqual(sorted(self.ext_mgr.get_extension_from_property("parent", "Testing")), ["ext_a", "ext_b"])
+        self.assertEqual(sorted(self.ext_mgr.get_extension_from_property("type", "global")), ["ext_b", "ext_c"])
+        #extensions without a menu_level use the default of 10
+        self.assertEqual(self.ext_mgr.sort_by_menu_level(["ext_a", "ext_b", "ext_c"]), ["ext_b", "ext_c", "ext_a"])
+        #property changes update the indexes
+        self.ext_mgr.set_property("ext_c", "parent", "Testing")
+        self.ext_mgr.set_property("ext_a", "menu_level", 1)
+        self.assertEqual(self.ext_mgr.get_extension_from_property("parent", "Advanced"), [])
+        self.assertEqual(self.ext_mgr.sort_by_menu_level(self.ext_mgr.get_extension_from_property("parent", "Testing")), ["ext_a", "ext_b", "ext_c"])
+        #removal updates the indexes
+        self.ext_mgr.remove_extension_settings("ext_b")
+        self.assertEqual(self.ext_mgr.get_extension_from_property("type", "global"), ["ext_c"])
+        self.assertEqual(registry.ordered(), ["ext_a", "ext_c"])
+        #a freshly loaded registry builds the same indexes
+        registry.load()
+        self.assertEqual(sorted(registry.find("parent", "Testing")), ["ext_a", "ext_c"])
+        with self.assertRaises(KeyError):
+            self.ext_mgr.set_property("ext_a", "pineapple", True)
+
     def test_reset_settings_group(self):
         #ensure that default is set to extensions
         default = self.ext_mgr.user_settings.group()
@@ -330,6 +511,199 @@ class ExtensionLibraries(ExtensionSettingsTestCase):
         multi_lev_up = self.ext_mgr.user_settings.group()
         self.assertEqual(multi_lev_up, "extensions")
 
+    def test_settings_batch(self):
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.init_extension_config("user")
+        config = self.ext_mgr.extensions["user"].find("unit_test_mock")
+        bad_config = copy.deepcopy(config)
+        bad_config['menu_item'] = "s2e" * 250
+        #nothing is written until the batch is committed, and a best-effort batch skips invalid configs
+        with self.ext_mgr.settings_batch(strict=False) as batch:
+            self.assertTrue(batch.stage(config, "user"))
+            self.assertFalse(batch.stage(bad_config, "user"))
+            self.assertFalse(self.ext_mgr.check_installed("unit_test_mock"))
+        self.assertTrue(self.ext_mgr.check_installed("unit_test_mock"))
+        self.assertIn("unit_test_mock", self.ext_mgr.user_settings.childGroups())
+        self.ext_mgr.remove_extension_settings("unit_test_mock")
+        #an error within the batch rolls it back
+        with self.assertRaises(RuntimeError):
+            with self.ext_mgr.settings_batch() as batch:
+                batch.stage(config, "user")
+                raise RuntimeError("pineapple")
+        self.assertFalse(self.ext_mgr.check_installed("unit_test_mock"))
+        #batches are abandoned on the first invalid config by default
+        with self.assertRaises(ValueError):
+            with self.ext_mgr.settings_batch() as batch:
+                batch.stage(config, "user")
+                batch.stage(bad_config, "user")
+        self.assertFalse(self.ext_mgr.check_installed("unit_test_mock"))
+
+    def test_install_loaded_incremental(self):
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.init_extension_config("user")
+        self.assertEqual(self.ext_mgr.install_loaded("user"), ["unit_test_mock"])
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "hash"), fs_utils.file_hash("tests/mock/extensions/unit_test_mock"))
+        #unchanged archives are not written again
+        self.assertEqual(self.ext_mgr.install_loaded("user"), [])
+        #changed archives are re-installed, keeping whether they are initialized
+        self.ext_mgr.set_property("unit_test_mock", "hash", "pineapple")
+        self.ext_mgr.set_property("unit_test_mock", "initialized", "false")
+        self.assertEqual(self.ext_mgr.install_loaded("user"), ["unit_test_mock"])
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "initialized"), "false")
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "hash"), fs_utils.file_hash("tests/mock/extensions/unit_test_mock"))
+        #installed extensions whose archives are gone are removed
+        self.ext_mgr.registry.save("pineapple", {"name":"pineapple", "type":"user"})
+        self.assertEqual(self.ext_mgr.install_loaded("user"), [])
+        self.assertFalse(self.ext_mgr.check_installed("pineapple"))
+        self.assertNotIn("pineapple", self.ext_mgr.user_settings.childGroups())
+        self.assertTrue(self.ext_mgr.check_installed("unit_test_mock"))
+
+    def test_refresh_library(self):
+        library = os.path.abspath("tests/temp/user_library")
+        archive = os.path.join(library, "unit_test_mock")
+        os.makedirs(library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", archive)
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        #nothing changed
+        self.assertEqual(self.ext_mgr.refresh_library("user"), ([], [], []))
+        #touching an archive without changing it does not re-install it
+        os.utime(archive, (0, 0))
+        self.assertEqual(self.ext_mgr.refresh_library("user"), ([], [], []))
+        #changed archives are re-installed
+        with zipfile.ZipFile(archive, 'a') as extension:
+            extension.writestr("pineapple.txt", "pineapple")
+        self.assertEqual(self.ext_mgr.refresh_library("user"), ([], ["unit_test_mock"], []))
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "hash"), fs_utils.file_hash(archive))
+        #removed archives are uninstalled
+        os.remove(archive)
+        self.assertEqual(self.ext_mgr.refresh_library("user"), ([], [], ["unit_test_mock"]))
+        self.assertFalse(self.ext_mgr.check_installed("unit_test_mock"))
+        self.assertEqual(self.ext_mgr.extensions['user'].configs, [])
+        #new archives are installed
+        shutil.copy("tests/mock/extensions/unit_test_mock", archive)
+        self.assertEqual(self.ext_mgr.refresh_library("user"), (["unit_test_mock"], [], []))
+        self.assertTrue(self.ext_mgr.check_installed("unit_test_mock"))
+
+    def test_install_archive(self):
+        library = os.path.abspath("tests/temp/user_library")
+        archive = os.path.join(library, "unit_test_mock")
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.libraries['global'] = os.path.abspath("tests/temp/global_library")
+        self.assertEqual(self.ext_mgr.install_archive("tests/mock/extensions/unit_test_mock"), (["unit_test_mock"], [], []))
+        self.assertTrue(self.ext_mgr.check_installed("unit_test_mock"))
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "hash"), fs_utils.file_hash("tests/mock/extensions/unit_test_mock"))
+        #installing into a library that has not been loaded does not load it
+        self.assertNotIn("user", self.ext_mgr.extensions)
+        self.assertEqual(self.ext_mgr.install_archive("tests/mock/extensions/unit_test_mock"), ([], [], []))
+        #updated archives can be streamed from any file object, and are refreshed within a loaded library
+        self.ext_mgr.init_extension_config("user")
+        updated = os.path.abspath("tests/temp/updated_mock")
+        shutil.copy("tests/mock/extensions/unit_test_mock", updated)
+        with zipfile.ZipFile(updated, 'a') as extension:
+            extension.writestr("pineapple.txt", "pineapple")
+        with open(updated, 'rb') as source:
+            self.assertEqual(self.ext_mgr.install_archive(source), ([], ["unit_test_mock"], []))
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "hash"), fs_utils.file_hash(updated))
+        self.assertEqual(self.ext_mgr.extensions['user'].get_path("unit_test_mock"), archive)
+        #archives whose manifest does not list every member are rejected
+        lying = os.path.abspath("tests/temp/lying_mock")
+        with zipfile.ZipFile("tests/mock/extensions/unit_test_mock", 'r') as extension:
+            members = dict((name, extension.read(name)) for name in extension.namelist())
+        manifest = {"format":zip_catalog.MANIFEST_FORMAT,
+                    "config_file":"test.conf",
+                    "config":json.loads(members["test.conf"].decode('utf-8')),
+                    "files":dict((name, {"size":len(data), "crc":zlib.crc32(data) & 0xffffffff}) for name, data in members.items())}
+        with zipfile.ZipFile(lying, 'w') as extension:
+            extension.writestr(zip_catalog.MANIFEST_NAME, json.dumps(manifest))
+            for name, data in members.items():
+                extension.writestr(name, data)
+            extension.writestr("hidden.py", "pineapple")
+        with self.assertRaises(ValueError):
+            self.ext_mgr.install_archive(lying)
+        self.assertEqual(self.ext_mgr.get_property("unit_test_mock", "hash"), fs_utils.file_hash(updated))
+        #invalid archives never reach the library
+        with open(updated, 'w') as broken:
+            broken.write("pineapple")
+        with self.assertRaises(ValueError):
+            self.ext_mgr.install_archive(updated)
+        with self.assertRaises(ValueError):
+            self.ext_mgr.install_archive("tests/mock/extensions/unit_test_mock", "core")
+        self.assertEqual(os.listdir(library), ["unit_test_mock"])
+
+    def test_get_orphans(self):
+        library = os.path.abspath("tests/temp/user_library")
+        os.makedirs(library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "unit_test_mock"))
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.libraries['global'] = os.path.abspath("tests/temp/global_library")
+        self.assertEqual(self.ext_mgr.get_orphans(), {'settings':[], 'archives':[os.path.join(library, "unit_test_mock")]})
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        self.assertEqual(self.ext_mgr.get_orphans(), {'settings':[], 'archives':[]})
+        #settled libraries have their listing cached until the library changes
+        os.utime(library, (1, 1))
+        self.assertIn("unit_test_mock", self.ext_mgr.get_installed())
+        self.assertEqual(self.ext_mgr.listings['user'][2], frozenset(["unit_test_mock"]))
+        os.remove(os.path.join(library, "unit_test_mock"))
+        os.utime(library, (2, 2))
+        self.assertEqual(self.ext_mgr.get_orphans(), {'settings':["unit_test_mock"], 'archives':[]})
+        self.assertNotIn("unit_test_mock", self.ext_mgr.get_installed())
+
+    def test_locate_extension(self):
+        library = os.path.abspath("tests/temp/user_library")
+        os.makedirs(library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "unit_test_mock"))
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.libraries['global'] = os.path.abspath("tests/mock/extensions")
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.init_extension_config("global")
+        self.assertEqual(self.ext_mgr.locate_extension("unit_test_mock"),
+                         [("global", os.path.abspath("tests/mock/extensions/unit_test_mock")),
+                          ("user", os.path.join(library, "unit_test_mock"))])
+        self.assertEqual(self.ext_mgr.locate_extension("pineapple"), [])
+        self.assertEqual(self.ext_mgr.get_duplicates(),
+                         {"unit_test_mock":[os.path.abspath("tests/mock/extensions/unit_test_mock"),
+                                            os.path.join(library, "unit_test_mock")]})
+
+    def test_load_profile(self):
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.profiler.reset()
+        self.ext_mgr.init_extension_config("user")
+        self.ext_mgr.install_loaded("user")
+        config = self.ext_mgr.extensions["user"].find("unit_test_mock")
+        self.ext_mgr.save_settings(config, "user")
+        stages = [row['stage'] for row in self.ext_mgr.profiler.get_report("unit_test_mock")]
+        for stage in ["discover", "load_config", "build_settings", "save_settings"]:
+            self.assertIn(stage, stages)
+        self.assertEqual([name for name, total in self.ext_mgr.profiler.get_totals()], ["unit_test_mock"])
+        #the report can be dumped for later comparison
+        path = self.ext_mgr.profiler.dump(os.path.abspath("tests/temp/profile.json"))
+        with open(path) as profile:
+            self.assertEqual(len(json.load(profile)['stages']), len(stages))
+
+    def test_validation_cache(self):
+        self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
+        self.ext_mgr.init_extension_config("user")
+        config = self.ext_mgr.extensions["user"].find("unit_test_mock")
+        archive_hash = fs_utils.file_hash("tests/mock/extensions/unit_test_mock")
+        key = validate.validation_cache.key(config, archive_hash)
+        validate.validation_cache.clear()
+        self.assertTrue(self.ext_mgr.save_settings(config, "user"))
+        self.assertEqual(validate.validation_cache.get(key), (True, []))
+        #unchanged extensions are not re-validated
+        self.ext_mgr.profiler.reset()
+        self.assertTrue(self.ext_mgr.save_settings(config, "user"))
+        stages = [row['stage'] for row in self.ext_mgr.profiler.get_report("unit_test_mock")]
+        self.assertNotIn("validate_main", stages)
+        #a changed config is validated and its errors are cached with it
+        bad_config = copy.deepcopy(config)
+        bad_config['menu_item'] = "s2e" * 250
+        self.assertFalse(self.ext_mgr.save_settings(bad_config, "user"))
+        self.assertEqual(validate.validation_cache.get(validate.validation_cache.key(bad_config, archive_hash)), (False, ["menu_item"]))
+        self.assertEqual(len(validate.validation_cache), 2)
+
     def test_remove_extension_settings(self):
         #setup directory with extension
         self.ext_mgr.libraries['user'] = os.path.abspath("tests/mock/extensions/")
@@ -379,8 +753,9 @@ class ExtensionLibraries(ExtensionSettingsTestCase):
         emp_name_conf = copy.deepcopy(config)
         emp_name_conf['name'] = ""
         self.assertFalse(self.ext_mgr.save_settings(emp_name_conf, "user"))
+        #Saves go through the registry, which only writes the values in the new record. A config without a main value keeps the main saved before.
         settings = {'toolbar':'main',
-                    'main':None,
+                    'main':'main',
                     'settings':'main',
                     'parent':'Extensions',
                     'menu_item':'unit_test_mock',
@@ -475,6 +850,22 @@ class ConfigManagerTests(unittest.TestCase):
                                             'menu_item': 'A Mock Testing Object',
                                             'main': 'main'} )
 
+    def test_duplicates(self):
+        library = os.path.abspath("tests/temp/library")
+        os.makedirs(os.path.join(library, "nested"))
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "unit_test_mock"))
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "nested", "unit_test_mock"))
+        config = extension_manager.ConfigManager(library)
+        first, second = os.path.join(library, "unit_test_mock"), os.path.join(library, "nested", "unit_test_mock")
+        #only the archive nearest the top of the library is used
+        self.assertEqual(len(config.configs), 1)
+        self.assertEqual(config.get_path("unit_test_mock"), first)
+        self.assertEqual(config.get_duplicates(), {"unit_test_mock":[first, second]})
+        #removing the shadowed archive is not a change to the extension
+        os.remove(second)
+        self.assertEqual(config.refresh([second]), ([], [], []))
+        self.assertEqual(config.get_duplicates(), {})
+
     def test_get_path(self):
         self.empty_config = extension_manager.ConfigManager()
         #an empty path should raise an error
@@ -528,6 +919,59 @@ class ConfigManagerTests(unittest.TestCase):
 
 
 
+class ExtensionIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.app.setOrganizationName("test_case");
+        self.app.setApplicationName("testing_app");
+        self.index_path = os.path.abspath("tests/temp/index.json")
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        #Delete everything under tests/temp
+        for root, dirs, files in os.walk(os.path.abspath("tests/temp/"), topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+
+    def test_index_populated_and_reused(self):
+        mock_path = os.path.abspath("tests/mock/extensions/unit_test_mock")
+        index = extension_index.ExtensionIndex("tests/mock/extensions", self.index_path)
+        self.assertEqual(index.entries, {})
+        config = extension_manager.ConfigManager("tests/mock/extensions", index)
+        entry = index.lookup(mock_path)
+        self.assertEqual(entry['config'], config.find("unit_test_mock"))
+        self.assertIn("test.conf", entry['members'])
+        self.assertTrue(index.save())
+        #a new index loaded from disk serves the config without opening the archive.
+        reloaded = extension_index.ExtensionIndex("tests/mock/extensions", self.index_path)
+        self.assertEqual(reloaded.lookup(mock_path), entry)
+        cached_config = extension_manager.ConfigManager("tests/mock/extensions", reloaded)
+        self.assertEqual(cached_config.configs, config.configs)
+
+    def test_index_detects_changes(self):
+        shutil.copy("tests/mock/extensions/unit_test_mock", "tests/temp/unit_test_mock")
+        temp_path = os.path.abspath("tests/temp/unit_test_mock")
+        index = extension_index.ExtensionIndex("tests/temp", self.index_path)
+        extension_manager.ConfigManager("tests/temp", index)
+        self.assertIsNotNone(index.lookup(temp_path))
+        #touching an archive without changing it keeps the entry
+        os.utime(temp_path, (0, 0))
+        self.assertIsNotNone(index.lookup(temp_path))
+        #changing the contents invalidates the entry
+        with open(temp_path, 'ab') as archive:
+            archive.write(b"\0")
+        self.assertIsNone(index.lookup(temp_path))
+        #removed archives are pruned
+        os.remove(temp_path)
+        self.assertEqual(index.prune(), [temp_path])
+
+
+
 def test_init_extension_config(self):
     """Test that init extension config properly handles the various use cases."""
     #ext_type MUST be core|global|user
@@ -0,0 +1,83 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/extension_service.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import os
+import shutil
+
+from commotion_client.utils import extension_manager
+from commotion_client.utils import extension_service
+
+class ExtensionServiceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.app.setOrganizationName("test_case");
+        self.app.setApplicationName("testing_app");
+        library = os.path.abspath("tests/temp/user_library")
+        os.makedirs(library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(library, "unit_test_mock"))
+        self.ext_mgr = extension_manager.ExtensionManager(use_index=False)
+        self.ext_mgr.libraries['user'] = library
+        self.ext_mgr.libraries['global'] = os.path.abspath("tests/temp/global_library")
+        self.ext_mgr.libraries['core'] = os.path.abspath("tests/temp/pineapple/")
+        self.service = extension_service.ExtensionService(self.ext_mgr, snapshot=False)
+
+    def tearDown(self):
+        self.service.stop()
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        self.ext_mgr.user_settings.clear()
+        self.ext_mgr = None
+        shutil.rmtree(os.path.abspath("tests/temp/user_library"), ignore_errors=True)
+        shutil.rmtree(os.path.abspath("tests/temp/global_library"), ignore_errors=True)
+
+    def test_get_service(self):
+        self.assertIs(extension_service.get_service(), extension_service.get_service())
+        self.assertIs(self.service.manager, self.ext_mgr)
+
+    def test_load(self):
+        updated, finished, watchers = [], [], []
+        self.service.extensions_updated.connect(lambda *args: updated.append(args))
+        #watching is put off until the load has finished
+        self.service.extensions_updated.connect(lambda *args: watchers.append(self.service.start_watching()))
+        self.service.loading_finished.connect(finished.append)
+        self.service.load()
+        #The loader waits for this thread to commit each library.
+        while not self.service.loader.wait(10):
+            self.app.processEvents()
+        self.app.processEvents()
+        self.assertEqual(finished, [True])
+        self.assertEqual(updated, [(["unit_test_mock"], [], [])])
+        self.assertEqual(watchers, [None])
+        self.assertFalse(self.service.is_loading())
+        self.assertIsNotNone(self.service.watcher)
+        self.assertTrue(self.ext_mgr.check_installed("unit_test_mock"))
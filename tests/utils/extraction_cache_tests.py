@@ -0,0 +1,102 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/extraction_cache.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import os
+import sys
+import shutil
+import zipfile
+
+from commotion_client.utils import extraction_cache
+from commotion_client.utils import fs_utils
+
+class ExtractionCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.archive = os.path.abspath("tests/temp/library/unit_test_mock")
+        os.makedirs(os.path.dirname(self.archive))
+        shutil.copy("tests/mock/extensions/unit_test_mock", self.archive)
+        self.directory = os.path.abspath("tests/temp/extracted")
+        os.makedirs(self.directory)
+        self.cache = extraction_cache.ExtractionCache(self.directory)
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        sys.modules.pop("units", None)
+        shutil.rmtree(os.path.abspath("tests/temp/library"), ignore_errors=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_extract(self):
+        path = self.cache.get_path("unit_test_mock", self.archive, fs_utils.file_hash(self.archive))
+        self.assertEqual(path, os.path.join(self.directory, "unit_test_mock"))
+        self.assertTrue(os.path.isfile(os.path.join(path, "ui", "test.ui")))
+        marker = self.cache.read_marker(path)
+        self.assertEqual(marker['hash'], fs_utils.file_hash(self.archive))
+        #no temporary directories are left behind
+        self.assertEqual(os.listdir(self.directory), ["unit_test_mock"])
+        module = extraction_cache.DirectoryImporter(path).load_module("units")
+        self.assertEqual(module.__file__, os.path.join(path, "units.py"))
+        with self.assertRaises(ImportError):
+            extraction_cache.DirectoryImporter(path).load_module("pineapple")
+        #an archive that does not match its expected hash is not extracted
+        with self.assertRaises(IOError):
+            self.cache.get_path("unit_test_mock", self.archive, "pineapple")
+
+    def test_stale(self):
+        path = self.cache.get_path("unit_test_mock", self.archive)
+        os.remove(os.path.join(path, "units.py"))
+        #touching the archive does not make its extraction stale
+        os.utime(self.archive, (1, 1))
+        self.cache.get_path("unit_test_mock", self.archive)
+        self.assertFalse(os.path.exists(os.path.join(path, "units.py")))
+        #changing its contents does
+        with zipfile.ZipFile(self.archive, 'a') as archive:
+            archive.writestr("pineapple.py", "")
+        self.cache.get_path("unit_test_mock", self.archive)
+        self.assertTrue(os.path.exists(os.path.join(path, "units.py")))
+        self.assertTrue(os.path.exists(os.path.join(path, "pineapple.py")))
+
+    def test_evict(self):
+        shutil.copy(self.archive, self.archive + "_two")
+        self.cache.get_path("unit_test_mock", self.archive)
+        two = self.cache.get_path("unit_test_mock_two", self.archive + "_two")
+        #the least recently used extraction is evicted first
+        os.utime(os.path.join(two, extraction_cache.MARKER_NAME), (1, 1))
+        self.cache.max_size = self.cache.get_extractions()[0][2]
+        self.assertEqual(self.cache.evict(), ["unit_test_mock_two"])
+        self.assertEqual([name for name, _, _ in self.cache.get_extractions()], ["unit_test_mock"])
+        #extractions unused for longer than max_age are evicted
+        self.cache.max_age = -1
+        self.assertEqual(self.cache.evict(keep=["unit_test_mock"]), [])
+        self.assertEqual(self.cache.evict(), ["unit_test_mock"])
+        self.assertEqual(self.cache.get_extractions(), [])
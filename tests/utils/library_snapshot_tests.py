@@ -0,0 +1,96 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/library_snapshot.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import os
+import shutil
+import zipfile
+
+from commotion_client.utils import extension_manager
+from commotion_client.utils import library_snapshot
+
+class LibrarySnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.app.setOrganizationName("test_case");
+        self.app.setApplicationName("testing_app");
+        self.library = os.path.abspath("tests/temp/user_library")
+        self.archive = os.path.join(self.library, "unit_test_mock")
+        os.makedirs(self.library)
+        shutil.copy("tests/mock/extensions/unit_test_mock", self.archive)
+        self.path = os.path.abspath("tests/temp/snapshot.json")
+        self.ext_mgr = self.create_manager()
+        self.ext_mgr.init_extension_config("user")
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        self.ext_mgr = None
+        shutil.rmtree(self.library, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def create_manager(self):
+        ext_mgr = extension_manager.ExtensionManager(use_index=False)
+        ext_mgr.libraries['user'] = self.library
+        return ext_mgr
+
+    def test_attach(self):
+        self.assertEqual(self.ext_mgr.publish_snapshot(self.path), self.path)
+        attached = self.create_manager()
+        self.assertEqual(attached.attach_snapshot(self.path), ["user"])
+        config_manager = attached.extensions['user']
+        self.assertEqual(config_manager.configs, self.ext_mgr.extensions['user'].configs)
+        self.assertEqual(config_manager.get_path("unit_test_mock"), self.archive)
+        self.assertIn("test.conf", config_manager.catalogs[self.archive].entries)
+        #nothing has changed since the snapshot was published
+        self.assertEqual(config_manager.changed_paths(), [])
+        #libraries that are already loaded are left alone
+        self.assertEqual(attached.attach_snapshot(self.path), [])
+        #archives changed after publishing are re-read
+        with zipfile.ZipFile(self.archive, 'a') as extension:
+            extension.writestr("pineapple.txt", "pineapple")
+        self.assertEqual(attached.update_extension_config("user"), ([], ["unit_test_mock"], []))
+
+    def test_attach_invalid(self):
+        #no snapshot
+        self.assertIsNone(library_snapshot.attach(self.path))
+        #unreadable snapshots
+        for contents in ["", "pineapple", '{"version":0, "libraries":{}}']:
+            with open(self.path, mode='w', encoding="utf-8") as snapshot_file:
+                snapshot_file.write(contents)
+            self.assertIsNone(library_snapshot.attach(self.path))
+        #a snapshot of a different library
+        self.ext_mgr.publish_snapshot(self.path)
+        attached = self.create_manager()
+        attached.libraries['user'] = os.path.abspath("tests/mock/extensions")
+        self.assertEqual(attached.attach_snapshot(self.path), [])
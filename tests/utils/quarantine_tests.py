@@ -0,0 +1,111 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/quarantine.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import os
+import shutil
+
+from commotion_client.utils import extension_manager
+from commotion_client.utils import quarantine
+
+class QuarantineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.app.setOrganizationName("test_case");
+        self.app.setApplicationName("testing_app");
+        self.library = os.path.abspath("tests/temp/user_library")
+        os.makedirs(self.library)
+        self.archive = os.path.join(self.library, "broken_extension")
+        with open(self.archive, mode='w', encoding="utf-8") as broken:
+            broken.write("pineapple")
+        self.path = os.path.abspath("tests/temp/quarantine.json")
+        self.quarantine = quarantine.Quarantine(self.path)
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        self.quarantine = None
+        shutil.rmtree(self.library, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_add(self):
+        self.assertIsNone(self.quarantine.check(self.archive))
+        content_hash = self.quarantine.add(self.archive, "pineapple", ["main"])
+        entry = self.quarantine.check(self.archive)
+        self.assertEqual(entry['hash'], content_hash)
+        self.assertEqual(entry['reason'], "pineapple")
+        self.assertEqual(entry['errors'], ["main"])
+        #the quarantine survives restarts
+        self.assertTrue(self.quarantine.save())
+        restarted = quarantine.Quarantine(self.path)
+        self.assertEqual(restarted.check(self.archive)['hash'], content_hash)
+        #the same archive anywhere else is not quarantined
+        copied = os.path.join(self.library, "copied_extension")
+        shutil.copy(self.archive, copied)
+        self.assertIsNone(restarted.check(copied))
+        #changed archives are released
+        with open(self.archive, mode='a', encoding="utf-8") as broken:
+            broken.write("pineapple")
+        self.assertIsNone(restarted.check(self.archive))
+        self.assertEqual(len(restarted), 0)
+
+    def test_release(self):
+        first = self.quarantine.add(self.archive, "pineapple")
+        other = os.path.join(self.library, "other_extension")
+        with open(other, mode='w', encoding="utf-8") as broken:
+            broken.write("banana")
+        second = self.quarantine.add(other, "banana")
+        self.assertEqual(sorted(entry['hash'] for entry in self.quarantine.get_entries()), sorted([first, second]))
+        with self.assertRaises(KeyError):
+            self.quarantine.release("pineapple")
+        self.assertEqual(self.quarantine.release(first[:8]), [first])
+        self.assertIsNone(self.quarantine.check(self.archive))
+        self.assertIsNotNone(self.quarantine.check(other))
+        self.assertEqual(self.quarantine.release(), [second])
+        self.assertEqual(self.quarantine.get_entries(), [])
+
+    def test_skip_failed_archives(self):
+        ext_mgr = extension_manager.ExtensionManager(use_index=False)
+        ext_mgr.quarantine = self.quarantine
+        ext_mgr.libraries['user'] = self.library
+        shutil.copy("tests/mock/extensions/unit_test_mock", os.path.join(self.library, "unit_test_mock"))
+        ext_mgr.init_extension_config("user")
+        self.assertEqual(ext_mgr.extensions['user'].get_path("unit_test_mock"), os.path.join(self.library, "unit_test_mock"))
+        quarantined = ext_mgr.get_quarantined()
+        self.assertEqual([entry['paths'] for entry in quarantined], [[self.archive]])
+        #quarantined archives are not opened again
+        ext_mgr.extensions['user'].open_catalog = lambda path: self.fail("{0} was opened.".format(path))
+        self.assertEqual(ext_mgr.extensions['user'].scan_archive(self.archive), (self.archive, False))
+        #released archives are read again on the next update
+        self.assertEqual(ext_mgr.release_quarantined(), [quarantined[0]['hash']])
+        self.assertIn(self.archive, ext_mgr.extensions['user'].changed_paths())
@@ -0,0 +1,159 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/validate.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import os
+import copy
+
+from commotion_client.utils import validate
+from commotion_client.utils import zip_catalog
+
+class LibraryValidatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.mock_path = "tests/mock/extensions/unit_test_mock"
+        self.catalog = zip_catalog.ZipCatalog(self.mock_path)
+        self.config = {"name":"unit_test_mock",
+                       "menu_item":"A Mock Testing Object",
+                       "parent":"Testing",
+                       "toolbar":"test_bar",
+                       "tests":"units"}
+        self.validator = validate.LibraryValidator(platform="linux")
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+
+    def test_valid_config(self):
+        result = self.validator.validate(self.config, self.catalog.entries, self.mock_path)
+        self.assertTrue(result.valid)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.extension, "unit_test_mock")
+        self.assertEqual(result.path, self.mock_path)
+
+    def test_all_errors_reported(self):
+        config = copy.deepcopy(self.config)
+        config['menu_item'] = "s2e" * 250
+        config['menu_level'] = 0
+        config['toolbar'] = "pineapple"
+        config['pineapple'] = True
+        result = self.validator.validate(config, self.catalog.entries)
+        self.assertFalse(result.valid)
+        self.assertEqual(sorted(error.key for error in result.errors), ["menu_item", "menu_level", "pineapple", "toolbar"])
+        #without the archive's members only the config itself is checked
+        config['menu_level'] = 100
+        del config['pineapple']
+        result = self.validator.validate(config)
+        self.assertEqual([error.key for error in result.errors], ["menu_item"])
+
+    def test_defaults(self):
+        #settings defaults to main, and menu_item to name
+        result = self.validator.validate({"name":"un"}, {"main.py":None})
+        self.assertEqual([error.key for error in result.errors], ["menu_item"])
+        result = self.validator.validate({"name":"unit_test_mock", "main":"units"}, {"main.py":None})
+        self.assertEqual(sorted(error.key for error in result.errors), ["main", "settings", "toolbar"])
+        result = self.validator.validate({"menu_item":"A Mock Testing Object"})
+        self.assertEqual([error.key for error in result.errors], ["name"])
+
+    def test_menu_level_bounds(self):
+        #menu levels from 1 to 100 are accepted. The old check ("not 0 < val > 100") only accepted levels above 100.
+        for level, valid in [(1, True), (100, True), ("50", True), (0, False), (101, False), (-1, False), ("pineapple", False)]:
+            config = copy.deepcopy(self.config)
+            config['menu_level'] = level
+            result = self.validator.validate(config, self.catalog.entries)
+            self.assertEqual(result.valid, valid, level)
+            self.assertEqual([error.key for error in result.errors], [] if valid else ["menu_level"])
+
+    def test_bytecode_modules(self):
+        #extensions packaged as bytecode only have .pyc modules
+        members = dict((name + "c" if name.endswith(".py") else name, info) for name, info in self.catalog.entries.items())
+        self.assertTrue(self.validator.validate(self.config, members).valid)
+        del members["test_bar.pyc"]
+        result = self.validator.validate(self.config, members)
+        self.assertEqual([error.key for error in result.errors], ["toolbar"])
+
+    def test_platform_characters(self):
+        self.assertIsNone(self.validator.check_file_name("unit_test_mock"))
+        self.assertIsNotNone(self.validator.check_file_name("unit/test"))
+        self.assertIsNotNone(self.validator.check_file_name(""))
+        windows = validate.LibraryValidator(platform="win32")
+        self.assertIsNone(windows.check_file_name("unit_test_mock"))
+        for name in ["unit:test", "unit?test", "unit[test]", "unit\\test", "unit|test"]:
+            self.assertIsNotNone(windows.check_file_name(name))
+        darwin = validate.LibraryValidator(platform="darwin")
+        self.assertIsNotNone(darwin.check_file_name("unit:test"))
+        self.assertIsNone(darwin.check_file_name("unit?test"))
+
+    def test_validate_library(self):
+        bad_config = copy.deepcopy(self.config)
+        bad_config['parent'] = "s2"
+        results = self.validator.validate_library([("one", self.config, self.catalog.entries),
+                                                   ("two", bad_config, self.catalog.entries)])
+        self.assertEqual([result.path for result in results], ["one", "two"])
+        self.assertEqual([result.valid for result in results], [True, False])
+        self.assertEqual([error.key for error in results[1].errors], ["parent"])
+
+class ClientConfigTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.config = {"name":"unit_test_mock",
+                       "menu_item":"A Mock Testing Object",
+                       "parent":"Testing",
+                       "toolbar":"test_bar",
+                       "tests":"units"}
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+
+    def test_menu_level(self):
+        for level, valid in [(1, True), (10, True), (100, True), (0, False), (101, False), ("pineapple", False)]:
+            config = copy.deepcopy(self.config)
+            config['menu_level'] = level
+            self.assertEqual(validate.ClientConfig(config).menu_level(), valid)
+
+    def test_check_path_chars(self):
+        validator = validate.ClientConfig(self.config)
+        self.assertTrue(validator.check_path_chars("unit_test_mock"))
+        self.assertFalse(validator.check_path_chars("unit/test_mock"))
+
+    def test_validate_all(self):
+        validator = validate.ClientConfig(self.config, os.path.abspath("tests/mock/extensions/"), cache=None)
+        self.assertTrue(validator.validate_all())
+        config = copy.deepcopy(self.config)
+        config['toolbar'] = "pineapple"
+        config['parent'] = "s2"
+        validator = validate.ClientConfig(config, os.path.abspath("tests/mock/extensions/"), cache=None)
+        self.assertFalse(validator.validate_all())
+        self.assertEqual(sorted(validator.errors), ["parent", "toolbar"])
@@ -0,0 +1,156 @@
+"""
+
+This program is a part of The Commotion Client
+
+Copyright (C) 2014  Seamus Tuohy s2e@opentechinstitute.org
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+"""
+Unit Tests for commotion_client/utils/zip_catalog.py
+
+Uses the mock extension at tests/mock/extensions/unit_test_mock
+"""
+
+from PyQt4 import QtGui
+
+import unittest
+import zipfile
+import json
+import os
+import zlib
+from collections import OrderedDict
+
+from commotion_client.utils import zip_catalog
+
+class ZipCatalogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.mock_path = "tests/mock/extensions/unit_test_mock"
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+
+    def test_catalog(self):
+        catalog = zip_catalog.ZipCatalog(self.mock_path)
+        #the handle used to read the central directory is closed
+        self.assertTrue(catalog.closed)
+        with zipfile.ZipFile(self.mock_path, 'r') as archive:
+            self.assertEqual(catalog.namelist(), archive.namelist())
+            info = archive.getinfo("main.py")
+            self.assertEqual(catalog.info("main.py"), [info.file_size, info.compress_size, info.CRC])
+            main = archive.read("main.py")
+        self.assertTrue(catalog.contains("test.conf"))
+        self.assertFalse(catalog.contains("pineapple.py"))
+        self.assertEqual(catalog.find(".conf"), "test.conf")
+        self.assertEqual(json.loads(catalog.read("test.conf").decode('utf-8'))['name'], "unit_test_mock")
+        self.assertEqual(catalog.read("main.py"), main)
+        with self.assertRaises(KeyError):
+            catalog.read("pineapple.py")
+
+    def test_shared_handle(self):
+        catalog = zip_catalog.ZipCatalog(self.mock_path)
+        with catalog:
+            self.assertFalse(catalog.closed)
+            catalog.read("main.py")
+            catalog.read("units.py")
+        self.assertTrue(catalog.closed)
+
+    def test_catalog_from_entries(self):
+        catalog = zip_catalog.ZipCatalog(self.mock_path)
+        copied = zip_catalog.ZipCatalog(self.mock_path, entries=catalog.entries)
+        self.assertEqual(copied.namelist(), catalog.namelist())
+        self.assertEqual(copied.read("test.conf"), catalog.read("test.conf"))
+
+    def test_find_last(self):
+        #archives with more than one config keep loading the last one
+        entries = OrderedDict([("first.conf", [1, 1, 1]), ("main.py", [1, 1, 1]), ("second.conf", [1, 1, 1])])
+        catalog = zip_catalog.ZipCatalog(self.mock_path, entries=entries)
+        self.assertEqual(catalog.find(".conf"), "second.conf")
+        self.assertIsNone(catalog.find(".pineapple"))
+
+    def test_not_a_zip(self):
+        with self.assertRaises(zipfile.BadZipFile):
+            zip_catalog.ZipCatalog("tests/run_tests.py")
+
+class ManifestTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtGui.QApplication([])
+        self.mock_path = "tests/mock/extensions/unit_test_mock"
+        self.package = os.path.abspath("tests/temp/manifest_mock")
+        with zipfile.ZipFile(self.mock_path, 'r') as archive:
+            self.members = dict((name, archive.read(name)) for name in archive.namelist())
+        self.config = json.loads(self.members["test.conf"].decode('utf-8'))
+        self.manifest = {"format":zip_catalog.MANIFEST_FORMAT,
+                         "config_file":"test.conf",
+                         "config":self.config,
+                         "files":dict((name, {"size":len(data), "crc":zlib.crc32(data) & 0xffffffff}) for name, data in self.members.items()),
+                         "entry_points":{"main":"main", "settings":"main", "toolbar":"test_bar", "tests":"units"}}
+
+    def tearDown(self):
+        self.app.deleteLater()
+        del self.app
+        self.app = None
+        if os.path.exists(self.package):
+            os.remove(self.package)
+
+    def write_package(self, compress_type=zipfile.ZIP_STORED):
+        with zipfile.ZipFile(self.package, 'w') as archive:
+            archive.writestr(zip_catalog.MANIFEST_NAME, json.dumps(self.manifest), compress_type)
+            for name, data in self.members.items():
+                archive.writestr(name, data)
+
+    def test_read_manifest(self):
+        self.write_package()
+        self.assertEqual(zip_catalog.read_manifest(self.package), self.manifest)
+        catalog = zip_catalog.open_catalog(self.package)
+        self.assertEqual(catalog.get_config(), self.config)
+        self.assertEqual(sorted(catalog.namelist()), sorted([zip_catalog.MANIFEST_NAME] + list(self.members)))
+        self.assertEqual(catalog.info("main.py")[2], self.manifest["files"]["main.py"]["crc"])
+        self.assertEqual(catalog.read("test.conf"), self.members["test.conf"])
+        #archives without a manifest are cataloged from their central directory
+        self.assertIsNone(zip_catalog.read_manifest(self.mock_path))
+        self.assertIsNone(zip_catalog.open_catalog(self.mock_path).get_config())
+
+    def test_unreadable_manifest(self):
+        #a compressed manifest cannot be read from the start of the archive, but is still found in the central directory
+        self.write_package(zipfile.ZIP_DEFLATED)
+        self.assertIsNone(zip_catalog.read_manifest(self.package))
+        self.assertEqual(zip_catalog.open_catalog(self.package).get_config(), self.config)
+        #manifests in an unknown format are ignored
+        self.manifest["format"] = zip_catalog.MANIFEST_FORMAT + 1
+        self.write_package()
+        self.assertIsNone(zip_catalog.read_manifest(self.package))
+        self.assertIsNone(zip_catalog.open_catalog(self.package).manifest)
+
+    def test_verify_manifest(self):
+        self.write_package()
+        self.assertTrue(zip_catalog.ZipCatalog(self.package).verify_manifest())
+        self.assertFalse(zip_catalog.ZipCatalog(self.mock_path).verify_manifest())
+        #manifests that leave out a member do not match the central directory
+        del self.manifest["files"]["main.py"]
+        self.write_package()
+        self.assertFalse(zip_catalog.ZipCatalog(self.package).verify_manifest())
+        #manifests whose config differs from the config file do not match
+        self.manifest["files"]["main.py"] = {"size":len(self.members["main.py"]), "crc":zlib.crc32(self.members["main.py"]) & 0xffffffff}
+        self.manifest["config"] = dict(self.config, menu_item="Pineapple")
+        self.write_package()
+        self.assertFalse(zip_catalog.ZipCatalog(self.package).verify_manifest())